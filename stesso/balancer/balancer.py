@@ -1,22 +1,63 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from scipy.optimize import lsq_linear as scipy_lsq_linear
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from typing import TYPE_CHECKING
 
+from .presolve import presolve
+from .qp import solve_qp
+from .report import BalancerReport, ProgressCallback, SolverStats
+
 if TYPE_CHECKING:
     from ..network.net import Network
 
 
+# Solver modes of balance_volumes.
+BALANCE_METHODS = ('weighted', 'exact')
+
+# Row weight of the flow conservation equations in the 'weighted' method.
+FLOW_WEIGHT = 999999.0
+
+# Target volume bounds are target * (1 - tolerance) to target * (1 + tolerance).
+TARGET_TOLERANCE = 0.5
+
+# Largest flow conservation residual of a converged block.
+EXACT_TOLERANCE = 1e-6
+
+# Weight, 1 / delta, of the flow conservation rows in the feasibility solve, 
+# and the small weight on the volumes that keeps its solution bounded. 
+# See _closest_flow.
+FEASIBILITY_DELTA = 1e-4
+FEASIBILITY_REGULARIZATION = 1e-8
+
+# Weight on the squared volumes in the objective of each block. It keeps 
+# volumes that no target or flow conservation row pins down, e.g. on a loop 
+# of links without targets, close to zero instead of arbitrarily large.
+VOLUME_REGULARIZATION = 1e-6
+
+# Solver outcome of a block that needs no solve, see _solve_block.
+_NO_SOLVE = ('', 0, 'No solve needed.', 0, True, False)
+
+
 @dataclass
 class BalancerResult:
     matrix_cols_turns: dict
     matrix_cols_links: dict
     balancer_est: list
+    system: '_BalancerSystem | None' = None
+    report: BalancerReport = field(default_factory=BalancerReport)
 
 
-def balance_volumes(net: 'Network') -> BalancerResult:
+def balance_volumes(net: 'Network', n_workers: int | None = 1, 
+                    method: str = 'weighted', presolve: bool = True,
+                    tolerance: float = TARGET_TOLERANCE, 
+                    progress: ProgressCallback | None = None) -> BalancerResult:
     """Balance link and turn volumes in the network.
     
     Uses a linear least squares approach to volume balancing. Solves the matrix
@@ -30,13 +71,37 @@ def balance_volumes(net: 'Network') -> BalancerResult:
     In the example below, the first row of A demonstrates a flow conservation
     equation where turns (t) #1, #2, #3 must equal the volume of link #6, that is:
         t_1 + t_2 + t_3 - l_6 = 0
-    Because this equation must hold true, the corresponding cell in the weight
-    matrix is assigned a high weight 999999.
+    Because this equation must hold true, the corresponding row weight is 
+    assigned a high weight 999999.
 
     The second row in the A matrix shows a target volume constraint where turn #1
     should equal 42, i.e. t_1 = 60. The least squares result may or may not be 
     able to accomodate the turn target, so its weight is assigned 1. Higher weight
     could be used to encourage the least squares result to be closer to the target.
+
+    A is assembled as a sparse matrix and the weights are applied as a row scaling,
+    so memory grows with the number of non-zero entries rather than rows x columns.
+
+    Links and turns that do not share a flow conservation equation, directly or 
+    through other links and turns, are independent. A is split into these 
+    connected components and each one is solved as its own, smaller, least 
+    squares problem.
+
+    The row weights make A badly conditioned, so each component is solved as
+    the equivalent sparse quadratic program, with an interior point method 
+    whose linear systems keep the flow conservation rows and their weight 
+    apart (see _solve_block and qp.solve_qp). Flow conservation then holds 
+    to within rounding. A component whose target bounds conflict with flow
+    conservation gets the least squares compromise, and is reported as not
+    converged.
+
+    With method='exact' the flow conservation equations are hard equality 
+    constraints, C.x = 0, and only the target volume equations remain least
+    squares terms: minimize |T.x - t|^2 subject to C.x = 0 and the bounds. 
+    Redundant conservation rows are left out of C (see _redundant_rows). A
+    component whose target bounds cannot all be met together with flow 
+    conservation is solved without the target bounds, and reported with 
+    SolverStats.bounds_relaxed.
     
     EXAMPLE:
     network object type assigned to each column variable: t = turn, l = link
@@ -46,13 +111,417 @@ def balance_volumes(net: 'Network') -> BalancerResult:
                 A = [[0 1 1 1 0 0 -1 ...],     B = [[0],      W = [[999999],
                      [0 1 0 0 0 0  0 ...],          [42],          [1],
                      [...]]                         [...]]         [...]]
-     
+
+    Parameters
+    ----------
+    net : Network
+        Network with target volumes to balance.
+    n_workers : int, optional
+        Number of worker processes used to solve the components, by default 1,
+        which solves every component in the current process. None uses one 
+        worker per CPU.
+    method : str, optional
+        'weighted' (default) enforces flow conservation with high row weights.
+        'exact' enforces it as equality constraints. See BALANCE_METHODS.
+    presolve : bool, optional
+        Shrink each component before solving it, by default True. Links with
+        a single inbound or outbound turn have the same volume as that turn,
+        so their columns are merged, and the flow conservation rows that 
+        only say so are dropped. See presolve.presolve.
+    tolerance : float, optional
+        Fraction the balanced volume of a link or turn may differ from its 
+        target, by default TARGET_TOLERANCE (0.5, i.e. +/-50%). Must be 
+        greater than 0.
+    progress : ProgressCallback, optional
+        Called as progress(phase, done, total) while balancing, by default None.
+        See report.ProgressCallback.
+
+    Returns
+    -------
+    BalancerResult
+        Matrix column of each turn and link, the balanced volume in each column,
+        and a report of the run (see report.BalancerReport).
+
+    Raises
+    ------
+    ValueError
+        If method is not in BALANCE_METHODS or tolerance is not greater than 0.
+    """
+    if method not in BALANCE_METHODS:
+        raise ValueError(f'Unknown balance method {method}. Expected one of {BALANCE_METHODS}.')
+    _check_tolerance(tolerance)
+
+    start_time = time.perf_counter()
+    _notify(progress, 'assemble', 0, 1)
+
+    matrix_cols_turns, matrix_cols_links = _assign_matrix_cols(net)
+    system = _build_system(net, matrix_cols_turns, matrix_cols_links, tolerance)
+    system.method = method
+    system.presolve = presolve
+
+    _notify(progress, 'assemble', 1, 1)
+    assembled_time = time.perf_counter()
+
+    final_mat, stats = _solve_by_component(system, n_workers, progress=progress)
+
+    report = _build_report(system, final_mat, stats, _phase_timings(start_time, assembled_time))
+    _notify(progress, 'done', 1, 1)
+    return BalancerResult(matrix_cols_turns, matrix_cols_links, final_mat, system, report)
+
+
+def rebalance_volumes(net: 'Network', prev_result: BalancerResult, 
+                      changed_turns=(), changed_links=(), 
+                      n_workers: int | None = 1,
+                      progress: ProgressCallback | None = None) -> BalancerResult:
+    """Re-balance after editing the target volume of a few links or turns.
+
+    Reuses the matrices cached in a previous result. Only the target rows and
+    bounds of the changed links and turns are updated, and only the components
+    (see balance_volumes) containing them are solved again. Each of those 
+    components is warm-started from the previous solution. All other volumes
+    are copied from the previous result.
+
+    Falls back to a full balance_volumes if the previous result has no cached
+    matrices or the network links and turns have changed since. Uses the 
+    solver method, presolve and target tolerance of the previous result.
+
+    Parameters
+    ----------
+    net : Network
+        Network that was balanced to produce prev_result.
+    prev_result : BalancerResult
+        Result of the previous balance_volumes or rebalance_volumes.
+    changed_turns : Iterable[tuple[int, int, int]], optional
+        Keys of turns whose target volume changed.
+    changed_links : Iterable[tuple[int, int]], optional
+        Keys of links whose target volume changed.
+    n_workers : int, optional
+        Number of worker processes, by default 1. See balance_volumes.
+    progress : ProgressCallback, optional
+        Called as progress(phase, done, total) while balancing, by default None.
+
+    Returns
+    -------
+    BalancerResult
+        Updated result. Its cached matrices can be used for the next re-balance.
+        Its report only covers the components that were solved again.
+
+    Raises
+    ------
+    ValueError
+        If the target tolerance of the previous result is not greater than 0.
+    """
+    prev_system = prev_result.system
+    if prev_system is not None:
+        _check_tolerance(prev_system.tolerance)
+
+    if (prev_system is None
+        or len(prev_result.matrix_cols_turns) != len(net._turns)
+        or len(prev_result.matrix_cols_links) != sum(1 for _ in net.links())):
+        if prev_system is None:
+            return balance_volumes(net, n_workers, progress=progress)
+        return balance_volumes(net, n_workers, prev_system.method, 
+                               prev_system.presolve, prev_system.tolerance, progress)
+
+    start_time = time.perf_counter()
+    _notify(progress, 'assemble', 0, 1)
+
+    changed = [(prev_result.matrix_cols_turns[t], net.turn(*t).target_volume) for t in changed_turns]
+    changed += [(prev_result.matrix_cols_links[l], net.link(*l).target_volume) for l in changed_links]
+
+    system = _BalancerSystem(
+        A=prev_system.A, 
+        B=prev_system.B.copy(), 
+        lbounds=prev_system.lbounds.copy(), 
+        ubounds=prev_system.ubounds.copy(), 
+        n_flow_eq=prev_system.n_flow_eq,
+        target_rows=dict(prev_system.target_rows),
+        components=prev_system.components,
+        col_components=prev_system.col_components,
+        redundant_rows=prev_system.redundant_rows,
+        method=prev_system.method,
+        presolve=prev_system.presolve,
+        tolerance=prev_system.tolerance)
+
+    new_rows = []
+    zeroed_rows = []
+
+    for col, target_volume in changed:
+        row = system.target_rows.get(col)
+
+        if target_volume == -1:
+            # Target removed. Keep the row, but give it no weight.
+            system.lbounds[col], system.ubounds[col] = 0, np.inf
+            if row is not None:
+                zeroed_rows.append(row)
+                system.B[row] = 0
+            continue
+
+        system.lbounds[col], system.ubounds[col], weight = _target_constraint(target_volume, system.tolerance)
+
+        if row is None:
+            system.target_rows[col] = system.A.shape[0] + len(new_rows)
+            new_rows.append((col, weight, weight * target_volume))
+        else:
+            system.B[row] = weight * target_volume
+            if row in zeroed_rows:
+                zeroed_rows.remove(row)
+            _set_row_weight(system, row, weight)
+
+    if len(zeroed_rows) > 0 or len(new_rows) > 0:
+        # Only copy A if its rows change.
+        A = system.A.copy()
+        for row in zeroed_rows:
+            A.data[A.indptr[row]:A.indptr[row + 1]] = 0
+        
+        if len(new_rows) > 0:
+            cols = [col for col, _, _ in new_rows]
+            vals = [weight for _, weight, _ in new_rows]
+            A_new = sparse.csr_matrix((vals, (range(len(new_rows)), cols)), 
+                                      shape=(len(new_rows), A.shape[1]))
+            A = sparse.vstack([A, A_new], format='csr')
+            system.B = np.concatenate([system.B, [b for _, _, b in new_rows]])
+
+            # Target rows only reference one column, so the components do not
+            # merge, but they gain rows.
+            system.components = [
+                (np.concatenate([rows, [system.target_rows[c] for c in cols if system.col_components[c] == n]]).astype(rows.dtype), comp_cols)
+                for n, (rows, comp_cols) in enumerate(system.components)]
+
+        system.A = A
+
+    affected = sorted({int(system.col_components[col]) for col, _ in changed})
+    x0 = np.asarray(prev_result.balancer_est, dtype=float)
+
+    _notify(progress, 'assemble', 1, 1)
+    assembled_time = time.perf_counter()
+
+    final_mat, stats = _solve_by_component(system, n_workers, x0=x0, component_ids=affected,
+                                           progress=progress)
+
+    report = _build_report(system, final_mat, stats, _phase_timings(start_time, assembled_time))
+    _notify(progress, 'done', 1, 1)
+    return BalancerResult(prev_result.matrix_cols_turns, prev_result.matrix_cols_links, 
+                          final_mat, system, report)
+
+
+def balance_periods(net: 'Network', target_volumes: np.ndarray, n_workers: int | None = 1,
+                    method: str = 'weighted', presolve: bool = True,
+                    tolerance: float = TARGET_TOLERANCE,
+                    progress: ProgressCallback | None = None) -> list[BalancerResult]:
+    """Balance link and turn volumes for many sets of target volumes, e.g. time periods.
+
+    The flow conservation rows, components and redundant rows (see 
+    balance_volumes) only depend on the network links and turns, so they are 
+    built once and shared by every period. Only the target rows, B and the 
+    bounds are built per period. The components of all periods are then solved
+    together, in the current process or in a pool of n_workers processes.
+
+    The volumes of each period are the same as from balance_volumes with the
+    network target volumes set to that period's targets. The target volumes
+    stored in the network are not used or changed.
+
+    Parameters
+    ----------
+    net : Network
+        Network to balance.
+    target_volumes : np.ndarray
+        (n_periods x n_turns + n_links) target volumes. Columns are the turns 
+        in Network.turns order followed by the links in Network.links order,
+        e.g. np.hstack([turn_targets, link_targets]). -1 means no target.
+    n_workers : int, optional
+        Number of worker processes, by default 1. None uses one worker per CPU.
+    method : str, optional
+        Solver method, by default 'weighted'. See balance_volumes.
+    presolve : bool, optional
+        Presolve each component, by default True. See balance_volumes.
+    tolerance : float, optional
+        Target volume tolerance, by default TARGET_TOLERANCE. See balance_volumes.
+    progress : ProgressCallback, optional
+        Called as progress(phase, done, total) while balancing, by default None.
+        The 'solve' phase counts the components of all periods.
+
+    Returns
+    -------
+    list[BalancerResult]
+        Result of each period. Each can be passed to rebalance_volumes after
+        setting the network target volumes to that period's targets. The 
+        'assemble' time in each report includes building the shared flow 
+        conservation rows, and the 'solve' time is the sum of the solve times
+        of the period's components.
+
+    Raises
+    ------
+    ValueError
+        If method is not in BALANCE_METHODS, tolerance is not greater than 0,
+        or target_volumes has the wrong number of columns.
+    """
+    if method not in BALANCE_METHODS:
+        raise ValueError(f'Unknown balance method {method}. Expected one of {BALANCE_METHODS}.')
+    _check_tolerance(tolerance)
+
+    matrix_cols_turns, matrix_cols_links = _assign_matrix_cols(net)
+    n_turns, n_links = len(matrix_cols_turns), len(matrix_cols_links)
+
+    target_volumes = np.atleast_2d(np.asarray(target_volumes, dtype=float))
+    if target_volumes.shape[1] != n_turns + n_links:
+        raise ValueError(f'target_volumes has {target_volumes.shape[1]} columns, expected '
+                         f'{n_turns + n_links} ({n_turns} turns and {n_links} links).')
+
+    start_time = time.perf_counter()
+    _notify(progress, 'assemble', 0, len(target_volumes))
+
+    flow_system = _build_flow_system(net, n_turns, n_links)
+    flow_system.method = method
+    flow_system.presolve = presolve
+    flow_time = time.perf_counter() - start_time
+
+    systems = []
+    solutions = []
+    assemble_times = []
+    subproblems = []
+    subproblem_cols = []
+
+    for targets in target_volumes:
+        period_start = time.perf_counter()
+        system = _add_target_rows(flow_system, targets, tolerance)
+        x, period_subproblems, period_cols = _component_subproblems(system)
+
+        systems.append(system)
+        solutions.append(x)
+        assemble_times.append(flow_time + time.perf_counter() - period_start)
+        subproblems += period_subproblems
+        subproblem_cols.append(period_cols)
+        _notify(progress, 'assemble', len(systems), len(target_volumes))
+
+    solved = iter(_solve_subproblems(subproblems, n_workers, progress))
+
+    results = []
+    for x, system, period_cols, assemble_time in zip(solutions, systems, subproblem_cols, 
+                                                     assemble_times):
+        stats = []
+        for cols in period_cols:
+            x[cols], sub_stats = next(solved)
+            stats.append(sub_stats)
+
+        solve_time = sum(s.time for s in stats)
+        timings = {'assemble': assemble_time, 'solve': solve_time, 
+                   'total': assemble_time + solve_time}
+        report = _build_report(system, x, stats, timings)
+        results.append(BalancerResult(matrix_cols_turns, matrix_cols_links, x, system, report))
+
+    _notify(progress, 'done', 1, 1)
+    return results
+
+
+def _check_tolerance(tolerance: float) -> None:
+    """Raise ValueError unless the target volume tolerance is greater than 0.
+
+    A tolerance of 0 fixes every volume with a target at that target, which 
+    flow conservation can rarely meet.
     """
+    if not tolerance > 0:
+        raise ValueError(f'Target volume tolerance must be greater than 0, got {tolerance}.')
+
+
+def _notify(progress: ProgressCallback | None, phase: str, done: int, total: int) -> None:
+    """Call the progress callback, if there is one."""
+    if progress is not None:
+        progress(phase, done, total)
+
+
+def _phase_timings(start_time: float, assembled_time: float) -> dict[str, float]:
+    """Seconds spent assembling and solving, from time.perf_counter values."""
+    end_time = time.perf_counter()
+    return {'assemble': assembled_time - start_time, 
+            'solve': end_time - assembled_time, 
+            'total': end_time - start_time}
 
 
-    # --------------------------------------------------------------------
-    # Assign matrix column numbers to each link and turn in the network
-    # --------------------------------------------------------------------
+def _build_report(system: '_BalancerSystem', x: np.ndarray, stats: list[SolverStats],
+                  timings: dict[str, float]) -> BalancerReport:
+    """Summarize a solved system. Residuals are unweighted, in volume units."""
+    n_flow_eq = system.n_flow_eq
+    residual = system.A @ x - system.B
+
+    # Flow conservation rows all have weight FLOW_WEIGHT. Target rows have a
+    # single entry, their weight.
+    conservation = residual[:n_flow_eq] / FLOW_WEIGHT
+    target_weights = np.abs(system.A[n_flow_eq:].sum(axis=1)).A1
+    target = np.divide(residual[n_flow_eq:], target_weights, 
+                       out=np.zeros(len(target_weights)), where=target_weights != 0)
+    # Removed targets keep their row with no weight, see rebalance_volumes.
+    target = target[target_weights != 0]
+
+    def max_abs(values):
+        return float(np.abs(values).max()) if len(values) > 0 else 0.0
+
+    def rms(values):
+        return float(np.sqrt(np.mean(values ** 2))) if len(values) > 0 else 0.0
+
+    return BalancerReport(timings=timings,
+                          shape=system.A.shape,
+                          nnz=int(system.A.nnz),
+                          n_flow_rows=n_flow_eq,
+                          n_target_rows=int(np.count_nonzero(target_weights)),
+                          method=system.method,
+                          components=stats,
+                          conservation_max=max_abs(conservation),
+                          conservation_rms=rms(conservation),
+                          target_max=max_abs(target),
+                          target_rms=rms(target),
+                          cost=float(0.5 * (residual @ residual)))
+
+
+@dataclass
+class _BalancerSystem:
+    """Weighted matrix equation W.Ax = W.B and solution bounds. See balance_volumes.
+    
+    Attributes
+    ----------
+    A : sparse.csr_matrix
+        Weighted A matrix. Flow conservation rows come first, then target rows.
+    B : np.ndarray
+        Weighted B matrix.
+    lbounds : np.ndarray
+        Lower bound of each variable (column).
+    ubounds : np.ndarray
+        Upper bound of each variable (column).
+    n_flow_eq : int
+        Number of flow conservation rows at the top of A.
+    target_rows : dict[int, int]
+        Column -> row of its target volume equation.
+    components : list[tuple[np.ndarray, np.ndarray]]
+        (row indices, column indices) of each independent block of A. 
+        See _find_components.
+    col_components : np.ndarray
+        Index into components for each column.
+    redundant_rows : np.ndarray
+        Flow conservation rows implied by the other rows. See _redundant_rows.
+    method : str
+        Solver method, see BALANCE_METHODS.
+    presolve : bool
+        Reduce each block with presolve.presolve before solving it.
+    tolerance : float
+        Fraction the balanced volumes may differ from their targets. 
+        See _target_constraint.
+    """
+    A: sparse.csr_matrix
+    B: np.ndarray
+    lbounds: np.ndarray
+    ubounds: np.ndarray
+    n_flow_eq: int
+    target_rows: dict[int, int]
+    components: list[tuple[np.ndarray, np.ndarray]]
+    col_components: np.ndarray
+    redundant_rows: np.ndarray
+    method: str = 'weighted'
+    presolve: bool = True
+    tolerance: float = TARGET_TOLERANCE
+
+
+def _assign_matrix_cols(net: 'Network') -> tuple[dict, dict]:
+    """Assign matrix column numbers to each link and turn in the network."""
     matrix_cols_turns = {}
     matrix_cols_links = {}
 
@@ -66,125 +535,521 @@ def balance_volumes(net: 'Network') -> BalancerResult:
         matrix_cols_links[(i, j)] = free_col_number
         free_col_number += 1        
 
-    n_variables = len(matrix_cols_turns) + len(matrix_cols_links)
+    return matrix_cols_turns, matrix_cols_links
+
+
+def _build_system(net: 'Network', matrix_cols_turns: dict, matrix_cols_links: dict,
+                  tolerance: float = TARGET_TOLERANCE) -> _BalancerSystem:
+    """Build the weighted A, B matrices and bounds for the network. See balance_volumes.
+    
+    Turn columns are in Network.turns order and link columns follow in 
+    Network.links order (see _assign_matrix_cols), so the column of a turn is its
+    dense turn id and the column of a link is n_turns + its dense link id.
+    """
+    flow_system = _build_flow_system(net, len(matrix_cols_turns), len(matrix_cols_links))
+    targets = np.concatenate([net.turn_array('target_volume'), net.link_array('target_volume')])
+    return _add_target_rows(flow_system, targets, tolerance)
+
+
+def _build_flow_system(net: 'Network', n_turns: int, n_links: int) -> _BalancerSystem:
+    """Build the flow conservation rows of the system, without any targets.
+    
+    The flow conservation rows are built in bulk from Network.link_turn_index.
+    They only depend on the network links and turns, so the result can be
+    shared by systems with different target volumes. See _add_target_rows.
+    """
+    n_variables = n_turns + n_links
     
     # --------------------------------------------------------------------------
     # Build A matrix in Ax = B equation.  
     # --------------------------------------------------------------------------
 
-    # Determine how many flow conservation equations are needed.
     # Conservation equations are in the form of the following examples:
     #   sum(turns_in) - link_vol = 0
     #   sum(turns_out) - link_vol = 0
+    #   sum(turns_in) - sum(turns_out) = 0
+    # Each link has one row for each equation that applies to it, in that order.
+    index = net.link_turn_index()
+    n_in = index.n_in
+    n_out = index.n_out
 
-    n_flow_eq = 0
-    for link in net.links():
-        if len(link.turns_in) > 0:
-            n_flow_eq += 1
-        if len(link.turns_out) > 0:
-            n_flow_eq += 1
-        if (len(link.turns_in) > 0) and (len(link.turns_out) > 0):
-            n_flow_eq += 1
-
-    # Initialize A matrix with flow conservation equations.
-    # Target volume equations are appended to A later.
-    A = np.zeros(shape=(n_flow_eq, n_variables))
-    
-    # Build flow equations one-by-one. Use flow_eq_row to keep track of current row in matrix A.
-    flow_eq_row = 0
-
-    def update_matrix_a_flow_eq(link_flows: list, eq_row: int, link_col: int) -> int:
-        """Helper function to create link flow conservation equations."""
-        for turn in link_flows:
-            turn_col = matrix_cols_turns[turn]
-            A[eq_row, turn_col] = 1
-        
-        A[eq_row, link_col] = -1    
+    has_in = n_in > 0
+    has_out = n_out > 0
+    has_both = has_in & has_out
+
+    n_link_rows = has_in.astype(np.int64) + has_out + has_both
+    in_row = np.cumsum(n_link_rows) - n_link_rows
+    out_row = in_row + has_in
+    both_row = out_row + has_out
+    n_flow_eq = int(n_link_rows.sum())
+
+    link_cols = n_turns + np.arange(n_links)
+
+    in_both = np.repeat(has_both, n_in)
+    out_both = np.repeat(has_both, n_out)
+
+    # A is sparse: each row only references the turns and link it constrains.
+    # Non-zero entries are collected in coordinate (COO) form: A[rows[n], cols[n]] = vals[n]
+    flow_entries = [
+        # sum(turns_in) - link_vol = 0
+        (np.repeat(in_row, n_in), index.in_turns, 1),
+        (in_row[has_in], link_cols[has_in], -1),
+        # sum(turns_out) - link_vol = 0
+        (np.repeat(out_row, n_out), index.out_turns, 1),
+        (out_row[has_out], link_cols[has_out], -1),
+        # sum(turns_in) - sum(turns_out) = 0
+        (np.repeat(both_row, n_in)[in_both], index.in_turns[in_both], 1),
+        (np.repeat(both_row, n_out)[out_both], index.out_turns[out_both], -1)]
 
-    for link_key, link in net.links(True):
-        link_col = matrix_cols_links[link_key]
+    rows = np.concatenate([r for r, _, _ in flow_entries])
+    cols = np.concatenate([c for _, c, _ in flow_entries])
+    vals = np.concatenate([np.full(len(r), v, dtype=float) for r, _, v in flow_entries])
 
-        if len(link.turns_in) > 0:
-            update_matrix_a_flow_eq(link.turns_in, flow_eq_row, link_col)
-            flow_eq_row += 1
+    # Use extremely high weight to force flow conservation equations to hold true.
+    # Weighting W.A is a row scaling, applied directly to the non-zero entries.
+    A = sparse.csr_matrix((vals * FLOW_WEIGHT, (rows, cols)), shape=(n_flow_eq, n_variables))
+
+    # Target rows only reference one column, so they never join components.
+    components = _find_components(A)
+
+    col_components = np.zeros(n_variables, dtype=np.int64)
+    for n, (_, comp_cols) in enumerate(components):
+        col_components[comp_cols] = n
+
+    redundant_rows = _redundant_rows(components, col_components, n_turns, 
+                                     in_row, has_in, has_out)
+
+    # Lower and upper bounds on resulting volumes.
+    lbounds = np.zeros(n_variables)
+    ubounds = np.full(n_variables, np.inf)
+
+    return _BalancerSystem(A, np.zeros(n_flow_eq), lbounds, ubounds, n_flow_eq, 
+                           {}, components, col_components, redundant_rows)
 
-        if len(link.turns_out) > 0:
-            update_matrix_a_flow_eq(link.turns_out, flow_eq_row, link_col)
-            flow_eq_row += 1
 
-        if (len(link.turns_in) > 0) and (len(link.turns_out) > 0):
-            for t_in in link.turns_in:
-                turn_col = matrix_cols_turns[t_in]
-                A[flow_eq_row, turn_col] = 1                
-            
-            for t_out in link.turns_out:
-                turn_col = matrix_cols_turns[t_out]
-                A[flow_eq_row, turn_col] = -1
+def _add_target_rows(flow_system: _BalancerSystem, targets: np.ndarray, 
+                     tolerance: float = TARGET_TOLERANCE) -> _BalancerSystem:
+    """Return a copy of a flow conservation system with target volume rows.
 
-            flow_eq_row += 1
+    Parameters
+    ----------
+    flow_system : _BalancerSystem
+        Flow conservation rows from _build_flow_system. Not modified.
+    targets : np.ndarray
+        Target volume of each column, -1 for no target.
+    tolerance : float, optional
+        Fraction the balanced volumes may differ from their targets, by default
+        TARGET_TOLERANCE.
+
+    Returns
+    -------
+    _BalancerSystem
+        System with one target row per column with a target, in column order,
+        after the flow conservation rows.
+    """
+    n_flow_eq = flow_system.n_flow_eq
+    n_variables = flow_system.A.shape[1]
 
     # ----------------------------------------------------------------
+    # - Append target volume equations to A
     # - Build B matrix in Ax = B equation, 
     # - Provide solution bounds, and
     # - Build weight matrix W
     # ----------------------------------------------------------------
-    B = [0] * A.shape[0]
-    
-    # Lower and upper bounds on resulting volumes.
-    lbounds = [0] * A.shape[1]
-    ubounds = [np.inf] * A.shape[1]
+    targets = np.asarray(targets, dtype=float)
+    target_cols = np.flatnonzero(targets != -1)
+    target_volumes = targets[target_cols]
+    target_row = n_flow_eq + np.arange(len(target_cols))
 
-    # Weight matrix.
-    # Use extremely high weight to force flow conservation equations to hold true.
+    lbounds = flow_system.lbounds.copy()
+    ubounds = flow_system.ubounds.copy()
+
+    target_lbounds, target_ubounds, target_weights = _target_constraint(target_volumes, tolerance)
+    lbounds[target_cols] = target_lbounds
+    ubounds[target_cols] = target_ubounds
+
+    # Weights for each target row of A.
     # Use lower weights on target volume equations that have flexibility in their reults.
-    W = [999999] * A.shape[0]
+    A_targets = sparse.csr_matrix((target_weights, (np.arange(len(target_cols)), target_cols)), 
+                                  shape=(len(target_cols), n_variables))
+    A = sparse.vstack([flow_system.A, A_targets], format='csr')
+    B = np.concatenate([flow_system.B, target_weights * target_volumes])
 
-    # Append equations for target volumes.
-    def update_abw_for_target_constraints(target_volume, col):
-        """Helper function to update A, B, W matrices, and bounds for target constaints."""
-        
-        # Allow re-assigning A defined in outer scope.
-        nonlocal A
+    # Row of the target volume equation for each column with a target.
+    target_rows = dict(zip(target_cols.tolist(), target_row.tolist()))
 
-        new_eq = np.array([[0] * A.shape[1]])
-        new_eq[0, col] = 1
-        
-        A = np.concatenate((A, new_eq), axis=0)
-        B.append(target_volume)
+    # Each target row joins the component of its column.
+    target_components = flow_system.col_components[target_cols]
+    order = np.argsort(target_components, kind='stable')
+    split_at = np.searchsorted(target_components[order], np.arange(1, len(flow_system.components)))
+    component_target_rows = np.split(target_row[order], split_at)
 
-        tol = 0.5
+    components = [(np.concatenate([rows, new_rows]).astype(np.int64), comp_cols) 
+                  for (rows, comp_cols), new_rows in zip(flow_system.components, component_target_rows)]
 
-        lbounds[col] = target_volume * (1 - tol)
-        
-        if target_volume == 0:
-            ubounds[col] = 0.01
-            W.append(1)
-        else:
-            ubounds[col] = target_volume * (1 + tol)
-            W.append(1)  
+    return _BalancerSystem(A, B, lbounds, ubounds, n_flow_eq, target_rows, components,
+                           flow_system.col_components, flow_system.redundant_rows,
+                           flow_system.method, flow_system.presolve, tolerance)
 
 
-    for t, col in matrix_cols_turns.items():
-        target_volume = net._turns[t].target_volume
-        if target_volume == -1:
-            continue
-        update_abw_for_target_constraints(target_volume, col)
+def _redundant_rows(components, col_components, n_turns, in_row, has_in, has_out) -> np.ndarray:
+    """Find the flow conservation rows that are implied by the other rows.
 
-    for l, col in matrix_cols_links.items():
-        target_volume = net.link(l[0], l[1]).target_volume
-        if target_volume == -1:
+    The 'exact' method needs linearly independent equality constraints.
+    
+    - sum(turns_in) - sum(turns_out) = 0 is the difference of the link's other 
+      two rows, so it is always redundant.
+    - The remaining rows are independent, except in a component where every 
+      link has inbound and outbound turns. There, the sum of all the 
+      sum(turns_in) - link_vol rows minus all the sum(turns_out) - link_vol 
+      rows is zero, so one row of the component is redundant.
+
+    Returns
+    -------
+    np.ndarray
+        Row indices of the redundant flow conservation rows.
+    """
+    has_both = has_in & has_out
+    both_row = (in_row + has_in + has_out)[has_both]
+
+    # Components whose links all have inbound and outbound turns.
+    link_components = col_components[n_turns:]
+    n_components = len(components)
+    has_open_link = np.bincount(link_components[~has_both], minlength=n_components) > 0
+    has_link = np.bincount(link_components, minlength=n_components) > 0
+    closed = has_link & ~has_open_link
+
+    # Drop the sum(turns_in) - link_vol row of the first link of each closed component.
+    _, first_link = np.unique(link_components, return_index=True)
+    first_link = first_link[closed[link_components[first_link]]]
+
+    return np.sort(np.concatenate([both_row, in_row[first_link]])).astype(np.int64)
+
+
+def _target_constraint(target_volume, tol: float = TARGET_TOLERANCE):
+    """Lower bound, upper bound, and row weight for target volume equations.
+    
+    Accepts a single target volume or an array of target volumes. The bounds 
+    allow the balanced volume to differ from the target by the fraction tol.
+    """
+    target_volume = np.asarray(target_volume, dtype=float)
+
+    lbound = target_volume * (1 - tol)
+    ubound = np.where(target_volume == 0, 0.01, target_volume * (1 + tol))
+    weight = np.ones_like(target_volume)
+    
+    return lbound, ubound, weight
+
+
+def _set_row_weight(system: _BalancerSystem, row: int, weight: float) -> None:
+    """Set the weight of a single-entry target row of A, copying A first."""
+    A = system.A
+    start, end = A.indptr[row], A.indptr[row + 1]
+    if np.array_equal(A.data[start:end], [weight]):
+        return
+    
+    A = A.copy()
+    A.data[start:end] = weight
+    system.A = A
+
+
+def _find_components(A: sparse.csr_matrix) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Split the A matrix into independent blocks.
+
+    Rows and columns of A are nodes of a bipartite graph, connected wherever A
+    has a non-zero entry. Each connected component of that graph is a block of
+    A that can be solved on its own.
+    See: https://docs.scipy.org/doc/scipy/reference/generated/scipy.sparse.csgraph.connected_components.html
+
+    Parameters
+    ----------
+    A : sparse.csr_matrix
+        A matrix in Ax = B.
+
+    Returns
+    -------
+    List
+        (row indices, column indices) of each component. Components are ordered
+        by their lowest column index.
+    """
+    n_rows, n_cols = A.shape
+    coo = A.tocoo()
+
+    # Graph nodes 0 .. n_cols - 1 are columns, n_cols .. n_cols + n_rows - 1 are rows.
+    n_graph = n_cols + n_rows
+    graph = sparse.coo_matrix((np.ones(coo.nnz), (coo.col, coo.row + n_cols)), 
+                              shape=(n_graph, n_graph))
+    _, labels = connected_components(graph, directed=False)
+
+    col_labels = labels[:n_cols]
+    row_labels = labels[n_cols:]
+
+    col_order = np.argsort(col_labels, kind='stable')
+    row_order = np.argsort(row_labels, kind='stable')
+
+    # Split the sorted indices wherever the component label changes.
+    comp_labels, col_starts = np.unique(col_labels[col_order], return_index=True)
+    comp_cols = np.split(col_order, col_starts[1:])
+
+    row_starts = np.searchsorted(row_labels[row_order], comp_labels)
+    row_ends = np.searchsorted(row_labels[row_order], comp_labels, side='right')
+    comp_rows = [row_order[a:b] for a, b in zip(row_starts, row_ends)]
+
+    return list(zip(comp_rows, comp_cols))
+
+
+def _solve_by_component(system: _BalancerSystem, n_workers: int | None = 1, 
+                        x0: np.ndarray | None = None, 
+                        component_ids: list[int] | None = None,
+                        progress: ProgressCallback | None = None) -> tuple[np.ndarray, list[SolverStats]]:
+    """Solve each independent block of the system and combine the results.
+
+    Parameters
+    ----------
+    system : _BalancerSystem
+        Matrix equation to solve.
+    n_workers : int, optional
+        Number of worker processes, by default 1. None uses one worker per CPU.
+    x0 : np.ndarray, optional
+        Previous solution of the full system. If given, the solves are 
+        warm-started from it and components that are not solved keep its values.
+    component_ids : list[int], optional
+        Components to solve, by default None (all components).
+    progress : ProgressCallback, optional
+        Called as progress('solve', n_solved, n_components) after each 
+        component is solved, by default None.
+
+    Returns
+    -------
+    tuple[np.ndarray, list[SolverStats]]
+        Solution x of the full system, and the outcome of each solved component.
+    """
+    x, subproblems, subproblem_cols = _component_subproblems(system, x0, component_ids)
+
+    stats = []
+    for cols, (sub_x, sub_stats) in zip(subproblem_cols, 
+                                        _solve_subproblems(subproblems, n_workers, progress)):
+        x[cols] = sub_x
+        stats.append(sub_stats)
+
+    return x, stats
+
+
+def _component_subproblems(system: _BalancerSystem, x0: np.ndarray | None = None, 
+                           component_ids: list[int] | None = None) -> tuple[np.ndarray, list, list]:
+    """Split the system into one subproblem per component. See _solve_by_component.
+
+    Returns
+    -------
+    tuple[np.ndarray, list, list]
+        Solution x with the values of the components that need no solve, the
+        subproblems (see _solve_subproblem), and the columns of each subproblem.
+    """
+    x = np.zeros(system.A.shape[1]) if x0 is None else x0.copy()
+
+    if component_ids is None:
+        component_ids = range(len(system.components))
+
+    subproblems = []
+    subproblem_cols = []
+
+    for n in component_ids:
+        rows, cols = system.components[n]
+
+        if len(rows) == 0:
+            # Variable is not in any equation. Keep it as close to zero as the bounds allow.
+            x[cols] = np.clip(0, system.lbounds[cols], system.ubounds[cols])
             continue
-        update_abw_for_target_constraints(target_volume, col)
 
-    B = np.array(B)
-    W = np.diag(W)
+        A = system.A[rows][:, cols]
+        B = system.B[rows]
+        exact = system.method == 'exact'
+
+        # Flow conservation rows first, without their weight, then the target rows.
+        # The 'exact' method needs linearly independent equality constraints.
+        is_flow = rows < system.n_flow_eq
+        is_eq = is_flow & ~np.isin(rows, system.redundant_rows) if exact else is_flow
+        order = np.concatenate([np.flatnonzero(is_eq), np.flatnonzero(~is_flow)])
+        n_eq = int(is_eq.sum())
+
+        scale = np.ones(len(order))
+        scale[:n_eq] = 1 / FLOW_WEIGHT
+        A = sparse.diags(scale) @ A[order]
+        B = scale * B[order]
+
+        subproblems.append((A, 
+                            B, 
+                            system.lbounds[cols], 
+                            system.ubounds[cols],
+                            None if x0 is None else x0[cols],
+                            n_eq,
+                            system.presolve,
+                            exact))
+        subproblem_cols.append(cols)
+
+    return x, subproblems, subproblem_cols
+
+
+def _solve_subproblems(subproblems: list, n_workers: int | None = 1, 
+                       progress: ProgressCallback | None = None) -> list[tuple[np.ndarray, SolverStats]]:
+    """Solve subproblems in the current process or in a pool of worker processes.
+
+    Returns the solution and solver outcome of each subproblem, in the same 
+    order. progress, if given, is called as progress('solve', n_solved, n_total)
+    as the solutions arrive.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if n_workers > 1 and len(subproblems) > 1:
+        # Send subproblems in batches, several per worker, when there are many small ones.
+        chunksize = max(1, len(subproblems) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # executor.map returns results in the same order as subproblems.
+            results = executor.map(_solve_subproblem, subproblems, chunksize=chunksize)
+            return _report_progress(results, len(subproblems), progress)
+
+    return _report_progress(map(_solve_subproblem, subproblems), len(subproblems), progress)
+
+
+def _report_progress(results, n_total: int, progress: ProgressCallback | None) -> list:
+    """Collect results into a list, calling progress('solve', n, n_total) after each."""
+    collected = []
+    for result in results:
+        collected.append(result)
+        if progress is not None:
+            progress('solve', len(collected), n_total)
+    return collected
+
+
+def _solve_subproblem(subproblem: tuple) -> tuple[np.ndarray, SolverStats]:
+    """Solve one block of the system, see _solve_block.
 
+    If presolve is on, the block is first reduced by presolve.presolve (aliased
+    columns merged, fixed columns folded into B, empty rows dropped), and the
+    solution of the reduced block is expanded back to all columns of the block.
+    Merged columns are exactly equal. If the expanded solution does not 
+    conserve flow, the block is solved again without the presolve: the flow
+    rows dropped by the presolve may not be balanced by fixed columns, and
+    a least squares compromise between conflicting targets and flow 
+    conservation should spread the imbalance over all flow rows, including
+    the ones merged away.
 
-    # --------------------------------------
-    # Solve Matrix Equation Ax = B
-    # --------------------------------------
-    result = scipy_lsq_linear(np.dot(W, A), np.dot(W, B), bounds=(lbounds, ubounds))
-    final_mat = result.x
+    Parameters
+    ----------
+    subproblem : tuple
+        A, B, lower bounds, upper bounds, starting point x0 (or None), the
+        number of flow conservation rows at the top of A, whether to presolve,
+        and whether to use the 'exact' method.
 
-    print("Done balancing.")
-    return BalancerResult(matrix_cols_turns, matrix_cols_links, final_mat)
+    Returns
+    -------
+    tuple[np.ndarray, SolverStats]
+        Solution x of the block, and the solver outcome.
+    """
+    A, B, lbounds, ubounds, x0, n_eq, use_presolve, exact = subproblem
+    start_time = time.perf_counter()
+
+    if not use_presolve:
+        x, info = _solve_block(A, B, lbounds, ubounds, n_eq, exact)
+        solved_shape = A.shape
+    else:
+        reduced = presolve(A, B, lbounds, ubounds, x0, n_eq)
+        z, info = _solve_block(reduced.A, reduced.B, reduced.lbounds, reduced.ubounds, 
+                               reduced.n_eq, exact)
+        x = reduced.postsolve(z)
+        solved_shape = reduced.A.shape
+
+        if np.abs(A[:n_eq] @ x - B[:n_eq]).max(initial=0) > EXACT_TOLERANCE:
+            x, full_info = _solve_block(A, B, lbounds, ubounds, n_eq, exact)
+            info = full_info[:3] + (info[3] + full_info[3],) + full_info[4:]
+            solved_shape = A.shape
+
+    solver, status, message, iterations, converged, bounds_relaxed = info
+    stats = SolverStats(A.shape[0], A.shape[1], solved_shape[0], solved_shape[1], 
+                        solver, status, message, iterations, converged,
+                        time.perf_counter() - start_time, bounds_relaxed)
+    return x, stats
+
+
+def _solve_block(A, B, lbounds, ubounds, n_eq, exact) -> tuple[np.ndarray, tuple]:
+    """Solve one block as a sparse quadratic program.
+
+    minimize 0.5 * |T.x - t|^2 + 0.5 * FLOW_WEIGHT^2 * |C.x - c|^2 subject to
+    lbounds <= x <= ubounds, where C, c are the first n_eq rows of A, B (the 
+    flow conservation rows, without their weight) and T, t are the other rows.
+
+    This is the weighted least squares problem of balance_volumes. Solving it
+    with lsq_linear is slow and inaccurate, because the row weights make A 
+    badly conditioned. It is solved instead with the interior point method 
+    of qp.solve_qp, with delta = 1 / FLOW_WEIGHT^2, whose KKT matrix keeps C
+    and delta apart and so stays well conditioned. The solution meets 
+    C.x = c to within rounding. VOLUME_REGULARIZATION is added to the 
+    objective, see its comment.
+
+    If C.x = c cannot be met within the bounds (see _closest_flow):
+
+    - method 'weighted' solves for the closest c that can be met, which is 
+      the least squares compromise between the targets and flow conservation
+      that the row weights give. The block is reported as not converged.
+    - method 'exact' relaxes the bounds to x >= 0 and reports the block with
+      bounds_relaxed. If C.x = c still cannot be met, e.g. because of fixed 
+      columns folded into c by the presolve, it continues as 'weighted'.
+
+    Returns the solution, and the solver outcome as a tuple of solver name, 
+    status, message, iterations, whether it converged, and whether the bounds
+    were relaxed.
+    """
+    if A.shape[0] == 0:
+        # No equations left, e.g. every column is fixed or merged by the presolve.
+        # Rows dropped by the presolve are checked by _solve_subproblem.
+        return np.clip(0, lbounds, ubounds), _NO_SOLVE
+
+    C, c = A[:n_eq], B[:n_eq]
+    T, t = A[n_eq:], B[n_eq:]
+
+    if T.shape[0] == 0 and np.all(c == 0) and np.all(lbounds <= 0):
+        # No targets. Zero volume meets the (zero) flow conservation equations.
+        # Fixed columns folded into c by the presolve need a feasibility solve.
+        return np.clip(0, lbounds, ubounds), _NO_SOLVE
+
+    residual, iterations = _closest_flow(C, c, lbounds, ubounds)
+
+    bounds_relaxed = exact and np.abs(residual).max(initial=0) > EXACT_TOLERANCE
+    if bounds_relaxed:
+        lbounds, ubounds = np.zeros_like(lbounds), np.full_like(ubounds, np.inf)
+        residual, relaxed_iterations = _closest_flow(C, c, lbounds, ubounds)
+        iterations += relaxed_iterations
+
+    feasible = np.abs(residual).max(initial=0) <= EXACT_TOLERANCE
+    if feasible:
+        residual = np.zeros_like(c)
+
+    n = A.shape[1]
+    H = T.T @ T + VOLUME_REGULARIZATION * sparse.eye(n)
+    result = solve_qp(H, -(T.T @ t), C, c + residual, lbounds, ubounds, 1 / FLOW_WEIGHT ** 2)
+    x = np.clip(result.x, lbounds, ubounds)
+
+    message = result.message
+    if not feasible:
+        message = (f'Flow conservation cannot be met within the volume bounds '
+                   f'(residual {np.abs(residual).max():.3g}). {message}')
+    converged = result.converged and np.abs(C @ x - c).max(initial=0) <= EXACT_TOLERANCE
+
+    return x, ('interior-point', result.status, message, iterations + result.iterations, 
+               converged, bool(bounds_relaxed))
+
+
+def _closest_flow(C, c, lbounds, ubounds) -> tuple[np.ndarray, int]:
+    """Flow conservation residual C.x - c closest to zero within the bounds.
+
+    Solves minimize |C.x - c|^2 subject to lbounds <= x <= ubounds, with 
+    qp.solve_qp. The residual is zero (to within the solver tolerance) if 
+    and only if the equality constraints C.x = c can be met within the bounds.
+
+    Returns the residual and the solver iterations.
+    """
+    n = C.shape[1]
+    result = solve_qp(FEASIBILITY_REGULARIZATION * sparse.eye(n), np.zeros(n), C, c, 
+                      lbounds, ubounds, FEASIBILITY_DELTA)
+    return C @ result.x - c, result.iterations
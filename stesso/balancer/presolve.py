@@ -0,0 +1,159 @@
+"""
+Presolve: shrink a block of the balancer system before solving it.
+
+Many flow conservation rows only say that two variables are equal. For
+example, a link with a single inbound turn has the row turn_vol - link_vol = 0.
+The presolve merges such aliased columns into one, folds columns with a
+fixed value (lower bound == upper bound) into B, and drops rows left with no
+entries. The reduced block is solved instead of the full one, and
+Presolved.postsolve expands its solution back to the original columns.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+@dataclass(slots=True)
+class Presolved():
+    """A reduced block Ax = B and the mapping back to the original block.
+
+    Attributes
+    ----------
+    A : sparse.csr_matrix
+        Reduced A matrix. One column per free (not fixed) column group.
+    B : np.ndarray
+        Reduced B matrix.
+    lbounds : np.ndarray
+        Lower bound of each reduced column.
+    ubounds : np.ndarray
+        Upper bound of each reduced column.
+    x0 : np.ndarray | None
+        Reduced starting point, if one was given.
+    n_eq : int
+        Number of equality rows at the top of the reduced A.
+    col_groups : np.ndarray
+        Group of each original column. Columns in a group are equal.
+    free_groups : np.ndarray
+        Group of each reduced column.
+    group_values : np.ndarray
+        Value of each group. Fixed groups are set by the presolve, free groups
+        by postsolve.
+    n_rows : int
+        Number of rows of the original block.
+    """
+    A: sparse.csr_matrix
+    B: np.ndarray
+    lbounds: np.ndarray
+    ubounds: np.ndarray
+    x0: np.ndarray | None
+    n_eq: int
+    col_groups: np.ndarray
+    free_groups: np.ndarray
+    group_values: np.ndarray
+    n_rows: int
+
+    def postsolve(self, z: np.ndarray) -> np.ndarray:
+        """Expand a solution of the reduced block to the original columns."""
+        values = self.group_values.copy()
+        values[self.free_groups] = z
+        return values[self.col_groups]
+
+
+def presolve(A: sparse.csr_matrix, B: np.ndarray, lbounds: np.ndarray, ubounds: np.ndarray,
+             x0: np.ndarray | None = None, n_eq: int = 0) -> Presolved:
+    """Reduce a block of the balancer system.
+
+    1. Merge aliased columns. A row with two entries of equal size and opposite
+       sign, and B = 0, makes its two columns equal. Columns linked by such
+       rows, directly or in a chain, become one column: the sum of the merged
+       columns of A. Its bounds are the intersection of their bounds. Columns
+       whose bounds do not overlap are not merged.
+    2. Fold fixed columns into B. A merged column whose lower and upper bounds
+       are equal is removed and its value subtracted from B.
+    3. Drop rows with no entries left, e.g. the alias rows merged in step 1.
+
+    Parameters
+    ----------
+    A : sparse.csr_matrix
+        A matrix of the block.
+    B : np.ndarray
+        B matrix of the block.
+    lbounds : np.ndarray
+        Lower bound of each column.
+    ubounds : np.ndarray
+        Upper bound of each column.
+    x0 : np.ndarray, optional
+        Starting point, by default None.
+    n_eq : int, optional
+        Number of equality rows at the top of A, by default 0.
+
+    Returns
+    -------
+    Presolved
+        Reduced block. Solve it, then call postsolve on the solution.
+    """
+    A = sparse.csr_matrix(A)
+    n_rows, n_cols = A.shape
+
+    # 1. Aliased columns
+    row_nnz = np.diff(A.indptr)
+    pair_rows = np.flatnonzero((row_nnz == 2) & (B == 0))
+    starts = A.indptr[pair_rows]
+    is_alias = A.data[starts] == -A.data[starts + 1]
+    starts = starts[is_alias]
+
+    alias_graph = sparse.coo_matrix(
+        (np.ones(len(starts)), (A.indices[starts], A.indices[starts + 1])), shape=(n_cols, n_cols))
+    n_groups, col_groups = connected_components(alias_graph, directed=False)
+
+    group_lb, group_ub = _group_bounds(col_groups, n_groups, lbounds, ubounds)
+
+    conflict = group_lb > group_ub
+    if np.any(conflict):
+        # The aliased columns cannot all be equal within their bounds. Leave 
+        # them unmerged, and their alias rows in A, for the solver to trade off.
+        split = conflict[col_groups]
+        col_groups = np.where(split, n_groups + np.arange(n_cols), col_groups)
+        _, col_groups = np.unique(col_groups, return_inverse=True)
+        n_groups = int(col_groups.max()) + 1 if n_cols > 0 else 0
+        group_lb, group_ub = _group_bounds(col_groups, n_groups, lbounds, ubounds)
+
+    merge = sparse.csr_matrix((np.ones(n_cols), (np.arange(n_cols), col_groups)),
+                              shape=(n_cols, n_groups))
+    A = (A @ merge).tocsr()
+
+    # 2. Fixed columns
+    fixed = group_lb == group_ub
+    group_values = np.where(fixed, group_lb, 0.0)
+    free_groups = np.flatnonzero(~fixed)
+
+    if np.any(fixed):
+        B = B - A[:, np.flatnonzero(fixed)] @ group_values[fixed]
+        A = A[:, free_groups]
+
+    # 3. Empty rows
+    A.eliminate_zeros()
+    keep_rows = np.flatnonzero(np.diff(A.indptr) > 0)
+    A = A[keep_rows]
+    B = B[keep_rows]
+    n_eq = int(np.count_nonzero(keep_rows < n_eq))
+
+    if x0 is not None:
+        # Start each group from the value of its first column.
+        _, first_col = np.unique(col_groups, return_index=True)
+        x0 = np.clip(x0[first_col][free_groups], group_lb[free_groups], group_ub[free_groups])
+
+    return Presolved(A, B, group_lb[free_groups], group_ub[free_groups], x0, n_eq,
+                     col_groups, free_groups, group_values, n_rows)
+
+
+def _group_bounds(col_groups, n_groups, lbounds, ubounds) -> tuple[np.ndarray, np.ndarray]:
+    """Intersect the bounds of the columns in each group."""
+    group_lb = np.full(n_groups, -np.inf)
+    group_ub = np.full(n_groups, np.inf)
+    np.maximum.at(group_lb, col_groups, lbounds)
+    np.minimum.at(group_ub, col_groups, ubounds)
+    return group_lb, group_ub
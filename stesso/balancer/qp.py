@@ -0,0 +1,225 @@
+"""
+Interior point solver for the bound constrained quadratic programs of the
+balancer:
+
+    minimize    0.5 * x.H.x + g.x + 0.5 / delta * |C.x - c|^2
+    subject to  lbounds <= x <= ubounds
+
+A small delta makes C.x = c a hard constraint for all practical purposes
+(the flow conservation rows of the balancer), while keeping the problem well
+defined when the rows of C are linearly dependent or cannot all be met
+within the bounds. delta only enters the linear systems solved at each
+iteration as the -delta * I block of the sparse KKT matrix
+
+    [H + D   C^T     ]
+    [C       -delta I]
+
+so unlike a least squares system with row weights of 1 / sqrt(delta), the
+conditioning does not depend on it. D holds the bound terms of the
+interior point method.
+
+The method is Mehrotra's primal-dual predictor-corrector. Each iteration
+factors the KKT matrix once, with sparse LU, and solves it twice.
+See: Nocedal & Wright, Numerical Optimization, 2nd ed., chapters 16.6 and 14.2.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+# Convergence tolerance of the primal, dual and complementarity residuals.
+QP_TOLERANCE = 1e-8
+
+# Iteration limit of solve_qp.
+QP_MAX_ITER = 100
+
+# Regularization added to the diagonal of the factored KKT matrix. The factor
+# is then used to iteratively refine the solution of the exact KKT system,
+# see _KKTSolver.
+KKT_REGULARIZATION = 1e-8
+KKT_REFINE_STEPS = 3
+
+# Fraction of the step to the bounds taken at each iteration.
+STEP_FRACTION = 0.995
+
+
+@dataclass(slots=True)
+class QPResult():
+    """Outcome of solve_qp.
+
+    Attributes
+    ----------
+    x : np.ndarray
+        Solution.
+    status : int
+        1 if the convergence criteria were met, 0 if the iteration limit was
+        reached, -1 if the KKT matrix could not be factored.
+    message : str
+        Description of the status.
+    iterations : int
+        Interior point iterations.
+    """
+    x: np.ndarray
+    status: int
+    message: str
+    iterations: int
+
+    @property
+    def converged(self) -> bool:
+        """The convergence criteria were met."""
+        return self.status == 1
+
+
+def solve_qp(H: sparse.spmatrix, g: np.ndarray, C: sparse.spmatrix, c: np.ndarray,
+             lbounds: np.ndarray, ubounds: np.ndarray, delta: float,
+             tol: float = QP_TOLERANCE, max_iter: int = QP_MAX_ITER) -> QPResult:
+    """Solve a bound constrained convex quadratic program. See the module docstring.
+
+    Parameters
+    ----------
+    H : sparse.spmatrix
+        (n x n) positive semidefinite matrix of the quadratic term.
+    g : np.ndarray
+        Linear term, length n.
+    C : sparse.spmatrix
+        (m x n) constraint rows. m may be 0.
+    c : np.ndarray
+        Right hand side of the constraint rows, length m.
+    lbounds : np.ndarray
+        Lower bound of each variable. Must be finite.
+    ubounds : np.ndarray
+        Upper bound of each variable, np.inf for none. Variables with equal
+        lower and upper bounds are fixed at that value.
+    delta : float
+        Weight of the constraint rows, 1 / delta. Greater than 0.
+    tol : float, optional
+        Convergence tolerance, by default QP_TOLERANCE. The dual residual and
+        the complementarity are relative to the size of g and c.
+    max_iter : int, optional
+        Iteration limit, by default QP_MAX_ITER.
+
+    Returns
+    -------
+    QPResult
+        Solution and solver outcome.
+    """
+    H = sparse.csc_matrix(H)
+    C = sparse.csc_matrix(C)
+
+    fixed = lbounds == ubounds
+    if np.any(fixed):
+        # Solve for the free variables only, with the fixed ones moved into g and c.
+        free = ~fixed
+        x = lbounds.astype(float)
+        result = solve_qp(H[free][:, free], g[free] + H[free][:, fixed] @ x[fixed], 
+                          C[:, free], c - C[:, fixed] @ x[fixed], 
+                          lbounds[free], ubounds[free], delta, tol, max_iter)
+        x[free] = result.x
+        result.x = x
+        return result
+
+    n, m = C.shape[1], C.shape[0]
+    if n == 0:
+        return QPResult(np.zeros(0), 1, 'No free variables.', 0)
+
+    has_ub = np.isfinite(ubounds)
+    ub = np.where(has_ub, ubounds, 0.0)
+    n_bounds = n + int(has_ub.sum())
+
+    # Start in the middle of the bounds, or just above the lower bound.
+    x = np.where(has_ub, (lbounds + ub) / 2, lbounds + 1)
+    y = np.zeros(m)
+    # Slacks to the bounds and their multipliers. Unused upper bound entries are
+    # kept at slack 1, multiplier 0.
+    s_lb = x - lbounds
+    s_ub = np.where(has_ub, ub - x, 1.0)
+    z_lb = np.ones(n)
+    z_ub = np.where(has_ub, 1.0, 0.0)
+
+    scale = 1 + max(np.abs(g).max(initial=0), np.abs(c).max(initial=0))
+
+    for iteration in range(max_iter):
+        # Residuals of the optimality conditions, with y = (c - C.x) / delta.
+        r_dual = H @ x + g - C.T @ y - z_lb + z_ub
+        r_primal = C @ x + delta * y - c
+        mu = (s_lb @ z_lb + s_ub[has_ub] @ z_ub[has_ub]) / n_bounds
+
+        if (np.abs(r_primal).max(initial=0) <= tol
+            and np.abs(r_dual).max(initial=0) <= tol * scale
+            and mu <= tol * scale):
+            return QPResult(x, 1, 'Converged.', iteration)
+
+        d_lb = z_lb / s_lb
+        d_ub = z_ub / s_ub
+        try:
+            kkt = _KKTSolver(H + sparse.diags(d_lb + d_ub), C, delta)
+        except RuntimeError as e:
+            return QPResult(x, -1, f'KKT matrix could not be factored: {e}', iteration)
+
+        def direction(comp_lb, comp_ub):
+            """Newton step that changes s_lb * z_lb by comp_lb and s_ub * z_ub by comp_ub."""
+            dx, dy = kkt.solve(-r_dual + comp_lb / s_lb - comp_ub / s_ub, -r_primal)
+            dz_lb = (comp_lb - z_lb * dx) / s_lb
+            dz_ub = np.where(has_ub, (comp_ub + z_ub * dx) / s_ub, 0.0)
+            return dx, dy, dz_lb, dz_ub
+
+        def step_lengths(dx, dz_lb, dz_ub):
+            """Longest primal and dual steps, up to 1, that stay within the bounds."""
+            primal = min(_max_step(s_lb, dx), _max_step(s_ub[has_ub], -dx[has_ub]))
+            dual = min(_max_step(z_lb, dz_lb), _max_step(z_ub[has_ub], dz_ub[has_ub]))
+            return primal, dual
+
+        # Predictor: affine scaling step towards s * z = 0.
+        dx, dy, dz_lb, dz_ub = direction(-s_lb * z_lb, np.where(has_ub, -s_ub * z_ub, 0.0))
+        a_primal, a_dual = step_lengths(dx, dz_lb, dz_ub)
+        mu_affine = ((s_lb + a_primal * dx) @ (z_lb + a_dual * dz_lb)
+                     + ((s_ub - a_primal * dx) @ (z_ub + a_dual * dz_ub))) / n_bounds
+        sigma = (mu_affine / mu) ** 3
+
+        # Corrector: centered step, with the second order term of the predictor.
+        dx, dy, dz_lb, dz_ub = direction(
+            sigma * mu - s_lb * z_lb - dx * dz_lb,
+            np.where(has_ub, sigma * mu - s_ub * z_ub + dx * dz_ub, 0.0))
+        a_primal, a_dual = step_lengths(dx, dz_lb, dz_ub)
+        a_primal *= STEP_FRACTION
+        a_dual *= STEP_FRACTION
+
+        x = x + a_primal * dx
+        s_lb = s_lb + a_primal * dx
+        s_ub = np.where(has_ub, s_ub - a_primal * dx, 1.0)
+        y = y + a_dual * dy
+        z_lb = z_lb + a_dual * dz_lb
+        z_ub = z_ub + a_dual * dz_ub
+
+    return QPResult(x, 0, 'Iteration limit reached.', max_iter)
+
+
+class _KKTSolver():
+    """Solves [[M, C^T], [C, -delta I]] [dx, -dy] = [a, b] for dx, dy.
+
+    The matrix is factored with KKT_REGULARIZATION added to M and to delta,
+    which makes it quasi-definite and so always factorable, even if the rows of
+    C are dependent. KKT_REFINE_STEPS of iterative refinement against the
+    unregularized matrix then remove the error of the regularization.
+    """
+    def __init__(self, M: sparse.spmatrix, C: sparse.csc_matrix, delta: float):
+        n, m = C.shape[1], C.shape[0]
+        self.n = n
+        self.K = sparse.bmat([[M, C.T], [C, -delta * sparse.eye(m)]], format='csc')
+        reg = np.concatenate([np.full(n, KKT_REGULARIZATION), np.full(m, -KKT_REGULARIZATION)])
+        self.lu = splu(self.K + sparse.diags(reg, format='csc'))
+
+    def solve(self, a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rhs = np.concatenate([a, b])
+        sol = self.lu.solve(rhs)
+        for _ in range(KKT_REFINE_STEPS):
+            sol += self.lu.solve(rhs - self.K @ sol)
+        return sol[:self.n], -sol[self.n:]
+
+
+def _max_step(v: np.ndarray, dv: np.ndarray) -> float:
+    """Largest step a <= 1 with v + a * dv >= 0, for v > 0."""
+    negative = dv < 0
+    return min(1.0, np.min(-v[negative] / dv[negative], initial=np.inf))
@@ -0,0 +1,143 @@
+"""
+Structured report of a balancer run: timings, matrix size, solver outcome,
+and residuals. See balancer.BalancerResult.report.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# Called as progress(phase, done, total) while balancing, e.g.
+# progress('solve', 3, 10) after the 3rd of 10 components is solved.
+# Phases are 'assemble', 'solve', and 'done'.
+ProgressCallback = Callable[[str, int, int], None]
+
+
+@dataclass
+class SolverStats:
+    """Solver outcome of one component (independent block) of the system.
+
+    Attributes
+    ----------
+    n_rows : int
+        Rows of the block.
+    n_cols : int
+        Columns of the block.
+    solved_rows : int
+        Rows of the block given to the solver, after the presolve.
+    solved_cols : int
+        Columns of the block given to the solver, after the presolve.
+    solver : str
+        'interior-point' (see qp.solve_qp), or '' if no solve was needed.
+    status : int
+        Status code of the solver, see qp.QPResult.
+    message : str
+        Status message of the solver.
+    iterations : int
+        Solver iterations, summed over re-solves of the block.
+    converged : bool
+        The solver met its convergence criteria, and the solution conserves
+        flow.
+    time : float
+        Seconds spent presolving and solving the block.
+    bounds_relaxed : bool
+        Flow conservation could not be met within the target volume bounds, 
+        so the block was solved without them ('exact' method only).
+    """
+    n_rows: int
+    n_cols: int
+    solved_rows: int
+    solved_cols: int
+    solver: str
+    status: int
+    message: str
+    iterations: int
+    converged: bool
+    time: float
+    bounds_relaxed: bool = False
+
+
+@dataclass
+class BalancerReport:
+    """Summary of one balance_volumes or rebalance_volumes call.
+
+    Residuals are in volume units, without the row weights.
+
+    Attributes
+    ----------
+    timings : dict[str, float]
+        Phase -> seconds. 'assemble' builds the matrices, 'solve' solves the
+        components, 'total' is the whole call.
+    shape : tuple[int, int]
+        Rows and columns of the A matrix.
+    nnz : int
+        Non-zero entries of the A matrix.
+    n_flow_rows : int
+        Flow conservation rows of A.
+    n_target_rows : int
+        Target volume rows of A.
+    method : str
+        Solver method, see balancer.BALANCE_METHODS.
+    components : list[SolverStats]
+        Outcome of each component that was solved.
+    conservation_max : float
+        Largest absolute flow conservation residual.
+    conservation_rms : float
+        Root mean square flow conservation residual.
+    target_max : float
+        Largest absolute difference between a balanced volume and its target.
+    target_rms : float
+        Root mean square difference between balanced volumes and targets.
+    cost : float
+        Least squares cost 0.5 * |W.Ax - W.B|^2 of the weighted system.
+    """
+    timings: dict[str, float] = field(default_factory=dict)
+    shape: tuple[int, int] = (0, 0)
+    nnz: int = 0
+    n_flow_rows: int = 0
+    n_target_rows: int = 0
+    method: str = 'weighted'
+    components: list[SolverStats] = field(default_factory=list)
+    conservation_max: float = 0.0
+    conservation_rms: float = 0.0
+    target_max: float = 0.0
+    target_rms: float = 0.0
+    cost: float = 0.0
+
+    @property
+    def iterations(self) -> int:
+        """Solver iterations summed over all components."""
+        return sum(c.iterations for c in self.components)
+
+    @property
+    def converged(self) -> bool:
+        """Every solved component converged."""
+        return all(c.converged for c in self.components)
+
+    @property
+    def status(self) -> str:
+        """'converged', or how many components did not converge."""
+        n_failed = sum(1 for c in self.components if not c.converged)
+        if n_failed == 0:
+            return 'converged'
+        return f'{n_failed} of {len(self.components)} components not converged'
+
+    @property
+    def n_bounds_relaxed(self) -> int:
+        """Components solved without their target volume bounds."""
+        return sum(1 for c in self.components if c.bounds_relaxed)
+
+    def summary(self) -> str:
+        """One-line summary, e.g. for printing after balancing."""
+        relaxed = ''
+        if self.n_bounds_relaxed > 0:
+            relaxed = (f'{self.n_bounds_relaxed} components solved without target bounds, '
+                       f'flow conservation could not be met within them. ')
+
+        return (f'Done balancing: {self.shape[0]} x {self.shape[1]} matrix, {self.nnz} nnz, '
+                f'{len(self.components)} components solved, {self.iterations} iterations, '
+                f'{self.status}. '
+                f'{relaxed}'
+                f'Assemble {self.timings.get("assemble", 0):.2f} s, '
+                f'solve {self.timings.get("solve", 0):.2f} s. '
+                f'Max conservation residual {self.conservation_max:.3g}, '
+                f'target RMS {self.target_rms:.3g}.')
@@ -0,0 +1,200 @@
+"""
+Balance many what-if scenarios of one network, e.g. for sensitivity tests.
+
+Each scenario overrides some link and turn target volumes and/or the target
+volume tolerance. The flow conservation structure of the network is built once
+(see balancer._build_flow_system) and sent to each worker process once, when
+the process starts. Per scenario, only the overrides are sent to a worker and
+only a summary of the result is sent back.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from network.geh import GEHSummary, geh_summary, network_geh
+
+from .balancer import (BALANCE_METHODS, TARGET_TOLERANCE, _BalancerSystem, _add_target_rows,
+                       _assign_matrix_cols, _build_flow_system, _check_tolerance,
+                       _solve_by_component)
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from network.net import Network
+    from network.netincidence import LinkTurnIndex
+
+
+@dataclass
+class Scenario:
+    """Target volume and tolerance overrides of one scenario.
+
+    Links and turns not in the overrides keep their target volume in the network.
+
+    Attributes
+    ----------
+    name : str
+        Name of the scenario, copied to its result.
+    turn_targets : dict[tuple[int, int, int], float]
+        Turn key -> target volume. -1 removes the target.
+    link_targets : dict[tuple[int, int], float]
+        Link key -> target volume. -1 removes the target.
+    tolerance : float
+        Fraction the balanced volumes may differ from their targets. Must be
+        greater than 0. See balancer.TARGET_TOLERANCE.
+    """
+    name: str = ''
+    turn_targets: dict[tuple[int, int, int], float] = field(default_factory=dict)
+    link_targets: dict[tuple[int, int], float] = field(default_factory=dict)
+    tolerance: float = TARGET_TOLERANCE
+
+    def __post_init__(self):
+        _check_tolerance(self.tolerance)
+
+
+@dataclass
+class ScenarioResult:
+    """Balanced volumes and summary statistics of one scenario.
+
+    Volumes are computed as Model.balance_volumes does: turn volumes from the
+    balancer, link volumes from the turn volumes.
+
+    Attributes
+    ----------
+    name : str
+        Name of the scenario.
+    turn_volumes : np.ndarray
+        Balanced volume of each turn, in Network.turns order.
+    link_volumes : np.ndarray
+        Volume of each link, in Network.links order.
+    total_geh : float
+        Total GEH of the links and turns, see Network.calc_network_geh.
+    geh : GEHSummary
+        GEH of the links and turns with a target volume, see Network.geh_summary.
+    max_imbalance : float
+        Largest absolute link imbalance, see Network.calc_link_imbalance.
+    total_imbalance : float
+        Sum of the absolute link imbalances.
+    """
+    name: str
+    turn_volumes: np.ndarray
+    link_volumes: np.ndarray
+    total_geh: float
+    geh: GEHSummary
+    max_imbalance: float
+    total_imbalance: float
+
+
+def run_scenarios(net: 'Network', scenarios: list[Scenario], n_workers: int | None = 1,
+                  method: str = 'weighted', presolve: bool = True) -> list[ScenarioResult]:
+    """Balance each scenario and summarize its GEH and link imbalance.
+
+    The network is not changed. Scenarios are solved in parallel, one scenario
+    at a time per worker process.
+
+    Parameters
+    ----------
+    net : Network
+        Network with the base target volumes.
+    scenarios : list[Scenario]
+        Overrides of each scenario.
+    n_workers : int, optional
+        Number of worker processes, by default 1, which solves every scenario
+        in the current process. None uses one worker per CPU.
+    method : str, optional
+        Solver method, by default 'weighted'. See balancer.balance_volumes.
+    presolve : bool, optional
+        Presolve each component, by default True. See balancer.balance_volumes.
+
+    Returns
+    -------
+    list[ScenarioResult]
+        Result of each scenario, in the same order as scenarios.
+    """
+    if method not in BALANCE_METHODS:
+        raise ValueError(f'Unknown balance method {method}. Expected one of {BALANCE_METHODS}.')
+
+    matrix_cols_turns, matrix_cols_links = _assign_matrix_cols(net)
+    n_turns, n_links = len(matrix_cols_turns), len(matrix_cols_links)
+
+    flow_system = _build_flow_system(net, n_turns, n_links)
+    flow_system.method = method
+    flow_system.presolve = presolve
+
+    base_targets = np.concatenate([net.turn_array('target_volume'), net.link_array('target_volume')])
+
+    # Send only (name, override columns, override targets, tolerance) per scenario.
+    tasks = []
+    for scenario in scenarios:
+        cols = ([matrix_cols_turns[key] for key in scenario.turn_targets]
+                + [matrix_cols_links[key] for key in scenario.link_targets])
+        targets = list(scenario.turn_targets.values()) + list(scenario.link_targets.values())
+        tasks.append((scenario.name,
+                      np.array(cols, dtype=np.int64),
+                      np.array(targets, dtype=float),
+                      scenario.tolerance))
+
+    shared = (flow_system, base_targets, net.link_turn_index())
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=shared) as executor:
+            return list(executor.map(_run_scenario, tasks))
+
+    _init_worker(*shared)
+    try:
+        return [_run_scenario(task) for task in tasks]
+    finally:
+        _init_worker(None, None, None)
+
+
+# Structure shared by all scenarios of the current run_scenarios call, set in
+# each worker process by _init_worker.
+_shared: tuple | None = None
+
+
+def _init_worker(flow_system: _BalancerSystem, base_targets: np.ndarray,
+                 index: 'LinkTurnIndex') -> None:
+    global _shared
+    _shared = None if flow_system is None else (flow_system, base_targets, index)
+
+
+def _run_scenario(task: tuple) -> ScenarioResult:
+    """Balance one scenario with the shared structure, see run_scenarios."""
+    name, cols, targets, tolerance = task
+    flow_system, base_targets, index = _shared
+
+    scenario_targets = base_targets.copy()
+    scenario_targets[cols] = targets
+
+    system = _add_target_rows(flow_system, scenario_targets, tolerance)
+    x, _ = _solve_by_component(system)
+
+    # Turn columns come first, then one column per link.
+    n_turns = len(base_targets) - (len(index.in_offsets) - 1)
+    turn_volumes = x[:n_turns]
+    return _summarize(name, turn_volumes, scenario_targets[:n_turns],
+                      scenario_targets[n_turns:], index)
+
+
+def _summarize(name: str, turn_volumes: np.ndarray, turn_targets: np.ndarray,
+               link_targets: np.ndarray, index: 'LinkTurnIndex') -> ScenarioResult:
+    """Summarize balanced turn volumes the way Model and Network report them."""
+    link_volumes = index.link_volumes(turn_volumes)
+    imbalance = np.abs(index.link_imbalance(turn_volumes))
+
+    link_geh, _, turn_geh = network_geh(link_targets, link_volumes, turn_targets, turn_volumes)
+    summary = geh_summary(np.concatenate([link_geh[link_targets >= 0], turn_geh]))
+
+    return ScenarioResult(name=name,
+                          turn_volumes=turn_volumes,
+                          link_volumes=link_volumes,
+                          total_geh=float(link_geh.sum() + turn_geh.sum()),
+                          geh=summary,
+                          max_imbalance=float(imbalance.max()) if len(imbalance) > 0 else 0.0,
+                          total_imbalance=float(imbalance.sum()))
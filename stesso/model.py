@@ -5,7 +5,7 @@ import os
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any
 
-from network import net_read, net_write
+from network import net_cache, net_read, net_snapshot, net_write
 from balancer import balancer
 
 if TYPE_CHECKING:
@@ -45,9 +45,29 @@ class Model():
         #: Network: Object containing network graph of nodes and links, as well 
         # as turns and volume targets
         self.net = None
+
+        #: BalancerResult: Result of the last balance, reused to re-balance 
+        # after editing targets.
+        self.balancer_result = None
+
+        #: str: Balancer solver method, see balancer.BALANCE_METHODS.
+        self.balance_method = 'weighted'
+
+        #: Callable: Called as balance_progress(phase, done, total) while 
+        # balancing, e.g. to update a progress bar. See balancer.report.ProgressCallback.
+        self.balance_progress = None
+
+        # Links and turns edited since the last balance.
+        self._edited_links = set()
+        self._edited_turns = set()
+
+        #: str: Folder of the cache of initialized networks, see net_cache. 
+        # None (default) disables the cache, e.g. net_cache.DEFAULT_CACHE_DIR
+        # enables it.
+        self.network_cache_dir = None
         
     
-    def load(self, node_file=None, links_file=None, turns_file=None) -> None:
+    def load(self, node_file=None, links_file=None, turns_file=None, network_file=None) -> None:
         """Populate network and od variables with user supplied data.
 
         Parameters
@@ -58,6 +78,9 @@ class Model():
             File path to Network links, by default None.
         turns_file : str, optional
             File path to turn targets, by default None.
+        network_file : str, optional
+            File path to a network snapshot saved by save_network, by default 
+            None. Used instead of node_file and links_file when given.
 
         Returns
         -------
@@ -68,6 +91,10 @@ class Model():
         node_file = _clean_file_path(node_file)
         links_file = _clean_file_path(links_file)
         turns_file = _clean_file_path(turns_file)
+        network_file = _clean_file_path(network_file)
+
+        if self.net is None and network_file is not None:
+            self.net = net_snapshot.load_network(network_file)
 
         if self.net is None:
             if node_file is None or links_file is None:
@@ -75,7 +102,11 @@ class Model():
                 # their inputs are invalid.
                 return False
             
-            self.net = net_read.create_network(node_file, links_file)
+            if self.network_cache_dir is None:
+                self.net = net_read.create_network(node_file, links_file)
+            else:
+                self.net = net_cache.create_network_cached(node_file, links_file,
+                                                           cache_dir=self.network_cache_dir)
         
         if self.net is None:
             # can't continue loading turns without a Network
@@ -83,6 +114,9 @@ class Model():
 
         if turns_file is not None:
             net_read.import_turns(turns_file, self.net)
+
+            # Targets were replaced, the next balance must start from scratch.
+            self.balancer_result = None
             
             # TODO: is this the best spot to make these function calls?
             self.net.init_assigned_turn_vol()
@@ -90,11 +124,36 @@ class Model():
 
         return True
 
-    def balance_volumes(self):
+    def balance_volumes(self, incremental: bool=False):
+        """Balance link and turn volumes in the network.
+
+        Parameters
+        ----------
+        incremental : bool, optional
+            If True and the network was balanced before, only re-balance the 
+            parts of the network affected by links and turns edited since, by 
+            default False. See balancer.rebalance_volumes.
+        """
         if self.net is None:
             return
 
-        result = balancer.balance_volumes(self.net)
+        if (incremental and self.balancer_result is not None 
+            and self.balancer_result.system is not None
+            and self.balancer_result.system.method == self.balance_method):
+            result = balancer.rebalance_volumes(self.net, 
+                                                self.balancer_result, 
+                                                self._edited_turns, 
+                                                self._edited_links,
+                                                progress=self.balance_progress)
+        else:
+            result = balancer.balance_volumes(self.net, method=self.balance_method,
+                                              progress=self.balance_progress)
+
+        print(result.report.summary())
+
+        self.balancer_result = result
+        self._edited_links.clear()
+        self._edited_turns.clear()
 
         # Set turn volume based on balancer results
         for (i, j, k), col in result.matrix_cols_turns.items():
@@ -131,12 +190,15 @@ class Model():
     def set_link_target_volume(self, key: tuple, data_name, volume: int) -> None:
         link = self.net.link(*key)
         link.target_volume = volume
+        self._edited_links.add(tuple(key))
         print(f"set link target {key}, {volume}")
         # TODO: what else needs to get updated? GEH?
 
     def set_turn_volume(self, turn_key: tuple[int, int, int], data_name, volume: int) -> None:
         turn = self.net.turn(*turn_key)
-        turn.assigned_volume = volume
+        turn.target_volume = volume
+        self._edited_turns.add(tuple(turn_key))
+        print(f"set turn target {turn_key}, {volume}")
         # TODO: what else needs to get updated? GEH?
 
     def get_link_label_visibility(self) -> dict[tuple[int, int], bool]:
@@ -195,6 +257,13 @@ class Model():
                 
         return nodes_to_label
 
+    def save_network(self, network_file: str) -> None:
+        """Save the network to a snapshot file that can be reopened quickly with load."""
+        if self.net is None:
+            return
+
+        net_snapshot.save_network(self.net, network_file)
+
     def export_turns(self, export_folder=None):
         net_write.export_turns(self.net, export_folder)
 
@@ -1,4 +1,7 @@
 import math
+from dataclasses import dataclass, field
+
+import numpy as np
 
 def geh(m, c):
     """Calculates the GEH between two hourly traffic volumes.
@@ -30,3 +33,125 @@ def geh(m, c):
     geh = math.sqrt(quotient)
     
     return geh
+
+
+def geh_array(m, c) -> np.ndarray:
+    """Calculates the GEH between arrays of hourly traffic volumes, element-wise.
+
+    Same as geh: zero when the denominator is zero or the quotient is negative.
+
+    Parameters
+    ----------
+    m : array_like
+        Modeled traffic volumes.
+    c : array_like
+        Counted traffic volumes.
+
+    Returns
+    -------
+    np.ndarray
+        GEH statistic of each element.
+    """
+    m = np.asarray(m, dtype=float)
+    c = np.asarray(c, dtype=float)
+
+    denominator = (m + c) / 2.0
+    numerator = (m - c) * (m - c)
+
+    quotient = np.divide(numerator, denominator, 
+                         out=np.zeros(np.broadcast(m, c).shape), 
+                         where=(denominator != 0))
+    
+    return np.sqrt(np.maximum(quotient, 0))
+
+
+def network_geh(link_targets, link_volumes,
+                turn_targets, turn_volumes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """GEH of every link, and of every turn with a target volume.
+
+    Links are always included. Turns are only included if their target volume
+    is greater than zero.
+
+    Parameters
+    ----------
+    link_targets : array_like
+        Target volume of each link.
+    link_volumes : array_like
+        Assigned volume of each link.
+    turn_targets : array_like
+        Target volume of each turn.
+    turn_volumes : array_like
+        Assigned volume of each turn.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        GEH of each link, boolean mask of the turns with a target volume, and
+        GEH of the turns in the mask.
+    """
+    turn_targets = np.asarray(turn_targets, dtype=float)
+    turn_has_target = turn_targets > 0
+
+    link_geh = geh_array(link_targets, link_volumes)
+    turn_geh = geh_array(turn_targets[turn_has_target],
+                         np.asarray(turn_volumes, dtype=float)[turn_has_target])
+
+    return link_geh, turn_has_target, turn_geh
+
+
+@dataclass
+class GEHSummary:
+    """Summary statistics of a group of GEH values.
+
+    Attributes
+    ----------
+    count : int
+        Number of GEH values.
+    total : float
+        Sum of the GEH values.
+    mean : float
+        Average GEH value. Zero if there are no values.
+    percentiles : dict[float, float]
+        Percentile -> GEH value, e.g. {85: 4.2} means 85% of values are 4.2 or less.
+    share_below : dict[float, float]
+        Threshold -> share (0 to 1) of values strictly below the threshold.
+        e.g. {5: 0.9} means 90% of values have a GEH below 5.
+    """
+    count: int
+    total: float
+    mean: float
+    percentiles: dict[float, float] = field(default_factory=dict)
+    share_below: dict[float, float] = field(default_factory=dict)
+
+
+def geh_summary(values, percentiles=(50, 85, 95), thresholds=(5, 10)) -> GEHSummary:
+    """Summarize a group of GEH values.
+
+    Parameters
+    ----------
+    values : array_like
+        GEH values.
+    percentiles : Iterable[float], optional
+        Percentiles to report, by default (50, 85, 95).
+    thresholds : Iterable[float], optional
+        GEH thresholds to report the share of values below, by default (5, 10).
+
+    Returns
+    -------
+    GEHSummary
+        Summary statistics.
+    """
+    values = np.asarray(values, dtype=float)
+    count = len(values)
+
+    if count == 0:
+        return GEHSummary(count=0, total=0, mean=0, 
+                          percentiles={p: 0 for p in percentiles},
+                          share_below={t: 0 for t in thresholds})
+
+    return GEHSummary(
+        count=count,
+        total=float(values.sum()),
+        mean=float(values.mean()),
+        percentiles={p: float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+        share_below={t: float(np.count_nonzero(values < t)) / count for t in thresholds})
@@ -1,20 +1,34 @@
 """Contains the Network class and related classes.
 """
 
+import heapq
+import os
 import sys
 from collections import Counter
-from typing import TYPE_CHECKING, Generator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Generator
 
-from .geh import geh
-from .netlink import NetLinkData
-from .netnode import NetNode
+import numpy as np
+
+from .geh import GEHSummary, geh_summary, network_geh
+from .netcsr import CSRAdjacency, build_csr_adjacency
+from .netincidence import LinkTurnIndex, RouteIncidence, build_link_turn_index, build_route_incidence
+from .netlink import LINK_COLUMNS, NetLinkData, NetLinkView
+from .netnode import NetNode, NetNodeData
 from .netod import NetODpair
 from .netroute import NetRoute
-from .netturns import TurnData
+from .netshape import ShapeBuffer, ShapePoints
+from .netstore import ColumnStore
+from .netturns import TURN_COLUMNS, TurnData, TurnView, default_turn_name
+
+
+class NodeNotFoundError(KeyError):
+    """Raised when a node name does not exist in the Network."""
+
+
+class DuplicateNodeError(ValueError):
+    """Raised when adding a node whose name already exists in the Network."""
 
-if TYPE_CHECKING:
-    from .netnode import NetNodeData
-    
 
 class Network():
     """Contains the network nodes and links, turns, and assigned origin-destination 
@@ -28,6 +42,10 @@ class Network():
     ----------
     _graph : Dict[int, NetNode]
         nodes within the Network graph.
+    _node_keys : Dict[str, int]
+        Index of node name -> node key. Maintained by add_node.
+    _next_node_key : int
+        Key of the next node added. Keys are never reused.
     turns : Dict[int, TurnData]
         Turns within the Network graph.
     od : List[NetODpair]
@@ -38,15 +56,39 @@ class Network():
     coord_scale : float
         Scalar to convert node x,y position to real-world coordinates. Required
         to ensure the network is displayed legibly in the GUI.
+    _route_incidence : RouteIncidence | None
+        Links and turns used by each OD route. See init_route_incidence.
+    _link_store : ColumnStore | None
+        Numeric link attributes in columnar storage mode, otherwise None.
+        See init_columnar_storage.
+    _turn_store : ColumnStore | None
+        Numeric turn attributes in columnar storage mode, otherwise None.
+    _csr : CSRAdjacency | None
+        Cached CSR snapshot of the graph, see csr_adjacency. Cleared when nodes
+        or links are added.
+    _link_turns : LinkTurnIndex | None
+        Inbound and outbound turn ids of each link, see link_turn_index.
+    _shapes : ShapeBuffer
+        Shape points of the links added by add_links_bulk, see add_link_shapes.
     """
-    __slots__ = ['_graph', '_turns', 'n_links', 'od', 'total_geh', 'coord_scale']
+    __slots__ = ['_graph', '_node_keys', '_next_node_key', '_turns', 'n_links', 'od', 'total_geh', 'coord_scale', 
+                 '_route_incidence', '_link_store', '_turn_store', '_csr', 
+                 '_link_turns', '_shapes']
 
     def __init__(self):
         self._graph: dict[int, NetNode] = {}
+        self._node_keys: dict[str, int] = {}
+        self._next_node_key: int = 0
         self._turns: dict[tuple[int, int, int], TurnData] = {}
         self.od: list[NetODpair] = []
         self.total_geh: float = 0
         self.coord_scale: float = 1
+        self._route_incidence: RouteIncidence | None = None
+        self._link_store: ColumnStore | None = None
+        self._turn_store: ColumnStore | None = None
+        self._csr: CSRAdjacency | None = None
+        self._link_turns: LinkTurnIndex | None = None
+        self._shapes: ShapeBuffer = ShapeBuffer()
 
     def add_node(self, node_data: 'NetNodeData') -> None:
         """Add a node to the network graph.
@@ -55,10 +97,22 @@ class Network():
         ----------
         node_data : NetNodeData
             Data about the node. Name, x,y coordinates, etc.
+
+        Raises
+        ------
+        DuplicateNodeError
+            If a node with the same name is already in the network.
         """
-        # FIXME: length not guaranteed to return a unique key number.
-        key = len(self._graph)
+        if node_data.name in self._node_keys:
+            raise DuplicateNodeError(f'node name {node_data.name} already exists in the network')
+
+        key = self._next_node_key
+        self._next_node_key += 1
+
         self._graph[key] = NetNode(key, node_data)
+        self._node_keys[node_data.name] = key
+
+        self._csr = None
 
     def add_link(self, i_name, j_name, link_data: 'NetLinkData') -> None:
         """Connects two nodes to form an link in the network graph.
@@ -74,6 +128,8 @@ class Network():
         """
         i_key, _ = self.get_node_by_name(i_name) 
         j_key, _ = self.get_node_by_name(j_name) 
+
+        self.release_columnar_storage()
         
         link_data.key = (i_key, j_key)
 
@@ -81,6 +137,160 @@ class Network():
 
         self._graph[j_key].up_neighbors.append(i_key)
 
+        self._route_incidence = None
+        self._csr = None
+        self._link_turns = None
+
+    def add_nodes_bulk(self, names, x, y, is_origin, is_destination) -> np.ndarray:
+        """Add a batch of nodes to the network graph from column arrays.
+
+        All arguments have one entry per node. Nodes get consecutive keys in 
+        the given order. The batch is checked for duplicate names before any 
+        node is added. See add_node.
+
+        Parameters
+        ----------
+        names : sequence of str
+            Node names.
+        x : array_like
+            x-coordinates.
+        y : array_like
+            y-coordinates.
+        is_origin : array_like of bool
+            Origin (source node) flags.
+        is_destination : array_like of bool
+            Destination (sink node) flags.
+
+        Returns
+        -------
+        np.ndarray
+            Key of each new node.
+
+        Raises
+        ------
+        DuplicateNodeError
+            If a name is repeated in the batch or already in the network.
+        """
+        names = list(names)
+
+        if len(set(names)) < len(names):
+            duplicates = [name for name, count in Counter(names).items() if count > 1]
+            raise DuplicateNodeError(f'node names {duplicates[:10]} are repeated')
+
+        existing = [name for name in names if name in self._node_keys]
+        if existing:
+            raise DuplicateNodeError(f'node names {existing[:10]} already exist in the network')
+
+        first_key = self._next_node_key
+        keys = range(first_key, first_key + len(names))
+
+        for key, name, node_x, node_y, origin, destination in zip(
+            keys,
+            names,
+            np.asarray(x, dtype=float).tolist(),
+            np.asarray(y, dtype=float).tolist(),
+            np.asarray(is_origin, dtype=bool).tolist(),
+            np.asarray(is_destination, dtype=bool).tolist()):
+
+            self._graph[key] = NetNode(key, NetNodeData(name, node_x, node_y, origin, destination))
+
+        self._node_keys.update(zip(names, keys))
+        self._next_node_key += len(names)
+        self._csr = None
+
+        return np.arange(keys.start, keys.stop, dtype=np.int64)
+
+    def add_links_bulk(self, from_names, to_names, cost, names, target_volume,
+                       shape_points=None) -> None:
+        """Add a batch of links to the network graph from column arrays.
+
+        All arguments have one entry per link. Node names are resolved for the
+        whole batch before any link is added. The downstream (neighbors) and 
+        upstream (up_neighbors) adjacency of each link is then set in a single
+        pass. See add_link.
+
+        Parameters
+        ----------
+        from_names : sequence of str
+            Origin node names.
+        to_names : sequence of str
+            Destination node names.
+        cost : array_like
+            Link costs.
+        names : sequence of str
+            Link names.
+        target_volume : array_like
+            Link target volumes.
+        shape_points : sequence of Sequence[tuple[float, float]], optional
+            Shape points of each link, e.g. from add_link_shapes. By default 
+            None, which draws each link as a straight line between its nodes.
+
+        Raises
+        ------
+        NodeNotFoundError
+            If a node name is not in the network.
+        """
+        try:
+            i_keys = [self._node_keys[name] for name in from_names]
+            j_keys = [self._node_keys[name] for name in to_names]
+        except KeyError as e:
+            raise NodeNotFoundError(f'node name {e.args[0]} not found in the network') from None
+
+        if shape_points is None:
+            graph = self._graph
+            i_xy = np.array([(graph[i].x, graph[i].y) for i in i_keys], dtype=float).reshape(-1, 2)
+            j_xy = np.array([(graph[j].x, graph[j].y) for j in j_keys], dtype=float).reshape(-1, 2)
+            
+            starts = np.arange(0, 2 * len(i_keys), 2)
+            shape_points = self.add_link_shapes(np.stack([i_xy, j_xy], axis=1), starts, starts + 2)
+
+        self.release_columnar_storage()
+
+        for i, j, link_cost, name, target, points in zip(
+            i_keys,
+            j_keys,
+            np.asarray(cost, dtype=float).tolist(),
+            names,
+            np.asarray(target_volume, dtype=float).tolist(),
+            shape_points):
+
+            self._graph[i].neighbors[j] = NetLinkData(
+                cost=link_cost, name=name, target_volume=target, shape_points=points, key=(i, j))
+            self._graph[j].up_neighbors.append(i)
+
+        self._route_incidence = None
+        self._csr = None
+        self._link_turns = None
+
+    def add_link_shapes(self, coords: np.ndarray, starts, stops, reverse=None) -> list[ShapePoints]:
+        """Store link shape points in the network's shared coordinate buffer.
+
+        All link geometry is held in one float64 array. Each link refers to its
+        rows of that array, and a reverse link refers to the same rows as its 
+        forward link, so no per-link lists or reversed copies are created. 
+        Pass the result to add_links_bulk as shape_points. coords may be held
+        without a copy and is scaled in place by set_coord_scale.
+
+        Parameters
+        ----------
+        coords : np.ndarray
+            (n_points x 2) x, y coordinates of all the shapes.
+        starts : array_like
+            Row of coords of the first point of each shape.
+        stops : array_like
+            One past the row of coords of the last point of each shape.
+        reverse : array_like of bool, optional
+            Read the points of each shape last to first, by default None 
+            (all False).
+
+        Returns
+        -------
+        list[ShapePoints]
+            Shape points of each link.
+        """
+        base = self._shapes.append(coords)
+        return self._shapes.shapes(np.asarray(starts) + base, np.asarray(stops) + base, reverse)
+
     def node(self, key: int) -> NetNode:
         """Convenience function to access node properties."""
         # TODO: Handle case if key is not in _graph.
@@ -125,6 +335,96 @@ class Network():
             else:
                 yield turn
 
+    def csr_adjacency(self) -> CSRAdjacency:
+        """Return a read-only CSR snapshot of the forward and reverse adjacency.
+
+        The snapshot is built on first use and cached until nodes or links are
+        added. See CSRAdjacency.
+        """
+        if self._csr is None:
+            self._csr = build_csr_adjacency(self)
+        return self._csr
+
+    def init_columnar_storage(self) -> None:
+        """Switch to columnar storage mode.
+
+        Numeric link and turn attributes (volumes, geh, etc) are moved into NumPy 
+        arrays indexed by dense link and turn ids, in links() and turns() order.
+        Links and turns are replaced by NetLinkView and TurnView objects that 
+        read and write those arrays, so Network.link and Network.turn work as 
+        before. Whole-network calculations can then use the arrays directly, see
+        link_array and turn_array.
+
+        Adding links or re-initializing turns releases columnar storage.
+        """
+        self.release_columnar_storage()
+
+        link_store = ColumnStore(LINK_COLUMNS, [key for key, _ in self.links(True)])
+        for (i, j), link in list(self.links(True)):
+            self._graph[i].neighbors[j] = NetLinkView(link, link_store)
+
+        turn_store = ColumnStore(TURN_COLUMNS, list(self._turns.keys()))
+        for key, t in self._turns.items():
+            self._turns[key] = TurnView(t, turn_store)
+
+        self._link_store = link_store
+        self._turn_store = turn_store
+
+    def release_columnar_storage(self) -> None:
+        """Leave columnar storage mode, see init_columnar_storage.
+        
+        Links and turns are converted back to standalone NetLinkData and TurnData.
+        """
+        if self._link_store is not None:
+            for (i, j), link in list(self.links(True)):
+                self._graph[i].neighbors[j] = link.to_data()
+            self._link_store = None
+
+        if self._turn_store is not None:
+            for key, t in self._turns.items():
+                self._turns[key] = t.to_data()
+            self._turn_store = None
+
+    def link_array(self, name: str) -> np.ndarray:
+        """Return a numeric attribute of all links as an array, in links() order.
+
+        In columnar storage mode this is the storage array itself and must not 
+        be modified. Use set_link_array instead.
+
+        Parameters
+        ----------
+        name : str
+            Attribute name, e.g. 'target_volume'.
+        """
+        if self._link_store is not None:
+            return self._link_store.columns[name]
+        return np.fromiter((getattr(link, name) for link in self.links()), dtype=float)
+
+    def set_link_array(self, name: str, values) -> None:
+        """Set a numeric attribute of all links from an array, in links() order."""
+        if self._link_store is not None:
+            self._link_store.columns[name][:] = values
+            return
+        for link, value in zip(self.links(), np.asarray(values, dtype=float).tolist()):
+            setattr(link, name, value)
+
+    def turn_array(self, name: str) -> np.ndarray:
+        """Return a numeric attribute of all turns as an array, in turns() order.
+
+        See link_array.
+        """
+        if self._turn_store is not None:
+            return self._turn_store.columns[name]
+        return np.fromiter((getattr(t, name) for t in self.turns()), dtype=float)
+
+    def set_turn_array(self, name: str, values) -> None:
+        """Set a numeric attribute of all turns from an array, in turns() order."""
+        if self._turn_store is not None:
+            self._turn_store.columns[name][:] = values
+            return
+        for t, value in zip(self.turns(), np.asarray(values, dtype=float).tolist()):
+            setattr(t, name, value)
+
     def init_link_flow_lists(self):
         """Assign inbound and outbound turns for each link."""
         for (i, j, k), _ in self.turns(True):
@@ -134,26 +434,27 @@ class Network():
             self.link(i, j).turns_out.append((i, j, k))
             self.link(j, k).turns_in.append((i, j, k))
 
-    def init_assigned_turn_vol(self):
-        for t in self.turns():
-            t.assigned_volume = t.target_volume
+        self._link_turns = build_link_turn_index(self)
 
-    def calc_link_imbalance(self):
-        for link in self.links():
-            vol_in = 0
-            vol_out = 0
+    def link_turn_index(self) -> LinkTurnIndex:
+        """Return the inbound and outbound turn ids of each link as segment arrays.
+        
+        Built by init_link_flow_lists, or on first use from the links' current
+        turns_in and turns_out lists. See LinkTurnIndex.
+        """
+        if self._link_turns is None:
+            self._link_turns = build_link_turn_index(self)
+        return self._link_turns
 
-            if (len(link.turns_in) == 0) or (len(link.turns_out) == 0):
-                link.imbalance == 0
-                continue
+    def init_assigned_turn_vol(self):
+        self.set_turn_array('assigned_volume', self.turn_array('target_volume'))
 
-            for (a, b, c) in link.turns_in:
-                vol_in += self.turn(a, b, c).assigned_volume
-            
-            for (d, e, f) in link.turns_out:
-                vol_out += self.turn(d, e, f).assigned_volume
-                        
-            link.imbalance = vol_out - vol_in
+    def calc_link_imbalance(self):
+        """Calculate the difference between outbound and inbound turn volumes 
+        on each link. Links without inbound or outbound turns have no imbalance.
+        """
+        imbalance = self.link_turn_index().link_imbalance(self.turn_array('assigned_volume'))
+        self.set_link_array('imbalance', imbalance)
 
     def assign_link_volume_from_turns(self) -> None:
         """Calculate the link volume based on outbound turning volumes.
@@ -161,17 +462,8 @@ class Network():
         If the link only has inbound turns, then they will be used to compute
         the link volume.
         """
-        for link in self.links():
-            link_volume = 0
-            
-            if len(link.turns_out) == 0:
-                for (a, b, c) in link.turns_in:
-                    link_volume += self.turn(a, b, c).assigned_volume
-            else:
-                for (d, e, f) in link.turns_out:
-                    link_volume += self.turn(d, e, f).assigned_volume
-            
-            link.assigned_volume = link_volume
+        link_volumes = self.link_turn_index().link_volumes(self.turn_array('assigned_volume'))
+        self.set_link_array('assigned_volume', link_volumes)
 
     def init_turns(self) -> None:
         """Initialize all turns within the network.
@@ -196,64 +488,120 @@ class Network():
             if up_neighbor == i and dn_neighbor == k:
                 # checking node id's confirms at edge of network.
                 Link is at edge of network.
+
+        Turns are enumerated in bulk from the CSR adjacency arrays (see 
+        csr_adjacency): every link (i, j) is paired with every downstream link 
+        (j, k) of node j. Turns are named 'i_j_k', see default_turn_name.
         """
-        def check_deadend_uturn(i, j, k) -> bool:
-            end_node = self.node(j)
-            if (len(end_node.up_neighbors) == 1) and (len(end_node.neighbors) == 1):
-                if (end_node.up_neighbors[0] == i) and (end_node.up_neighbors[0] == k):
-                    return True
-            return False
-
-        for i, node1 in self._graph.items():
-            for j, _ in node1.neighbors.items():
-                for k, _ in self._graph[j].neighbors.items():
-                    if check_deadend_uturn(i, j, k):
-                        continue
-                    self._turns[(i, j, k)] = TurnData(key=(i, j, k),
-                                                     name=f'{i}_{j}_{k}',
-                                                     seed_volume=0,
-                                                     target_volume=-1,
-                                                     assigned_volume=0,
-                                                     geh=0)
-
-    def init_routes(self) -> None:
-        """Initialize routes by determining shortest route from all origins
-        to all destinations."""
+        self.release_columnar_storage()
 
-        for i, o_node in self._graph.items():
-            if not o_node.is_origin:
-                continue
+        csr = self.csr_adjacency()
+
+        n_up = np.fromiter((len(node.up_neighbors) for node in self._graph.values()), 
+                           dtype=np.int64, count=csr.n_nodes)
+        n_dn = np.diff(csr.fwd_offsets)
 
-            result = _dijkstra(self, i)
-
-            # for each destination, get route from O to D
-            for j, d_node in self._graph.items():
-                if not d_node.is_destination:
-                    continue
-                
-                node_seq = _node_seq_from_dijkstra(result, i, j)
-                
-                if len(node_seq) != 0:
-                    od = NetODpair(
-                            origin=i,
-                            destination=j, 
-                            seed_total_volume=0, 
-                            est_total_volume=0, 
-                            routes=[NetRoute(nodes=node_seq, name="")])
-                    self.od.append(od)
+        # Each link (i, j) forms one turn per downstream link of j.
+        link_i = csr.link_sources()
+        link_j = csr.fwd_targets
+        n_link_turns = n_dn[link_j]
+        
+        i = np.repeat(link_i, n_link_turns)
+        j = np.repeat(link_j, n_link_turns)
+
+        # Position of each turn's (j, k) link in the forward arrays:
+        # first downstream link of j + position of the turn within its link (i, j).
+        link_turn_starts = np.cumsum(n_link_turns) - n_link_turns
+        within_link = np.arange(len(i)) - np.repeat(link_turn_starts, n_link_turns)
+        k = csr.fwd_targets[np.repeat(csr.fwd_offsets[link_j], n_link_turns) + within_link]
+
+        # Discard u-turns at dead ends, i.e. node j only connects to node i.
+        is_deadend_uturn = (n_up[j] == 1) & (n_dn[j] == 1) & (i == k)
+        keep = ~is_deadend_uturn
+
+        keys = zip(csr.node_keys[i[keep]].tolist(), 
+                   csr.node_keys[j[keep]].tolist(), 
+                   csr.node_keys[k[keep]].tolist())
+
+        for key in keys:
+            self._turns[key] = TurnData(key, default_turn_name(key), 0, -1, 0, 0)
+
+        self._route_incidence = None
+        self._link_turns = None
+
+    def init_routes(self, n_workers: int | None = 1) -> None:
+        """Initialize routes by determining shortest route from all origins
+        to all destinations.
+
+        Parameters
+        ----------
+        n_workers : int, optional
+            Number of worker processes used to compute the shortest routes. Each
+            worker receives a read-only copy of the network graph and computes the
+            routes for a share of the origins. By default 1, which computes all 
+            routes in the current process. None uses one worker per CPU.
+        """
+        graph = _compact_graph(self)
+
+        origins = [i for i, node in self._graph.items() if node.is_origin]
+        destinations = [j for j, node in self._graph.items() if node.is_destination]
+
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+
+        if n_workers > 1 and len(origins) > 1:
+            with ProcessPoolExecutor(max_workers=n_workers, 
+                                     initializer=_init_route_worker,
+                                     initargs=(graph, destinations)) as executor:
+                # executor.map returns results in the same order as origins.
+                chunksize = max(1, len(origins) // (n_workers * 4))
+                routes_by_origin = list(executor.map(_routes_from_origin_worker, 
+                                                     origins, 
+                                                     chunksize=chunksize))
+        else:
+            routes_by_origin = [_routes_from_origin(graph, destinations, i) for i in origins]
+
+        for i, routes in zip(origins, routes_by_origin):
+            for j, node_seq in routes:
+                od = NetODpair(
+                        origin=i,
+                        destination=j, 
+                        seed_total_volume=0, 
+                        est_total_volume=0, 
+                        routes=[NetRoute(nodes=node_seq, name="")])
+                self.od.append(od)
         
         # Update route names
         self.set_route_names()
 
-    def get_node_by_name(self, node_name):
-        """Helper function to return a node by name."""
-        for k, node in self._graph.items():
-            if node.name == node_name:
-                return k, node
-        else:
-            # TODO: handle error if didn't find the node
-            print(f'node name {node_name} not found')
-            pass
+        self.init_route_incidence()
+
+    def init_route_incidence(self) -> None:
+        """Build the link and turn incidence matrices of the OD routes.
+        
+        Must be called again whenever OD routes are replaced, e.g. after 
+        importing user-defined routes. See set_link_and_turn_volume_from_route.
+        """
+        self._route_incidence = build_route_incidence(self)
+
+    def get_node_by_name(self, node_name) -> tuple[int, NetNode]:
+        """Helper function to return a node by name.
+
+        Returns
+        -------
+        tuple[int, NetNode]
+            Node key and node.
+
+        Raises
+        ------
+        NodeNotFoundError
+            If no node in the network has the given name.
+        """
+        try:
+            key = self._node_keys[node_name]
+        except KeyError:
+            raise NodeNotFoundError(f'node name {node_name} not found') from None
+        return key, self._graph[key]
 
     def get_approach_links(self, node_key: int) -> list[NetLinkData]:
         approach_links: list[NetLinkData] = []
@@ -269,25 +617,53 @@ class Network():
 
 
     def calc_network_geh(self) -> None:
-        """Sum up the total geh of all the links & turns in the network."""
+        """Sum up the total geh of all the links & turns in the network.
         
-        self.total_geh = 0
-        
-        # calc link geh
-        for link in self.links(): 
-            # TODO: handle case when link has no raw volume
-            link_geh = geh(link.target_volume, link.assigned_volume)
-            link.geh = link_geh
-            self.total_geh += link_geh
-        
-        # calc turn geh
-        for t in self.turns():
-            # TODO: better handling when turn has no target volume
-            if t.target_volume <= 0:
-                continue
-            turn_geh = geh(t.target_volume, t.assigned_volume)
-            t.geh = turn_geh
-            self.total_geh += turn_geh
+        GEH of every link and turn is computed in one vectorized pass. Turns 
+        without a target volume (target <= 0) are not included and keep their
+        previous geh value.
+        """
+        # TODO: handle case when link has no raw volume
+        # TODO: better handling when turn has no target volume
+        link_geh, has_target, target_turn_geh = network_geh(
+            self.link_array('target_volume'), self.link_array('assigned_volume'),
+            self.turn_array('target_volume'), self.turn_array('assigned_volume'))
+        self.set_link_array('geh', link_geh)
+
+        turn_geh = self.turn_array('geh').copy()
+        turn_geh[has_target] = target_turn_geh
+        self.set_turn_array('geh', turn_geh)
+
+        self.total_geh = float(link_geh.sum() + target_turn_geh.sum())
+
+    def geh_summary(self, percentiles=(50, 85, 95), thresholds=(5, 10)) -> GEHSummary:
+        """Summarize the GEH of all links and turns that have a target volume.
+
+        Calls calc_network_geh first, so the summary reflects the current 
+        assigned volumes.
+
+        Parameters
+        ----------
+        percentiles : Iterable[float], optional
+            Percentiles to report, by default (50, 85, 95).
+        thresholds : Iterable[float], optional
+            GEH thresholds to report the share of links and turns below, 
+            by default (5, 10).
+
+        Returns
+        -------
+        GEHSummary
+            Summary of the link and turn GEH values.
+        """
+        self.calc_network_geh()
+
+        link_has_target = self.link_array('target_volume') >= 0
+        turn_has_target = self.turn_array('target_volume') > 0
+
+        values = np.concatenate([self.link_array('geh')[link_has_target], 
+                                 self.turn_array('geh')[turn_has_target]])
+
+        return geh_summary(values, percentiles, thresholds)
 
     def init_seed_volumes(self, od_mat) -> None:
         """Assign route, link, and turn seed volumes based on an od matrix.
@@ -306,49 +682,23 @@ class Network():
 
         self.set_link_and_turn_volume_from_route()
 
-        for link in self.links():
-            link.seed_volume = link.assigned_volume
-        
-        for t in self.turns():
-            t.seed_volume = t.assigned_volume
+        self.set_link_array('seed_volume', self.link_array('assigned_volume'))
+        self.set_turn_array('seed_volume', self.turn_array('assigned_volume'))
     
     def set_link_and_turn_volume_from_route(self) -> None:
-        """Calculate the volume on all links and turns based on the OD route volumes."""
-        # reset link & turn volumes to zero
-        for link in self.links():
-            link.assigned_volume = 0
-        
-        for t in self.turns():
-            t.assigned_volume = 0
+        """Calculate the volume on all links and turns based on the OD route volumes.
         
-        # assign link & turn volumes
-        for od in self.od:
-            for route in od.routes:
-                n_route_nodes = len(route.nodes)
-                
-                if n_route_nodes <= 1:
-                    # route is O == D
-                    continue
-
-                if n_route_nodes == 2:
-                    # route is one link
-                    i = route.nodes[0]
-                    j = route.nodes[1]
-                    self.link(i, j).assigned_volume += route.assigned_volume
-                    continue
-
-                # route has 3 or more nodes
-                for x in range(0, len(route.nodes) - 2):
-                    i = route.nodes[x]
-                    j = route.nodes[x + 1]
-                    k = route.nodes[x + 2]
-                    self.link(i, j).assigned_volume += route.assigned_volume
-                    self.turn(i, j, k).assigned_volume += route.assigned_volume
-
-                j = route.nodes[x + 1]
-                k = route.nodes[x + 2]
-                self.link(j, k).assigned_volume += route.assigned_volume
-   
+        Volumes are the product of the route incidence matrices and the route 
+        volumes. See init_route_incidence.
+        """
+        if self._route_incidence is None:
+            self.init_route_incidence()
+
+        link_volumes, turn_volumes = self._route_incidence.link_and_turn_volumes()
+
+        self.set_link_array('assigned_volume', link_volumes)
+        self.set_turn_array('assigned_volume', turn_volumes)
+
     def set_route_names(self) -> None:
         """Assign unique route names within each OD.
 
@@ -383,50 +733,116 @@ class Network():
                         unique_links.remove((a, b))
                         break
 
-    def set_coord_scale(self):
+    def set_coord_scale(self, bbox: tuple[float, float, float, float] | None = None) -> None:
         """Scales the node x,y coordinates to to ensure the network is displayed
         legibly in the GUI. Scale value is saved in self.coord_scale
+
+        Node coordinates and the shared shape point buffer are scaled in place.
+        Real-world coordinates are the scaled coordinates divided by 
+        coord_scale, see real_world_coords.
+
+        Parameters
+        ----------
+        bbox : tuple[float, float, float, float], optional
+            Extents of the node coordinates: xmin, ymin, xmax, ymax. E.g. the
+            bbox returned by add_nodes_from_shp. By default None, which 
+            computes the extents from the nodes.
         """
-        coords = []
-        for node in self.nodes():
-            coords.append((node.x, node.y))
-        
-        # Calculate extents, min/max on x-axis and y-axis
-        min_x = min([x for x, _ in coords])
-        max_x = max([x for x, _ in coords])
-        
-        min_y = min([y for _, y in coords])
-        max_y = max([y for _, y in coords])
+        if bbox is None:
+            bbox = self.node_extents()
 
-        # Calculate scale factor
+        min_x, min_y, max_x, max_y = bbox
+
+        # Calculate scale factor. Ignore an axis without extent, e.g. all
+        # nodes on one horizontal line.
         legible_diff = 1000
-        scale_factor_x = legible_diff / abs(max_x - min_x)
-        scale_factor_y = legible_diff / abs(max_y - min_y) 
-        self.coord_scale = max(scale_factor_x, scale_factor_y)
+        extents = [abs(d) for d in (max_x - min_x, max_y - min_y) if d != 0]
+        self.coord_scale = max((legible_diff / d for d in extents), default=1)
 
         # Scale node coordinates and link shape points
         for node in self.nodes():
             node.x *= self.coord_scale
             node.y *= self.coord_scale
 
+        # Shape points in the shared buffer are scaled by a single multiply.
+        self._shapes.scale(self.coord_scale)
+
         for link in self.links():
+            if isinstance(link.shape_points, ShapePoints) and link.shape_points.buffer is self._shapes:
+                continue
             new_shape_points = [(x * self.coord_scale, y * self.coord_scale) for x, y in link.shape_points]
             link.shape_points = new_shape_points
 
+    def node_extents(self) -> tuple[float, float, float, float]:
+        """Return xmin, ymin, xmax, ymax of the node coordinates, in one pass over the nodes."""
+        xy = np.fromiter((c for node in self._graph.values() for c in (node.x, node.y)),
+                         dtype=float, count=2 * len(self._graph)).reshape(-1, 2)
+        min_x, min_y = xy.min(axis=0).tolist()
+        max_x, max_y = xy.max(axis=0).tolist()
+        return min_x, min_y, max_x, max_y
+
+    def real_world_coords(self, xy) -> np.ndarray:
+        """Convert scaled (displayed) coordinates back to real-world coordinates.
+
+        Parameters
+        ----------
+        xy : array_like
+            Scaled coordinates, e.g. (node.x, node.y) or link.shape_points.
+        """
+        return np.asarray(xy, dtype=float) / self.coord_scale
+
+
+def _compact_graph(net: Network) -> dict[int, tuple[tuple[int, float], ...]]:
+    """Create a compact, read-only copy of the network graph for routing.
+
+    The copy only holds the node keys, in the same order as the network, and 
+    the downstream neighbors and link costs of each node. It is small and cheap
+    to send to worker processes. Built from the CSR snapshot of the network,
+    see Network.csr_adjacency.
 
-def _dijkstra(net: Network, source: int):
+    Parameters
+    ----------
+    net : Network
+        Network to copy.
+
+    Returns
+    -------
+    Dict
+        Dictionary of node ID -> ((downstream node ID, link cost), ...)
+    """
+    csr = net.csr_adjacency()
+
+    node_keys = csr.node_keys.tolist()
+    offsets = csr.fwd_offsets.tolist()
+    targets = csr.node_keys[csr.fwd_targets].tolist()
+    costs = net.link_array('cost')[csr.fwd_links].tolist()
+
+    return {key: tuple(zip(targets[a:b], costs[a:b])) 
+            for key, a, b in zip(node_keys, offsets[:-1], offsets[1:])}
+
+
+def _dijkstra(graph: dict[int, tuple[tuple[int, float], ...]], source: int, 
+              targets: set[int] | None = None):
     """Uses dijkstra's algorithm to compute the shortest route between
     source and all destinations.
     
     The 'shortest route' returned is a sequence of nodes.
-    Used the pseudocode on wikipedia: https://en.wikipedia.org/wiki/Dijkstra%27s_algorithm#Pseudocode
+    Unvisited nodes are kept in a binary heap (priority queue) so each origin
+    costs O((V + E) log V) instead of O(V^2). Ties in distance are broken in 
+    favour of the node added to the network last, matching the original linear
+    scan over the unvisited list.
+    See: https://en.wikipedia.org/wiki/Dijkstra%27s_algorithm#Using_a_priority_queue
 
     Parameters
     ----------
-    net : Network
-        Network to use in this shortest route algorithm.
+    graph : Dict
+        Network graph to use in this shortest route algorithm. See _compact_graph.
     source : int
         ID of the origin node.
+    targets : set[int], optional
+        IDs of the destination nodes. If given, the search stops as soon as 
+        every target has been visited. By default None, which visits every 
+        reachable node.
 
     Returns
     -------
@@ -435,38 +851,100 @@ def _dijkstra(net: Network, source: int):
         to extract the shortest routes from this dictionary.
     """
     
-    # unvisited nodes
-    Q = []
-    
     # shortest distance to each node
     dist = {}
 
     # previous node on shortest route
     prev = {}
 
-    for i in net._graph:
-        Q.append(i)  
+    # position of each node in the graph, used to break ties between equal distances
+    order = {}
+
+    for n, i in enumerate(graph):
         dist[i] = sys.maxsize
         prev[i] = None
+        order[i] = n
     dist[source] = 0
 
+    # visited nodes
+    visited = set()
+
+    remaining = None if targets is None else set(targets)
+
+    # unvisited nodes: (distance, -order, node id)
+    Q = [(0, -order[source], source)]
+
     while len(Q) > 0:
-        min_dist = sys.maxsize
-        for i in Q:
-            if dist[i] <= min_dist:
-                u, min_dist = i, dist[i]
+        d, _, u = heapq.heappop(Q)
+
+        if u in visited:
+            # stale entry, u was already reached by a shorter route
+            continue
+        
+        visited.add(u)
 
-        Q.remove(u)
+        if remaining is not None:
+            remaining.discard(u)
+            if len(remaining) == 0:
+                break
 
-        for v, link in net._graph[u].neighbors.items():
-            alt = dist[u] + link.cost
+        for v, cost in graph[u]:
+            alt = d + cost
             if alt < dist[v]:   
                 dist[v] = alt
                 prev[v] = u
+                heapq.heappush(Q, (alt, -order[v], v))
 
     return {'dist': dist, 'prev': prev}
 
 
+def _routes_from_origin(graph: dict[int, tuple[tuple[int, float], ...]], 
+                        destinations: list[int], 
+                        origin: int) -> list[tuple[int, list[int]]]:
+    """Compute the shortest route from one origin to every reachable destination.
+
+    Parameters
+    ----------
+    graph : Dict
+        Network graph, see _compact_graph.
+    destinations : list[int]
+        Destination node IDs, in network order.
+    origin : int
+        Origin node ID.
+
+    Returns
+    -------
+    List
+        (destination ID, node sequence) for each destination reachable from origin.
+    """
+    result = _dijkstra(graph, origin, set(destinations))
+
+    routes = []
+    for j in destinations:
+        node_seq = _node_seq_from_dijkstra(result, origin, j)
+        if len(node_seq) != 0:
+            routes.append((j, node_seq))
+
+    return routes
+
+
+# Read-only graph and destinations held by each routing worker process.
+_worker_graph: dict[int, tuple[tuple[int, float], ...]] = {}
+_worker_destinations: list[int] = []
+
+
+def _init_route_worker(graph, destinations) -> None:
+    """Process pool initializer. Stores the graph once per worker process."""
+    global _worker_graph, _worker_destinations
+    _worker_graph = graph
+    _worker_destinations = destinations
+
+
+def _routes_from_origin_worker(origin: int) -> list[tuple[int, list[int]]]:
+    """Process pool task. See _routes_from_origin."""
+    return _routes_from_origin(_worker_graph, _worker_destinations, origin)
+
+
 def _node_seq_from_dijkstra(dijkstra_result, origin, destination):
     """Helper function to convert dijkstra result to usable route data.
 
@@ -0,0 +1,163 @@
+"""
+On-disk cache of initialized networks, keyed on the input files.
+
+Creating a network from node and link files (see net_read.create_network) can
+take minutes for large networks. The cache saves each created network as a
+snapshot (see net_snapshot) named after a hash of the input files. Opening
+the same, unchanged, files again loads the snapshot instead.
+"""
+
+import hashlib
+import os
+import zipfile
+
+from . import net_read, net_snapshot
+from .net import Network
+
+# Increment when create_network would build a different network from the same files.
+LOADER_VERSION = 1
+
+# Default location and size limit of the cache.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.stesso', 'network_cache')
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Files that belong to a shapefile, in addition to the .shp file itself.
+SHAPEFILE_SIDECARS = ('.shx', '.dbf', '.prj', '.cpg')
+
+
+def create_network_cached(node_file: str, link_file: str,
+                          cache_dir: str | None = None,
+                          max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+                          n_workers: int | None = 1,
+                          snap_tolerance: float | None = None) -> Network:
+    """Create a new network from user-supplied files, reusing a cached copy if
+    the files have not changed.
+
+    See net_read.create_network.
+
+    Parameters
+    ----------
+    node_file : str
+        File path to node file.
+    link_file : str
+        File path to link file.
+    cache_dir : str, optional
+        Folder holding the cached networks, by default DEFAULT_CACHE_DIR.
+    max_cache_bytes : int, optional
+        Maximum total size of the cache folder. Least recently used networks
+        are removed when it is exceeded. By default DEFAULT_MAX_CACHE_BYTES.
+    n_workers : int, optional
+        Number of worker processes used to initialize the routes, by default 1.
+    snap_tolerance : float, optional
+        Shapefile link endpoint snapping tolerance, by default None.
+
+    Returns
+    -------
+    Network
+        New network, or None if the file types are not supported.
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    key = cache_key(node_file, link_file, snap_tolerance)
+    cache_file = os.path.join(cache_dir, key + '.npz')
+
+    if os.path.isfile(cache_file):
+        try:
+            net = net_snapshot.load_network(cache_file)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Unreadable or outdated snapshot. Rebuild it below.
+            print(f'Discarding unreadable cached network {cache_file}')
+            os.remove(cache_file)
+        else:
+            # Mark as recently used.
+            os.utime(cache_file)
+            return net
+
+    net = net_read.create_network(node_file, link_file, n_workers, snap_tolerance)
+    if net is None:
+        return None
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temporary file first so an interrupted save never leaves a
+    # partial snapshot under the final name.
+    temp_file = cache_file + '.tmp'
+    try:
+        with open(temp_file, 'wb') as f:
+            net_snapshot.save_network(net, f)
+        os.replace(temp_file, cache_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+    evict(cache_dir, max_cache_bytes)
+
+    return net
+
+
+def cache_key(node_file: str, link_file: str, snap_tolerance: float | None = None) -> str:
+    """Hash the input files and loader settings into a cache key.
+
+    The hash covers the loader and snapshot versions, the snapping tolerance,
+    and the name, size, modification time, and contents of the node and link
+    files, including shapefile sidecar files.
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest.
+    """
+    h = hashlib.sha256()
+    h.update(f'loader={LOADER_VERSION};snapshot={net_snapshot.SNAPSHOT_VERSION};'.encode())
+    h.update(f'snap_tolerance={snap_tolerance};'.encode())
+
+    for input_file in (node_file, link_file):
+        for file_path in _input_files(input_file):
+            stat = os.stat(file_path)
+            h.update(f'{os.path.basename(file_path)};{stat.st_size};{stat.st_mtime_ns};'.encode())
+
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    h.update(chunk)
+
+    return h.hexdigest()
+
+
+def evict(cache_dir: str, max_cache_bytes: int) -> None:
+    """Remove least recently used networks until the cache fits in max_cache_bytes.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Folder holding the cached networks.
+    max_cache_bytes : int
+        Maximum total size of the cached networks.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith('.npz'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+
+    # Oldest first
+    for _, size, path in sorted(entries):
+        if total <= max_cache_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def _input_files(file_path: str) -> list[str]:
+    """Return the files that make up an input, e.g. a shapefile and its sidecars."""
+    files = [file_path]
+
+    stem, ext = os.path.splitext(file_path)
+    if ext.lower() == '.shp':
+        for sidecar in SHAPEFILE_SIDECARS:
+            if os.path.isfile(stem + sidecar):
+                files.append(stem + sidecar)
+
+    return files
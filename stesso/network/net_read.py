@@ -11,17 +11,28 @@ For example:
 
 import csv
 import os
-from sys import maxsize as MAXSIZE
+from functools import partial
+from itertools import islice
+from typing import Generator
 
-import shapefile
+import numpy as np
+from scipy.spatial import cKDTree
 
+from . import net_shp
 from .net import Network
-from .netlink import NetLinkData
-from .netnode import NetNode, NetNodeData
+from .netnode import NetNode
 from .netroute import NetRoute
 
+# Default header names of the node and link csv columns, in their default order.
+NODE_CSV_COLUMNS = ('name', 'x', 'y', 'is_origin', 'is_destination')
+LINK_CSV_COLUMNS = ('from_node', 'to_node', 'cost', 'name', 'target_volume')
 
-def create_network(node_file: str, link_file: str) -> Network:
+# Number of csv rows parsed and added to the network at a time.
+CSV_CHUNK_ROWS = 100_000
+
+
+def create_network(node_file: str, link_file: str, n_workers: int | None = 1, 
+                   snap_tolerance: float | None = None) -> Network:
     """Create a new network from user-supplied files.
     
     The network turns and potential OD routes are also initialized so that the new
@@ -33,6 +44,12 @@ def create_network(node_file: str, link_file: str) -> Network:
         File path to node file.
     link_file : str
         File path to link file.
+    n_workers : int, optional
+        Number of worker processes used to initialize the routes, by default 1.
+        See Network.init_routes.
+    snap_tolerance : float, optional
+        Maximum distance between a shapefile link endpoint and its node, by 
+        default None (no limit). See add_links_from_shp.
 
     Returns
     -------
@@ -48,7 +65,7 @@ def create_network(node_file: str, link_file: str) -> Network:
 
     link_handler = {
         '.csv': add_links_from_csv,
-        '.shp': add_links_from_shp
+        '.shp': partial(add_links_from_shp, snap_tolerance=snap_tolerance)
     }
 
     node_file_ext = os.path.splitext(node_file)[1]
@@ -59,75 +76,86 @@ def create_network(node_file: str, link_file: str) -> Network:
     
     new_network = Network()
 
-    node_handler[node_file_ext](new_network, node_file)
+    node_bbox = node_handler[node_file_ext](new_network, node_file)
     link_handler[link_file_ext](new_network, link_file)
 
     new_network.init_turns()
     new_network.init_link_flow_lists()
-    new_network.init_routes()
-    new_network.set_coord_scale()
+    new_network.init_routes(n_workers)
+    new_network.set_coord_scale(node_bbox)
+    new_network.init_columnar_storage()
     
     return new_network
 
 
-def add_nodes_from_csv(net: Network, node_csv: str) -> None:
+def add_nodes_from_csv(net: Network, node_csv: str, columns: dict[str, str] | None = None,
+                       chunk_rows: int = CSV_CHUNK_ROWS) -> tuple[float, float, float, float] | None:
     """Adds nodes to the network from the given csv file.
 
-    Columns in node csv (columns must be in this order):
+    Columns in node csv are matched by header name (see NODE_CSV_COLUMNS):
 
-    1. node name
-    2. x-coordinate
-    3. y-coordinate
+    1. name: node name
+    2. x: x-coordinate
+    3. y: y-coordinate
     4. is_origin (0 = False, 1 = True)
     5. is_destination (0 = False, 1 = True)
 
+    A column whose header is not found is read from the position listed above.
+    The file is read and added to the network chunk_rows rows at a time.
+
     Parameters
     ----------
     net : Network
         Network object where nodes will be added.
     node_csv : str
         File path to node file.
+    columns : dict[str, str], optional
+        Header name of each column, if different from NODE_CSV_COLUMNS, 
+        e.g. {'name': 'NODE_ID'}. By default None.
+    chunk_rows : int, optional
+        Number of rows parsed at a time, by default CSV_CHUNK_ROWS.
+
+    Returns
+    -------
+    tuple[float, float, float, float] | None
+        Extents of the added nodes: xmin, ymin, xmax, ymax. None if the file
+        has no nodes.
     """
+    bbox = None
 
     with open(node_csv, newline='') as file:
         reader = csv.reader(file)
 
-        # skip header
-        next(reader)
+        col = _map_csv_columns(next(reader), NODE_CSV_COLUMNS, columns)
 
-        for payload in reader:
-            node_name = payload[0]
-            
-            try:
-                node_x = float(payload[1])
-            except ValueError:
-                node_x = 0
-            
-            try:
-                node_y = float(payload[2])
-            except ValueError:
-                node_y = 0
-            
-            node_is_origin = int(payload[3]) == 1
-            node_is_destination = int(payload[4]) == 1
+        for rows in _csv_chunks(reader, chunk_rows):
+            x = _csv_float_column(rows, col['x'])
+            y = _csv_float_column(rows, col['y'])
+
+            net.add_nodes_bulk(
+                names=_csv_str_column(rows, col['name']),
+                x=x,
+                y=y,
+                is_origin=_csv_float_column(rows, col['is_origin']) == 1,
+                is_destination=_csv_float_column(rows, col['is_destination']) == 1)
 
-            node_data = NetNodeData(
-                name=node_name,
-                x=node_x,
-                y=node_y,
-                is_origin=node_is_origin,
-                is_destination=node_is_destination
-            )
+            chunk_bbox = (x.min(), y.min(), x.max(), y.max())
+            if bbox is None:
+                bbox = chunk_bbox
+            else:
+                bbox = (min(bbox[0], chunk_bbox[0]), min(bbox[1], chunk_bbox[1]),
+                        max(bbox[2], chunk_bbox[2]), max(bbox[3], chunk_bbox[3]))
 
-            net.add_node(node_data) 
+    return None if bbox is None else tuple(float(v) for v in bbox)
 
 
-def add_links_from_csv(net: Network, link_csv: str) -> None:
+def add_links_from_csv(net: Network, link_csv: str, columns: dict[str, str] | None = None,
+                       chunk_rows: int = CSV_CHUNK_ROWS) -> None:
     """Adds links to the network from the given csv file.
     
     Requires that the network already has nodes in it.
     
-    Columns in link csv (columns must be in this order):
+    Columns in link csv are matched by header name (see LINK_CSV_COLUMNS):
 
     1. from_node
     2. to_node
@@ -135,6 +163,9 @@ def add_links_from_csv(net: Network, link_csv: str) -> None:
     4. name
     5. target_volume
 
+    A column whose header is not found is read from the position listed above.
+    The file is read and added to the network chunk_rows rows at a time.
+
     The csv file format does not allow defining intermediate shape points
     between the link start point and end point. Use shapefile format if 
     intermediate points are desired.
@@ -145,40 +176,27 @@ def add_links_from_csv(net: Network, link_csv: str) -> None:
         Network object where links will be added.
     link_csv : str
         File path to link file.
+    columns : dict[str, str], optional
+        Header name of each column, if different from LINK_CSV_COLUMNS, 
+        e.g. {'from_node': 'A', 'to_node': 'B'}. By default None.
+    chunk_rows : int, optional
+        Number of rows parsed at a time, by default CSV_CHUNK_ROWS.
     """
     with open(link_csv, newline='') as file:
         reader = csv.reader(file)
         
-        # skip header
-        next(reader)
+        col = _map_csv_columns(next(reader), LINK_CSV_COLUMNS, columns)
         
-        for payload in reader:
-            i_name = payload[0]
-            j_name = payload[1]
-            
-            try:
-                link_cost = float(payload[2])
-            except ValueError:
-                link_cost = 0
-            
-            try:
-                link_target_volume = float(payload[4])
-            except ValueError:
-                link_target_volume = 0
-
-
-            link_data = NetLinkData(
-                name=payload[3],
-                cost=link_cost,
-                target_volume=link_target_volume,
-                shape_points=[(net.get_node_by_name(i_name)[1].x, net.get_node_by_name(i_name)[1].y), 
-                              (net.get_node_by_name(j_name)[1].x, net.get_node_by_name(j_name)[1].y)]
-            )
-            
-            net.add_link(i_name, j_name, link_data)
+        for rows in _csv_chunks(reader, chunk_rows):
+            net.add_links_bulk(
+                from_names=_csv_str_column(rows, col['from_node']),
+                to_names=_csv_str_column(rows, col['to_node']),
+                cost=_csv_float_column(rows, col['cost']),
+                names=_csv_str_column(rows, col['name']),
+                target_volume=_csv_float_column(rows, col['target_volume']))
 
 
-def add_nodes_from_shp(net: Network, node_shp: str) -> None:
+def add_nodes_from_shp(net: Network, node_shp: str) -> tuple[float, float, float, float] | None:
     """Adds nodes to the network from the given shapefile path.
 
     Parameters
@@ -187,24 +205,35 @@ def add_nodes_from_shp(net: Network, node_shp: str) -> None:
         Network object where nodes will be added.
     node_shp : str
         File path to node shapefile.
+
+    Returns
+    -------
+    tuple[float, float, float, float]
+        Extents of the added nodes: xmin, ymin, xmax, ymax. None if the file 
+        has no nodes.
     """
-    node_sf = shapefile.Reader(node_shp)
+    nodes = net_shp.read_shapefile_columns(node_shp, ['name', 'is_origin', 'is_destina'])
+    xy = nodes.first_points()
+
+    net.add_nodes_bulk(
+        names=nodes.records['name'].tolist(),
+        x=xy[:, 0],
+        y=xy[:, 1],
+        is_origin=nodes.records['is_origin'] == 1,
+        is_destination=nodes.records['is_destina'] == 1)
 
-    for node_sr in node_sf.shapeRecords():
-        node_data = NetNodeData(
-            name=node_sr.record['name'],
-            x=node_sr.shape.points[0][0],
-            y=node_sr.shape.points[0][1],
-            is_origin=int(node_sr.record['is_origin']) == 1,
-            is_destination=int(node_sr.record['is_destina']) == 1
-        )
-        net.add_node(node_data)
+    # The header bbox is not used. Editors do not always update it when 
+    # features are moved or deleted.
+    if len(xy) == 0:
+        return None
+    return (*xy.min(axis=0).tolist(), *xy.max(axis=0).tolist())
 
 
-def add_links_from_shp(net: Network, link_shp: str) -> None:
+def add_links_from_shp(net: Network, link_shp: str, snap_tolerance: float | None = None) -> None:
     """Adds links to the network from the given shapefile paths.
     
-    Requires that the network already has nodes in it.
+    Requires that the network already has nodes in it. Each link endpoint is
+    snapped to the closest node in the network.
 
     Parameters
     ----------
@@ -212,54 +241,59 @@ def add_links_from_shp(net: Network, link_shp: str) -> None:
         Network object where links will be added.
     link_shp : str
         File path to link shapefile.
+    snap_tolerance : float, optional
+        Maximum distance between a link endpoint and the node it is snapped to.
+        Links with an endpoint farther than this from every node are reported
+        and not added. By default None, which always snaps to the closest node.
     """
-    link_sf = shapefile.Reader(link_shp)
-
-    for link_sr in link_sf.shapeRecords():
-
-        link_start_xy = link_sr.shape.points[0]
-        link_end_xy = link_sr.shape.points[-1]
-
-        start_pt = _find_closest_node(link_start_xy, net)
-        end_pt = _find_closest_node(link_end_xy, net)
-        
-        i_name = start_pt.name
-        j_name = end_pt.name
-           
-        try:
-            link_cost = float(link_sr.record['cost'])
-        except ValueError:
-            link_cost = 0
-            
-        try:
-            link_target_volume = float(link_sr.record['target_vol'])
-        except ValueError:
-            link_target_volume = 0
-
-        link_data = NetLinkData(
-            name=link_sr.record['name'],
-            cost=link_cost,
-            target_volume=link_target_volume,
-            shape_points=link_sr.shape.points
-        )
-        
-        net.add_link(i_name, j_name, link_data)
-
-        # Add link in opposite direction (if two-way)
-        if link_sr.record['oneway'] == 2:
-
-            rev_pts = list(link_sr.shape.points)
-            rev_pts.reverse()
-
-            # TODO: opposite direction link needs a different name?
-            link_data = NetLinkData(
-                name=link_sr.record['name'],
-                cost=link_cost,
-                target_volume=link_target_volume,
-                shape_points=rev_pts
-            )
-
-            net.add_link(j_name, i_name, link_data)
+    links = net_shp.read_shapefile_columns(link_shp, ['cost', 'name', 'target_vol', 'oneway'])
+    link_names = links.records['name']
+
+    node_index = _NodeSpatialIndex(net)
+
+    has_points = links.n_points() > 0
+    start_pts = np.full((len(links), 2), np.nan)
+    end_pts = np.full((len(links), 2), np.nan)
+    start_pts[has_points] = links.first_points()[has_points]
+    end_pts[has_points] = links.last_points()[has_points]
+
+    start_nodes = node_index.closest_nodes(start_pts, snap_tolerance)
+    end_nodes = node_index.closest_nodes(end_pts, snap_tolerance)
+
+    matched = (start_nodes >= 0) & (end_nodes >= 0)
+
+    for n in np.flatnonzero(~matched).tolist():
+        if not has_points[n]:
+            print(f'Cannot import link {link_names[n]}. Link has no shape points.')
+            continue
+        unmatched = [tuple(xy) for xy, node in ((start_pts[n].tolist(), start_nodes[n]), 
+                                                (end_pts[n].tolist(), end_nodes[n])) if node < 0]
+        print(f'Cannot import link {link_names[n]}. '
+              f'No node within {snap_tolerance} of endpoint(s) {unmatched}.')
+
+    # Each two-way link adds a second link in the opposite direction, 
+    # directly after the first.
+    records = np.flatnonzero(matched)
+    two_way = links.records['oneway'][records] == 2
+    n_copies = 1 + two_way
+    records = np.repeat(records, n_copies)
+    reverse = np.zeros(len(records), dtype=bool)
+    reverse[(np.cumsum(n_copies) - 1)[two_way]] = True
+
+    i_nodes = np.where(reverse, end_nodes[records], start_nodes[records])
+    j_nodes = np.where(reverse, start_nodes[records], end_nodes[records])
+
+    shape_points = net.add_link_shapes(links.coords, links.offsets[records], 
+                                       links.offsets[records + 1], reverse)
+
+    # TODO: opposite direction link needs a different name?
+    net.add_links_bulk(
+        from_names=node_index.names(i_nodes),
+        to_names=node_index.names(j_nodes),
+        cost=np.nan_to_num(links.records['cost'][records].astype(float), nan=0),
+        names=link_names[records].tolist(),
+        target_volume=np.nan_to_num(links.records['target_vol'][records].astype(float), nan=0),
+        shape_points=shape_points)
 
 
 def import_turns(turn_csv, net: Network) -> None:
@@ -372,35 +406,132 @@ def import_routes(route_csv, net: Network) -> None:
         # Update route names
         net.set_route_names()
 
+        net.init_route_incidence()
+
+
+class _NodeSpatialIndex():
+    """KD-tree over the network node coordinates for closest node searches.
+
+    See: https://docs.scipy.org/doc/scipy/reference/generated/scipy.spatial.cKDTree.html
+    """
+    def __init__(self, net: Network):
+        """Build the index from the nodes already in the network.
+
+        Parameters
+        ----------
+        net : Network
+            Network that already has nodes loaded.
+        """
+        self._nodes: list[NetNode] = list(net.nodes())
+
+        coords = np.array([(node.x, node.y) for node in self._nodes], dtype=float)
+        self._tree = cKDTree(coords.reshape(-1, 2))
+
+    def closest_nodes(self, search_pts: np.ndarray, tolerance: float | None = None) -> np.ndarray:
+        """Find the closest node to each of many search points.
+
+        Parameters
+        ----------
+        search_pts : np.ndarray
+            (n x 2) x, y coordinates of the search points. Rows of NaN never match.
+        tolerance : float, optional
+            Maximum distance to the closest node, by default None (no limit).
+
+        Returns
+        -------
+        np.ndarray
+            Index of the closest node of each point, or -1 if the network has
+            no nodes or no node is within the tolerance. See names.
+        """
+        search_pts = np.asarray(search_pts, dtype=float).reshape(-1, 2)
+        nodes = np.full(len(search_pts), -1, dtype=np.int64)
+
+        valid = np.all(np.isfinite(search_pts), axis=1)
+        if len(self._nodes) == 0 or not np.any(valid):
+            return nodes
+
+        # distance_upper_bound excludes points exactly at the bound.
+        max_dist = np.inf if tolerance is None else np.nextafter(tolerance, np.inf)
+        dist, i = self._tree.query(search_pts[valid], distance_upper_bound=max_dist)
+
+        nodes[valid] = np.where(np.isinf(dist), -1, i)
+        return nodes
+
+    def names(self, indices: np.ndarray) -> list:
+        """Return the node names of node indices returned by closest_nodes."""
+        return [self._nodes[i].name for i in np.asarray(indices).tolist()]
+
+
+def _map_csv_columns(header: list[str], fields: tuple[str, ...], 
+                     columns: dict[str, str] | None = None) -> dict[str, int]:
+    """Find the column index of each field in a csv header.
+
+    Header names are compared case-insensitively. A field that is not in the
+    header is read from its position in fields.
 
-def _find_closest_node(search_pt: tuple, net: Network) -> NetNode:
-    """Given a search point, find the closest point within a group of points.
-    
     Parameters
     ----------
-    search_pt : tuple
-        x, y coordinate of the search point
-    net : Network
-        Network that already has nodes loaded. search_pt will be compared against
-        the nodes in this network.
+    header : list[str]
+        First row of the csv file.
+    fields : tuple[str, ...]
+        Default header names, in default column order.
+    columns : dict[str, str], optional
+        Header name of each field, where different from the default.
 
     Returns
     -------
-    closest_node
-        NetNode object of closest point within the network. Returns None if nothing found.
+    dict[str, int]
+        Column index of each field.
+
+    Raises
+    ------
+    ValueError
+        If a header name given in columns is not in the header.
     """
-    x1 = search_pt[0]
-    y1 = search_pt[1]
+    if columns is None:
+        columns = {}
+
+    header_index = {}
+    for n, name in enumerate(header):
+        header_index.setdefault(name.strip().lower(), n)
+
+    col = {}
+    for position, field in enumerate(fields):
+        name = columns.get(field, field).strip().lower()
+        if name in header_index:
+            col[field] = header_index[name]
+        elif field in columns:
+            raise ValueError(f'Column {columns[field]} not found in csv header {header}')
+        else:
+            col[field] = position
     
-    min_dist = MAXSIZE
-    closest_node = None
-
-    for node in net.nodes():
-        x2 = node.x
-        y2 = node.y
-        dist = (x1 - x2) ** 2 + (y1 - y2) ** 2
-        if dist < min_dist:
-            min_dist = dist
-            closest_node = node
-
-    return closest_node
\ No newline at end of file
+    return col
+
+
+def _csv_chunks(reader, chunk_rows: int) -> Generator[list[list[str]], None, None]:
+    """Yield the rows of a csv reader in lists of up to chunk_rows rows."""
+    while True:
+        rows = list(islice(reader, chunk_rows))
+        if not rows:
+            return
+        yield rows
+
+
+def _csv_str_column(rows: list[list[str]], col: int) -> list[str]:
+    return [row[col] for row in rows]
+
+
+def _csv_float_column(rows: list[list[str]], col: int) -> np.ndarray:
+    """Parse a numeric column of a chunk of csv rows. Blank or invalid values are 0."""
+    values = [row[col] for row in rows]
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        return np.array([_to_float(v) for v in values], dtype=float)
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0
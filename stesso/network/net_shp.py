@@ -0,0 +1,203 @@
+"""
+Read shapefiles into column arrays.
+
+shapefile.Reader.shapeRecords keeps a Python object for every shape, point,
+and record. For large networks that costs far more memory than the data itself.
+read_shapefile_columns instead streams the shapes and records with
+iterShapes and iterRecords, and gathers all point coordinates into one flat
+array with per-shape offsets, and each attribute field into a single typed array.
+"""
+
+import codecs
+import os
+import warnings
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+import shapefile
+
+# Shape types, see the ESRI Shapefile Technical Description.
+NULL_SHAPE = 0
+POINT_SHAPES = (1, 11, 21)
+POLYLINE_SHAPES = (3, 13, 23)
+POLYGON_SHAPES = (5, 15, 25)
+SUPPORTED_SHAPES = POINT_SHAPES + POLYLINE_SHAPES + POLYGON_SHAPES
+
+@dataclass(slots=True)
+class ShapeColumns():
+    """Geometry and attributes of a shapefile as column arrays.
+
+    Deleted records are skipped. The points of shape n are
+    coords[offsets[n]:offsets[n + 1]]. Point, polyline, and polygon shapes
+    are supported, the parts of a polyline or polygon are not separated. 
+    Only x, y coordinates are read.
+
+    Attributes
+    ----------
+    shape_type : int
+        Shape type from the file header.
+    bbox : tuple[float, float, float, float]
+        xmin, ymin, xmax, ymax from the file header.
+    coords : np.ndarray
+        (n_points x 2) x, y coordinates of all shapes.
+    offsets : np.ndarray
+        (n_shapes + 1) start of each shape's points in coords.
+    records : dict[str, np.ndarray]
+        Attribute field name -> one value per shape. Character fields are
+        object arrays of str, numeric fields are int64 (no decimals) or float64
+        arrays, logical fields are bool arrays. Blank numeric values are NaN.
+    """
+    shape_type: int
+    bbox: tuple[float, float, float, float]
+    coords: np.ndarray
+    offsets: np.ndarray
+    records: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def n_points(self) -> np.ndarray:
+        """Return the number of points of each shape."""
+        return np.diff(self.offsets)
+
+    def first_points(self) -> np.ndarray:
+        """Return the first point of each shape. Shapes must have points."""
+        return self.coords[self.offsets[:-1]]
+
+    def last_points(self) -> np.ndarray:
+        """Return the last point of each shape. Shapes must have points."""
+        return self.coords[self.offsets[1:] - 1]
+
+
+def read_shapefile_columns(shp_path: str, fields: list[str] | None = None,
+                           encoding: str | None = None) -> ShapeColumns:
+    """Read the geometry and attributes of a shapefile into column arrays.
+
+    Parameters
+    ----------
+    shp_path : str
+        File path to the .shp file. The .dbf file must be next to it.
+    fields : list[str], optional
+        Attribute fields to read, by default None (all fields).
+    encoding : str, optional
+        Encoding of character fields, by default None, which uses the encoding
+        named in the .cpg file next to the .shp file, or utf-8 if there is none.
+
+    Returns
+    -------
+    ShapeColumns
+        Shape coordinates and attribute columns.
+
+    Raises
+    ------
+    ValueError
+        If the shape type is not supported (e.g. MultiPoint or MultiPatch), the
+        .cpg file names an unknown encoding, or a requested field is not in 
+        the .dbf file.
+    """
+    stem = os.path.splitext(shp_path)[0]
+    if encoding is None:
+        encoding = _cpg_encoding(stem + '.cpg')
+
+    with warnings.catch_warnings(), shapefile.Reader(shp_path, encoding=encoding) as reader:
+        # Newer pyshp versions warn when the encoding is not spelled as in the
+        # .cpg file, e.g. cp1252 for 1252.
+        warnings.filterwarnings('ignore', message='Specified encoding')
+
+        if reader.shapeType not in SUPPORTED_SHAPES + (NULL_SHAPE,):
+            raise ValueError(f'{shp_path} has unsupported shape type {reader.shapeType} '
+                             f'({reader.shapeTypeName})')
+
+        field_defs = [(f[0], f[1], f[3]) for f in reader.fields[1:]]
+        if fields is not None:
+            missing = set(fields) - {name for name, *_ in field_defs}
+            if missing:
+                raise ValueError(f'Fields {sorted(missing)} not found in {shp_path}')
+            field_defs = [f for f in field_defs if f[0] in fields]
+
+        # Deleted records are skipped by iterRecords. Their shapes are skipped 
+        # below by record number (oid).
+        values = {name: [] for name, *_ in field_defs}
+        oids = []
+        for record in reader.iterRecords(fields=[name for name, *_ in field_defs]):
+            oids.append(record.oid)
+            for (name, *_), value in zip(field_defs, record):
+                values[name].append(value)
+
+        keep = np.zeros(len(reader), dtype=bool)
+        keep[oids] = True
+
+        flat = array('d')
+        counts = []
+        for n, shape in enumerate(reader.iterShapes()):
+            if not keep[n]:
+                continue
+            if shape is None or shape.shapeType == NULL_SHAPE:
+                counts.append(0)
+                continue
+            if shape.shapeType not in SUPPORTED_SHAPES:
+                raise ValueError(f'{shp_path} shape {n} has unsupported shape type '
+                                 f'{shape.shapeType} ({shape.shapeTypeName})')
+            for point in shape.points:
+                flat.append(point[0])
+                flat.append(point[1])
+            counts.append(len(shape.points))
+
+        shape_type = reader.shapeType
+        bbox = tuple(float(v) for v in reader.bbox)
+
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    coords = np.frombuffer(flat, dtype=float).reshape(-1, 2).copy()
+
+    records = {name: _column(values[name], field_type, decimal) 
+               for name, field_type, decimal in field_defs}
+
+    return ShapeColumns(shape_type, bbox, coords, offsets, records)
+
+
+def _cpg_encoding(cpg_path: str) -> str:
+    """Return the Python codec named in a .cpg file, or utf-8 if there is no file.
+
+    Code pages are often given as a bare number, e.g. 1252 or ANSI 1252, which
+    is read as cp1252.
+    """
+    if not os.path.isfile(cpg_path):
+        return 'utf-8'
+
+    with open(cpg_path, 'r', encoding='ascii', errors='replace') as f:
+        name = f.read().strip()
+
+    if not name:
+        return 'utf-8'
+
+    code_page = name.upper().removeprefix('ANSI').strip()
+    if code_page.isdigit():
+        name = f'cp{code_page}'
+
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        raise ValueError(f'Unknown encoding {name} in {cpg_path}') from None
+
+
+def _column(values: list, field_type: str, decimal: int) -> np.ndarray:
+    """Convert the values of one dBASE field to an array.
+
+    Numeric fields are int64 (no decimals) or float64 arrays, blank values are
+    NaN. Logical fields are bool arrays, blank values are False. Other fields
+    are object arrays of the values pyshp returns.
+    """
+    if field_type in 'NF':
+        parsed = np.array([np.nan if v is None else v for v in values], dtype=float)
+        if decimal == 0 and np.all(np.isfinite(parsed)):
+            return parsed.astype(np.int64)
+        return parsed
+
+    if field_type == 'L':
+        return np.array([v is True for v in values], dtype=bool)
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
@@ -0,0 +1,268 @@
+"""
+Save and load fully initialized Network objects in a binary snapshot file.
+
+Creating a network from node and link files (see net_read.create_network)
+parses the files, snaps link endpoints, and initializes turns, link flow lists,
+routes, and the coordinate scale. A snapshot stores the result of all that work
+as NumPy arrays in a single .npz file, so reopening a network only has to
+rebuild the Python objects.
+"""
+
+import numpy as np
+
+from .net import Network
+from .netlink import NetLinkData
+from .netnode import NetNode, NetNodeData
+from .netod import NetODpair
+from .netroute import NetRoute
+from .netshape import ShapePoints
+from .netturns import TurnData, default_turn_name
+
+# Increment when the arrays stored in a snapshot change.
+SNAPSHOT_VERSION = 3
+
+
+def save_network(net: Network, file) -> None:
+    """Save an initialized network to a snapshot file.
+
+    Parameters
+    ----------
+    net : Network
+        Network to save.
+    file : str or file-like
+        Destination .npz file. See numpy.savez.
+    """
+    nodes = list(net.nodes())
+    links = list(net.links())
+    turns = list(net.turns())
+    routes = [route for od in net.od for route in od.routes]
+
+    turn_ids = {t.key: n for n, t in enumerate(turns)}
+
+    def segments(lists) -> tuple[np.ndarray, np.ndarray]:
+        """Flatten a list of lists into values and offsets."""
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in lists], out=offsets[1:])
+        values = [v for x in lists for v in x]
+        return np.array(values), offsets
+
+    up_neighbors, up_offsets = segments([node.up_neighbors for node in nodes])
+    shape_coords, shape_starts, shape_stops, shape_reverse = _link_shape_arrays(net, links)
+    turns_in, turns_in_offsets = segments([[turn_ids[t] for t in link.turns_in] for link in links])
+    turns_out, turns_out_offsets = segments([[turn_ids[t] for t in link.turns_out] for link in links])
+    route_nodes, route_offsets = segments([route.nodes for route in routes])
+    _, od_route_offsets = segments([od.routes for od in net.od])
+
+    np.savez(
+        file,
+        version=SNAPSHOT_VERSION,
+        total_geh=net.total_geh,
+        coord_scale=net.coord_scale,
+
+        node_keys=np.array([node.key for node in nodes], dtype=np.int64),
+        node_names=_name_array([node.name for node in nodes]),
+        node_x=np.array([node.x for node in nodes], dtype=float),
+        node_y=np.array([node.y for node in nodes], dtype=float),
+        node_is_origin=np.array([node.is_origin for node in nodes], dtype=bool),
+        node_is_destination=np.array([node.is_destination for node in nodes], dtype=bool),
+        node_up_neighbors=up_neighbors.astype(np.int64),
+        node_up_offsets=up_offsets,
+
+        link_keys=np.array([link.key for link in links], dtype=np.int64).reshape(-1, 2),
+        link_names=_name_array([link.name for link in links]),
+        link_cost=net.link_array('cost'),
+        link_target_volume=net.link_array('target_volume'),
+        link_assigned_volume=net.link_array('assigned_volume'),
+        link_seed_volume=net.link_array('seed_volume'),
+        link_geh=net.link_array('geh'),
+        link_imbalance=net.link_array('imbalance'),
+        link_shape_coords=shape_coords,
+        link_shape_starts=shape_starts,
+        link_shape_stops=shape_stops,
+        link_shape_reverse=shape_reverse,
+        link_turns_in=turns_in.astype(np.int64),
+        link_turns_in_offsets=turns_in_offsets,
+        link_turns_out=turns_out.astype(np.int64),
+        link_turns_out_offsets=turns_out_offsets,
+
+        turn_keys=np.array([t.key for t in turns], dtype=np.int64).reshape(-1, 3),
+        turn_names=np.array(['' if t.name is None else str(t.name) for t in turns], dtype=str),
+        turn_has_name=np.array([t.name is not None for t in turns], dtype=bool),
+        turn_seed_volume=net.turn_array('seed_volume'),
+        turn_target_volume=net.turn_array('target_volume'),
+        turn_assigned_volume=net.turn_array('assigned_volume'),
+        turn_geh=net.turn_array('geh'),
+
+        od_origin=np.array([od.origin for od in net.od], dtype=np.int64),
+        od_destination=np.array([od.destination for od in net.od], dtype=np.int64),
+        od_seed_total_volume=np.array([od.seed_total_volume for od in net.od], dtype=float),
+        od_est_total_volume=np.array([od.est_total_volume for od in net.od], dtype=float),
+        od_route_offsets=od_route_offsets,
+
+        route_nodes=route_nodes.astype(np.int64),
+        route_node_offsets=route_offsets,
+        route_names=np.array([str(route.name) for route in routes], dtype=str),
+        route_seed_volume=np.array([route.seed_volume for route in routes], dtype=float),
+        route_target_ratio=np.array([route.target_ratio for route in routes], dtype=float),
+        route_target_rel_diff=np.array([route.target_rel_diff for route in routes], dtype=float),
+        route_assigned_volume=np.array([route.assigned_volume for route in routes], dtype=float),
+        route_assigned_ratio=np.array([route.assigned_ratio for route in routes], dtype=float),
+        route_opt_var_index=np.array([route.opt_var_index for route in routes], dtype=np.int64))
+
+
+def load_network(file) -> Network:
+    """Load a network from a snapshot file created by save_network.
+
+    The loaded network is fully initialized and uses columnar storage, the same
+    as a network returned by net_read.create_network.
+
+    Parameters
+    ----------
+    file : str or file-like
+        Snapshot .npz file.
+
+    Returns
+    -------
+    Network
+        Network with nodes, links, turns, OD routes, and volumes.
+
+    Raises
+    ------
+    ValueError
+        If the snapshot was saved with a different snapshot version.
+    """
+    with np.load(file, allow_pickle=False) as data:
+        version = int(data['version'])
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f'Network snapshot version {version} is not supported. '
+                             f'Expected version {SNAPSHOT_VERSION}.')
+
+        # Link geometry goes straight into the network's coordinate buffer.
+        shape_coords = data['link_shape_coords']
+
+        # Convert every other array to Python lists once, up front.
+        d = {name: data[name].tolist() for name in data.files if name != 'link_shape_coords'}
+
+    net = Network()
+    net.total_geh = d['total_geh']
+    net.coord_scale = d['coord_scale']
+
+    def segment(values, offsets, n):
+        return values[offsets[n]:offsets[n + 1]]
+
+    # Nodes
+    for n, key in enumerate(d['node_keys']):
+        node = NetNode(key, NetNodeData(
+            name=d['node_names'][n],
+            x=d['node_x'][n],
+            y=d['node_y'][n],
+            is_origin=d['node_is_origin'][n],
+            is_destination=d['node_is_destination'][n]))
+        node.up_neighbors = segment(d['node_up_neighbors'], d['node_up_offsets'], n)
+        net._graph[key] = node
+        net._node_keys[node.name] = key
+
+    net._next_node_key = max(net._graph, default=-1) + 1
+
+    # Turns
+    turn_keys = [tuple(key) for key in d['turn_keys']]
+    for n, key in enumerate(turn_keys):
+        net._turns[key] = TurnData(
+            key=key,
+            name=d['turn_names'][n] if d['turn_has_name'][n] else default_turn_name(key),
+            seed_volume=d['turn_seed_volume'][n],
+            target_volume=d['turn_target_volume'][n],
+            assigned_volume=d['turn_assigned_volume'][n],
+            geh=d['turn_geh'][n])
+
+    # Links
+    shape_points = net.add_link_shapes(shape_coords, d['link_shape_starts'], 
+                                       d['link_shape_stops'], d['link_shape_reverse'])
+
+    for n, (i, j) in enumerate(d['link_keys']):
+        link = NetLinkData(
+            cost=d['link_cost'][n],
+            name=d['link_names'][n],
+            target_volume=d['link_target_volume'][n],
+            shape_points=shape_points[n],
+            key=(i, j),
+            assigned_volume=d['link_assigned_volume'][n],
+            seed_volume=d['link_seed_volume'][n],
+            geh=d['link_geh'][n],
+            imbalance=d['link_imbalance'][n],
+            turns_in=[turn_keys[t] for t in segment(d['link_turns_in'], d['link_turns_in_offsets'], n)],
+            turns_out=[turn_keys[t] for t in segment(d['link_turns_out'], d['link_turns_out_offsets'], n)])
+        net._graph[i].add_neighbor(j, link)
+
+    # OD and routes
+    for n, origin in enumerate(d['od_origin']):
+        routes = []
+        for route_n in range(d['od_route_offsets'][n], d['od_route_offsets'][n + 1]):
+            routes.append(NetRoute(
+                nodes=segment(d['route_nodes'], d['route_node_offsets'], route_n),
+                name=d['route_names'][route_n],
+                seed_volume=d['route_seed_volume'][route_n],
+                target_ratio=d['route_target_ratio'][route_n],
+                target_rel_diff=d['route_target_rel_diff'][route_n],
+                assigned_volume=d['route_assigned_volume'][route_n],
+                assigned_ratio=d['route_assigned_ratio'][route_n],
+                opt_var_index=d['route_opt_var_index'][route_n]))
+
+        net.od.append(NetODpair(
+            origin=origin,
+            destination=d['od_destination'][n],
+            seed_total_volume=d['od_seed_total_volume'][n],
+            est_total_volume=d['od_est_total_volume'][n],
+            routes=routes))
+
+    net.init_route_incidence()
+    net.link_turn_index()
+    net.init_columnar_storage()
+
+    return net
+
+
+def _name_array(names: list) -> np.ndarray:
+    """Return node or link names as an array that loads back as the same type.
+
+    Names read from numeric shapefile fields are int or float, names read from
+    csv files are str. Names of mixed types are stored as str.
+    """
+    if len({type(name) for name in names}) == 1 and type(names[0]) in (int, float, str):
+        return np.array(names)
+    return np.array([str(name) for name in names], dtype=str)
+
+
+def _link_shape_arrays(net: Network, links: list) -> tuple[np.ndarray, ...]:
+    """Return the coordinates and buffer rows of the links' shape points.
+
+    Links in the network's shared coordinate buffer keep their rows, so
+    two-way links still share their geometry when loaded. Shape points held 
+    as plain lists are appended after the buffer.
+
+    Returns
+    -------
+    tuple[np.ndarray, ...]
+        coords (n_points x 2), and the starts, stops, and reverse flags of each link.
+    """
+    buffer = net._shapes
+    starts = np.zeros(len(links), dtype=np.int64)
+    stops = np.zeros(len(links), dtype=np.int64)
+    reverse = np.zeros(len(links), dtype=bool)
+
+    extra = []
+    n_points = len(buffer)
+
+    for n, link in enumerate(links):
+        pts = link.shape_points
+        if isinstance(pts, ShapePoints) and pts.buffer is buffer:
+            starts[n], stops[n], reverse[n] = pts.start, pts.stop, pts.reverse
+        else:
+            pts = np.asarray(list(pts), dtype=float).reshape(-1, 2)
+            extra.append(pts)
+            starts[n] = n_points
+            n_points += len(pts)
+            stops[n] = n_points
+
+    coords = np.concatenate([buffer.coords] + extra) if extra else buffer.coords
+    return coords, starts, stops, reverse
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from scipy import sparse
+
+if TYPE_CHECKING:
+    from .net import Network
+
+@dataclass(frozen=True, slots=True)
+class CSRAdjacency():
+    """Read-only compressed sparse row (CSR) snapshot of the network graph.
+
+    Nodes are numbered 0 .. n_nodes - 1 in Network.nodes order (dense node index).
+    Links are numbered 0 .. n_links - 1 in Network.links order (dense link id),
+    the same ids used by columnar storage and Network.link_array.
+
+    Downstream links of dense node n are entries fwd_offsets[n] to
+    fwd_offsets[n + 1] - 1 of fwd_targets and fwd_links. Upstream links of n
+    are entries rev_offsets[n] to rev_offsets[n + 1] - 1 of rev_sources and
+    rev_links, ordered by link id.
+
+    See: https://en.wikipedia.org/wiki/Sparse_matrix#Compressed_sparse_row_(CSR,_CRS_or_Yale_format)
+
+    Attributes
+    ----------
+    node_keys : np.ndarray
+        Network node key of each dense node index.
+    node_index : dict[int, int]
+        Network node key -> dense node index.
+    link_keys : list[tuple[int, int]]
+        Network link key of each dense link id.
+    fwd_offsets : np.ndarray
+        (n_nodes + 1) start of each node's downstream links.
+    fwd_targets : np.ndarray
+        (n_links) dense index of the downstream node of each link.
+    fwd_links : np.ndarray
+        (n_links) dense link id of each forward entry.
+    rev_offsets : np.ndarray
+        (n_nodes + 1) start of each node's upstream links.
+    rev_sources : np.ndarray
+        (n_links) dense index of the upstream node of each reverse entry.
+    rev_links : np.ndarray
+        (n_links) dense link id of each reverse entry.
+    """
+    node_keys: np.ndarray
+    node_index: dict[int, int]
+    link_keys: list[tuple[int, int]]
+    fwd_offsets: np.ndarray
+    fwd_targets: np.ndarray
+    fwd_links: np.ndarray
+    rev_offsets: np.ndarray
+    rev_sources: np.ndarray
+    rev_links: np.ndarray
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_keys)
+
+    @property
+    def n_links(self) -> int:
+        return len(self.fwd_targets)
+
+    def link_sources(self) -> np.ndarray:
+        """Return the dense index of the upstream node of each forward entry."""
+        return np.repeat(np.arange(self.n_nodes), np.diff(self.fwd_offsets))
+
+    def to_csgraph(self, weights=None) -> sparse.csr_matrix:
+        """Return the graph as an (n_nodes x n_nodes) scipy sparse matrix.
+
+        The matrix can be passed to scipy.sparse.csgraph routines, e.g.
+        shortest paths or connected components.
+
+        Parameters
+        ----------
+        weights : array_like, optional
+            Weight of each dense link id, e.g. Network.link_array('cost').
+            By default None, which gives every link a weight of 1.
+        """
+        if weights is None:
+            data = np.ones(self.n_links)
+        else:
+            data = np.asarray(weights, dtype=float)[self.fwd_links]
+
+        return sparse.csr_matrix((data, self.fwd_targets, self.fwd_offsets),
+                                 shape=(self.n_nodes, self.n_nodes))
+
+
+def build_csr_adjacency(net: 'Network') -> CSRAdjacency:
+    """Build a CSR snapshot of the network graph.
+
+    Parameters
+    ----------
+    net : Network
+        Network to snapshot.
+
+    Returns
+    -------
+    CSRAdjacency
+        Forward and reverse adjacency arrays.
+    """
+    node_keys = np.fromiter(net._graph.keys(), dtype=np.int64, count=len(net._graph))
+    node_index = {key: n for n, key in enumerate(node_keys.tolist())}
+
+    counts = np.fromiter((len(node.neighbors) for node in net._graph.values()),
+                         dtype=np.int64, count=len(node_keys))
+    n_links = int(counts.sum())
+
+    link_keys = [key for key, _ in net.links(True)]
+
+    fwd_offsets = np.zeros(len(node_keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=fwd_offsets[1:])
+    fwd_targets = np.fromiter((node_index[j] for _, j in link_keys), dtype=np.int64, count=n_links)
+    fwd_links = np.arange(n_links, dtype=np.int64)
+
+    # Reverse adjacency: forward entries grouped by downstream node.
+    sources = np.repeat(np.arange(len(node_keys), dtype=np.int64), counts)
+    rev_order = np.argsort(fwd_targets, kind='stable')
+
+    rev_offsets = np.zeros(len(node_keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(fwd_targets, minlength=len(node_keys)), out=rev_offsets[1:])
+    rev_sources = sources[rev_order]
+    rev_links = fwd_links[rev_order]
+
+    arrays = [node_keys, fwd_offsets, fwd_targets, fwd_links, rev_offsets, rev_sources, rev_links]
+    for a in arrays:
+        a.flags.writeable = False
+
+    return CSRAdjacency(node_keys, node_index, link_keys, fwd_offsets, fwd_targets,
+                        fwd_links, rev_offsets, rev_sources, rev_links)
@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from scipy import sparse
+
+if TYPE_CHECKING:
+    from .net import Network
+    from .netroute import NetRoute
+
+@dataclass(slots=True)
+class RouteIncidence():
+    """Sparse incidence matrices of the links and turns used by each OD route.
+
+    Volume on every link (or turn) is the product of the incidence matrix and
+    the vector of route volumes, e.g. link_volumes = route_links @ route_volumes
+
+    Attributes
+    ----------
+    routes : list[NetRoute]
+        All routes of all ODs, in Network.od order. Column order of the matrices.
+    link_keys : list[tuple[int, int]]
+        Link keys in Network.links order. Row order of route_links.
+    turn_keys : list[tuple[int, int, int]]
+        Turn keys in Network.turns order. Row order of route_turns.
+    route_links : sparse.csr_matrix
+        (links x routes) number of times each route uses each link.
+    route_turns : sparse.csr_matrix
+        (turns x routes) number of times each route uses each turn.
+    """
+    routes: list['NetRoute']
+    link_keys: list[tuple[int, int]]
+    turn_keys: list[tuple[int, int, int]]
+    route_links: sparse.csr_matrix
+    route_turns: sparse.csr_matrix
+
+    def link_and_turn_volumes(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the link and turn volumes from the routes' assigned volumes."""
+        route_volumes = np.fromiter((route.assigned_volume for route in self.routes),
+                                    dtype=float, count=len(self.routes))
+        return self.route_links @ route_volumes, self.route_turns @ route_volumes
+
+
+def build_route_incidence(net: 'Network') -> RouteIncidence:
+    """Build the route incidence matrices for all OD routes in the network.
+
+    Parameters
+    ----------
+    net : Network
+        Network with initialized turns and routes.
+
+    Returns
+    -------
+    RouteIncidence
+        Link and turn incidence matrices.
+    """
+    routes = [route for od in net.od for route in od.routes]
+
+    link_keys = [key for key, _ in net.links(True)]
+    turn_keys = [key for key, _ in net.turns(True)]
+
+    link_rows = {key: n for n, key in enumerate(link_keys)}
+    turn_rows = {key: n for n, key in enumerate(turn_keys)}
+
+    # Non-zero entries in coordinate (COO) form. Duplicate entries are summed.
+    link_entries = []
+    link_cols = []
+    turn_entries = []
+    turn_cols = []
+
+    for col, route in enumerate(routes):
+        nodes = route.nodes
+
+        for x in range(0, len(nodes) - 1):
+            link_entries.append(link_rows[(nodes[x], nodes[x + 1])])
+            link_cols.append(col)
+
+        for x in range(0, len(nodes) - 2):
+            turn_entries.append(turn_rows[(nodes[x], nodes[x + 1], nodes[x + 2])])
+            turn_cols.append(col)
+
+    route_links = sparse.csr_matrix(
+        (np.ones(len(link_entries)), (link_entries, link_cols)),
+        shape=(len(link_keys), len(routes)))
+
+    route_turns = sparse.csr_matrix(
+        (np.ones(len(turn_entries)), (turn_entries, turn_cols)),
+        shape=(len(turn_keys), len(routes)))
+
+    return RouteIncidence(routes, link_keys, turn_keys, route_links, route_turns)
+
+
+@dataclass(slots=True)
+class LinkTurnIndex():
+    """Inbound and outbound turns of each link as integer arrays in segment-offset form.
+
+    Links are numbered by dense link id (Network.links order) and turns by dense
+    turn id (Network.turns order). The inbound turns of link n are 
+    in_turns[in_offsets[n]:in_offsets[n + 1]], likewise for outbound turns.
+
+    Attributes
+    ----------
+    in_offsets : np.ndarray
+        (n_links + 1) start of each link's inbound turns.
+    in_turns : np.ndarray
+        Turn ids of all inbound turns, grouped by link.
+    out_offsets : np.ndarray
+        (n_links + 1) start of each link's outbound turns.
+    out_turns : np.ndarray
+        Turn ids of all outbound turns, grouped by link.
+    """
+    in_offsets: np.ndarray
+    in_turns: np.ndarray
+    out_offsets: np.ndarray
+    out_turns: np.ndarray
+
+    @property
+    def n_in(self) -> np.ndarray:
+        """Number of inbound turns of each link."""
+        return np.diff(self.in_offsets)
+
+    @property
+    def n_out(self) -> np.ndarray:
+        """Number of outbound turns of each link."""
+        return np.diff(self.out_offsets)
+
+    def sum_in(self, turn_values: np.ndarray) -> np.ndarray:
+        """Sum a per-turn array over the inbound turns of each link."""
+        return segment_sum(np.asarray(turn_values)[self.in_turns], self.in_offsets)
+
+    def sum_out(self, turn_values: np.ndarray) -> np.ndarray:
+        """Sum a per-turn array over the outbound turns of each link."""
+        return segment_sum(np.asarray(turn_values)[self.out_turns], self.out_offsets)
+
+    def link_volumes(self, turn_volumes: np.ndarray) -> np.ndarray:
+        """Volume of each link: the sum of its outbound turn volumes, or of its
+        inbound turn volumes if it has no outbound turns.
+        """
+        return np.where(self.n_out == 0, self.sum_in(turn_volumes), self.sum_out(turn_volumes))
+
+    def link_imbalance(self, turn_volumes: np.ndarray) -> np.ndarray:
+        """Outbound minus inbound turn volume of each link. Links without
+        inbound or outbound turns have no imbalance.
+        """
+        imbalance = self.sum_out(turn_volumes) - self.sum_in(turn_volumes)
+        imbalance[(self.n_in == 0) | (self.n_out == 0)] = 0
+        return imbalance
+
+
+def segment_sum(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Sum each segment values[offsets[n]:offsets[n + 1]]. Empty segments sum to zero.
+
+    np.add.reduceat does not handle empty segments, so it is only given the
+    starts of non-empty segments. Segments are contiguous, so each sum still
+    ends at the correct place.
+    """
+    sums = np.zeros(len(offsets) - 1)
+    starts = offsets[:-1]
+    nonempty = starts < offsets[1:]
+    if np.any(nonempty):
+        sums[nonempty] = np.add.reduceat(values, starts[nonempty])
+    return sums
+
+
+def build_link_turn_index(net: 'Network') -> LinkTurnIndex:
+    """Build the link -> turn index from the turns_in and turns_out lists of each link.
+
+    Parameters
+    ----------
+    net : Network
+        Network with initialized link flow lists, see Network.init_link_flow_lists.
+
+    Returns
+    -------
+    LinkTurnIndex
+        Inbound and outbound turn ids of each link.
+    """
+    turn_ids = {key: n for n, (key, _) in enumerate(net.turns(True))}
+    links = list(net.links())
+
+    def segments(turn_lists: list[list[tuple[int, int, int]]]) -> tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(turn_lists) + 1, dtype=np.int64)
+        np.cumsum([len(turns) for turns in turn_lists], out=offsets[1:])
+        ids = np.fromiter((turn_ids[t] for turns in turn_lists for t in turns), 
+                          dtype=np.int64, count=int(offsets[-1]))
+        return offsets, ids
+
+    in_offsets, in_turns = segments([link.turns_in for link in links])
+    out_offsets, out_turns = segments([link.turns_out for link in links])
+
+    return LinkTurnIndex(in_offsets, in_turns, out_offsets, out_turns)
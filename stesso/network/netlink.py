@@ -1,5 +1,8 @@
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 
+from .netstore import ColumnStore, column_property
+
 @dataclass(slots=True)
 class NetLinkData():
     """Data on Network links.
@@ -22,11 +25,14 @@ class NetLinkData():
         GEH statistic comparing the target_volume and assigned_volume.
     seed_volume: float
         Volume on the link as assigned from the seed OD matrix.
+    shape_points: Sequence[tuple[float, float]]
+        x, y points of the link geometry, from upstream to downstream node.
+        Usually a ShapePoints view of the network's shared coordinate buffer.
     """
     cost: float
     name: str
     target_volume: float
-    shape_points: list[tuple[float, float]]
+    shape_points: Sequence[tuple[float, float]]
     key: tuple[int, int] = (-1, -1)
     assigned_volume: float = 0
     seed_volume: float = 0
@@ -34,3 +40,61 @@ class NetLinkData():
     imbalance: float = 0
     turns_in: list[tuple[int, int, int]] = field(default_factory=list)
     turns_out: list[tuple[int, int, int]] = field(default_factory=list)
+
+
+# Numeric NetLinkData attributes held in a ColumnStore in columnar storage mode.
+LINK_COLUMNS = ('cost', 'target_volume', 'assigned_volume', 'seed_volume', 'geh', 'imbalance')
+
+
+class NetLinkView():
+    """NetLinkData whose numeric attributes live in a ColumnStore.
+
+    Used by the Network in columnar storage mode. Reading or writing cost,
+    target_volume, assigned_volume, seed_volume, geh, or imbalance accesses the
+    store arrays directly. See Network.init_columnar_storage.
+    """
+    __slots__ = ['name', 'shape_points', 'key', 'turns_in', 'turns_out', '_store', '_id']
+
+    cost = column_property('cost')
+    target_volume = column_property('target_volume')
+    assigned_volume = column_property('assigned_volume')
+    seed_volume = column_property('seed_volume')
+    geh = column_property('geh')
+    imbalance = column_property('imbalance')
+
+    def __init__(self, link: NetLinkData, store: ColumnStore):
+        """Move the data of link into store.
+
+        Parameters
+        ----------
+        link : NetLinkData
+            Link to copy. link.key must be in store.
+        store : ColumnStore
+            Store that holds the numeric attributes.
+        """
+        self.name = link.name
+        self.shape_points = link.shape_points
+        self.key = link.key
+        self.turns_in = link.turns_in
+        self.turns_out = link.turns_out
+        
+        self._store = store
+        self._id = store.ids[link.key]
+
+        for column in LINK_COLUMNS:
+            setattr(self, column, getattr(link, column))
+
+    def to_data(self) -> NetLinkData:
+        """Return a standalone NetLinkData copy of this link."""
+        return NetLinkData(
+            cost=self.cost,
+            name=self.name,
+            target_volume=self.target_volume,
+            shape_points=self.shape_points,
+            key=self.key,
+            assigned_volume=self.assigned_volume,
+            seed_volume=self.seed_volume,
+            geh=self.geh,
+            imbalance=self.imbalance,
+            turns_in=self.turns_in,
+            turns_out=self.turns_out)
@@ -0,0 +1,157 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class ShapeBuffer():
+    """Shape points of all network links in one contiguous float64 array.
+
+    Links refer to their rows of the buffer through ShapePoints. Appending may
+    reallocate the underlying array, so ShapePoints hold the buffer itself,
+    not a view of its array.
+
+    Attributes
+    ----------
+    coords : np.ndarray
+        (n_points x 2) x, y coordinates in use.
+    """
+    __slots__ = ['_coords', '_size']
+
+    def __init__(self, coords: np.ndarray | None = None):
+        """Create a buffer, optionally holding existing coordinates.
+
+        Parameters
+        ----------
+        coords : np.ndarray, optional
+            (n x 2) coordinates to hold, by default None (empty). Used as is,
+            without a copy, if already a float64 array.
+        """
+        if coords is None:
+            coords = np.empty((0, 2), dtype=float)
+        self._coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        self._size = len(self._coords)
+
+    @property
+    def coords(self) -> np.ndarray:
+        return self._coords[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, coords: np.ndarray) -> int:
+        """Copy coordinates to the end of the buffer.
+
+        Capacity grows by doubling, so appending many small batches does not
+        copy the whole buffer each time. The first coordinates appended to an
+        empty buffer are held as is, without a copy.
+
+        Parameters
+        ----------
+        coords : np.ndarray
+            (n x 2) x, y coordinates.
+
+        Returns
+        -------
+        int
+            Buffer row of the first appended point.
+        """
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        start = self._size
+        end = start + len(coords)
+
+        if start == 0:
+            # Nothing to keep, hold the first coordinates without a copy.
+            self._coords = coords
+            self._size = end
+            return start
+
+        if end > len(self._coords):
+            grown = np.empty((max(end, 2 * len(self._coords)), 2), dtype=float)
+            grown[:start] = self._coords[:start]
+            self._coords = grown
+
+        self._coords[start:end] = coords
+        self._size = end
+        return start
+
+    def scale(self, factor: float) -> None:
+        """Multiply every coordinate by factor, in place."""
+        self._coords[:self._size] *= factor
+
+    def shapes(self, starts, stops, reverse=None) -> list['ShapePoints']:
+        """Return a ShapePoints for each (start, stop) range of buffer rows.
+
+        Parameters
+        ----------
+        starts : array_like
+            First buffer row of each shape.
+        stops : array_like
+            One past the last buffer row of each shape.
+        reverse : array_like of bool, optional
+            Points of the shape are in reverse buffer order, by default None
+            (all False).
+        """
+        starts = np.asarray(starts, dtype=np.int64).tolist()
+        stops = np.asarray(stops, dtype=np.int64).tolist()
+        if reverse is None:
+            reverse = [False] * len(starts)
+        else:
+            reverse = np.asarray(reverse, dtype=bool).tolist()
+
+        return [ShapePoints(self, a, b, r) for a, b, r in zip(starts, stops, reverse)]
+
+
+class ShapePoints(Sequence):
+    """Read-only sequence of the (x, y) points of one link, stored in a ShapeBuffer.
+
+    Behaves like the list of tuples previously held in NetLinkData.shape_points.
+    A reverse ShapePoints reads the same buffer rows as its forward link,
+    last point first, so two-way links share their geometry.
+
+    Attributes
+    ----------
+    start : int
+        First buffer row.
+    stop : int
+        One past the last buffer row.
+    reverse : bool
+        Read the rows last to first.
+    """
+    __slots__ = ['_buffer', 'start', 'stop', 'reverse']
+
+    def __init__(self, buffer: ShapeBuffer, start: int, stop: int, reverse: bool = False):
+        self._buffer = buffer
+        self.start = start
+        self.stop = stop
+        self.reverse = reverse
+
+    @property
+    def buffer(self) -> ShapeBuffer:
+        return self._buffer
+
+    def array(self) -> np.ndarray:
+        """Return the points as an (n x 2) view of the buffer."""
+        pts = self._buffer.coords[self.start:self.stop]
+        return pts[::-1] if self.reverse else pts
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        pts = self.array()[index]
+        if isinstance(index, slice):
+            return [tuple(pt) for pt in pts.tolist()]
+        return tuple(pts.tolist())
+
+    def __iter__(self):
+        return map(tuple, self.array().tolist())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'ShapePoints({list(self)})'
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+class ColumnStore():
+    """Columnar storage for the numeric attributes of network links or turns.
+
+    Each attribute is one contiguous float64 array. Element n of every array
+    belongs to the link (or turn) with dense id n.
+
+    Attributes
+    ----------
+    keys : list
+        Link or turn key of each dense id.
+    ids : dict
+        Link or turn key -> dense id.
+    columns : dict[str, np.ndarray]
+        Attribute name -> array of values, indexed by dense id.
+    """
+    __slots__ = ['keys', 'ids', 'columns']
+
+    def __init__(self, fields: tuple[str, ...], keys: list):
+        """Create a store with all values set to zero.
+
+        Parameters
+        ----------
+        fields : tuple[str, ...]
+            Names of the attributes to store.
+        keys : list
+            Link or turn keys, in dense id order.
+        """
+        self.keys = keys
+        self.ids = {key: n for n, key in enumerate(keys)}
+        self.columns: dict[str, np.ndarray] = {field: np.zeros(len(keys)) for field in fields}
+
+
+def column_property(field: str) -> property:
+    """Create a property that reads and writes one element of a ColumnStore column.
+
+    The owning class must have `_store` (ColumnStore) and `_id` (int) attributes.
+    """
+    def fget(self) -> float:
+        return float(self._store.columns[field][self._id])
+
+    def fset(self, value: float) -> None:
+        self._store.columns[field][self._id] = value
+
+    return property(fget, fset, doc=f'{field}, stored in a ColumnStore column.')
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from .netstore import ColumnStore, column_property
+
 @dataclass(slots=True)
 class TurnData():
     """Data on Network turns.
@@ -13,6 +15,7 @@ class TurnData():
         Unique ID for the turn composed of the upstream, self, and downstream node keys.
     name: str
         Human-readable name for the turn. Typically based on the A-B-C node names.
+        See default_turn_name.
     seed_volume: float
         Volume on the turn as assigned from the seed OD matrix.
     target_volume: float
@@ -27,4 +30,67 @@ class TurnData():
     seed_volume: float
     target_volume: float
     assigned_volume: float
-    geh: float
\ No newline at end of file
+    geh: float
+
+def default_turn_name(key: tuple[int, int, int]) -> str:
+    """Name used for a turn that has not been assigned one: 'i_j_k' node keys."""
+    return f'{key[0]}_{key[1]}_{key[2]}'
+
+
+# Numeric TurnData attributes held in a ColumnStore in columnar storage mode.
+TURN_COLUMNS = ('seed_volume', 'target_volume', 'assigned_volume', 'geh')
+
+
+class TurnView():
+    """TurnData whose numeric attributes live in a ColumnStore.
+
+    Used by the Network in columnar storage mode. See NetLinkView.
+
+    Unset turn names (None) are built when read, see default_turn_name.
+    """
+    __slots__ = ['key', '_name', '_store', '_id']
+
+    seed_volume = column_property('seed_volume')
+    target_volume = column_property('target_volume')
+    assigned_volume = column_property('assigned_volume')
+    geh = column_property('geh')
+
+    def __init__(self, turn: TurnData, store: ColumnStore):
+        """Move the data of turn into store.
+
+        Parameters
+        ----------
+        turn : TurnData
+            Turn to copy. turn.key must be in store.
+        store : ColumnStore
+            Store that holds the numeric attributes.
+        """
+        self.key = turn.key
+        self._name = turn.name
+
+        self._store = store
+        self._id = store.ids[turn.key]
+
+        for column in TURN_COLUMNS:
+            setattr(self, column, getattr(turn, column))
+
+    @property
+    def name(self) -> str:
+        """Human-readable name for the turn."""
+        if self._name is None:
+            return default_turn_name(self.key)
+        return self._name
+
+    @name.setter
+    def name(self, value: str | None) -> None:
+        self._name = value
+
+    def to_data(self) -> TurnData:
+        """Return a standalone TurnData copy of this turn."""
+        return TurnData(
+            key=self.key,
+            name=self.name,
+            seed_volume=self.seed_volume,
+            target_volume=self.target_volume,
+            assigned_volume=self.assigned_volume,
+            geh=self.geh)
@@ -9,4 +9,18 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../stesso')))
 
-import stesso
\ No newline at end of file
+import stesso
+from network import net_read
+
+
+NETWORKS = os.path.join(os.path.dirname(__file__), "networks")
+
+
+def load_network(name, turns=True):
+    """Create the test network in networks/<name>, with its turn targets if turns is True."""
+    net_folder = os.path.join(NETWORKS, name)
+    net = net_read.create_network(os.path.join(net_folder, "points.shp"),
+                                  os.path.join(net_folder, "links.shp"))
+    if turns:
+        net_read.import_turns(os.path.join(net_folder, "turn targets.csv"), net)
+    return net
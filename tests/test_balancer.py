@@ -0,0 +1,276 @@
+import unittest
+
+import numpy as np
+from scipy.optimize import lsq_linear
+
+from context import stesso, load_network
+from network.net import Network
+from balancer import balancer
+from balancer.report import BalancerReport, SolverStats
+
+
+def small_network():
+    """A -> B -> C with a U-turn at B, whose targets cannot all be met."""
+    net = Network()
+    net.add_nodes_bulk(['A', 'B', 'C'], [0, 1, 2], [0, 0, 0], [1, 0, 0], [0, 0, 1])
+    net.add_links_bulk(['A', 'B', 'B'], ['B', 'C', 'A'], [1, 1, 1], ['ab', 'bc', 'ba'],
+                       [100, 85, 15])
+    net.init_turns()
+    net.init_link_flow_lists()
+    net.init_columnar_storage()
+
+    # Turns (A, B, C) and (A, B, A)
+    net.set_turn_array('target_volume', [80, 30])
+    return net
+
+
+def grid_network(n, seed=0):
+    """n x n grid of two-way links with a zone connected to each edge node.
+
+    Targets are random route volumes +/-20%, with 30% of them removed. Returns 
+    the network and the route volumes of its turns and links.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f'{r}_{c}' for r in range(n) for c in range(n)]
+    xs = [c for r in range(n) for c in range(n)]
+    ys = [r for r in range(n) for c in range(n)]
+    edge = [name for name, x, y in zip(names, xs, ys) if x in (0, n - 1) or y in (0, n - 1)]
+    zones = [f'z{name}' for name in edge]
+    is_zone = [False] * len(names) + [True] * len(zones)
+
+    a_nodes, b_nodes = [], []
+    for name, zone in zip(edge, zones):
+        a_nodes += [zone, name]
+        b_nodes += [name, zone]
+    for r in range(n):
+        for c in range(n):
+            for r2, c2 in ((r, c + 1), (r + 1, c)):
+                if r2 < n and c2 < n:
+                    a_nodes += [f'{r}_{c}', f'{r2}_{c2}']
+                    b_nodes += [f'{r2}_{c2}', f'{r}_{c}']
+
+    net = Network()
+    net.add_nodes_bulk(names + zones, xs + [0] * len(zones), ys + [0] * len(zones), 
+                       is_zone, is_zone)
+    net.add_links_bulk(a_nodes, b_nodes, rng.uniform(1, 2, len(a_nodes)), 
+                       [str(i) for i in range(len(a_nodes))], np.full(len(a_nodes), -1.0))
+    net.init_turns()
+    net.init_link_flow_lists()
+    net.init_routes()
+    net.init_columnar_storage()
+
+    for od in net.od:
+        for route in od.routes:
+            route.assigned_volume = float(rng.integers(0, 20))
+    net.set_link_and_turn_volume_from_route()
+
+    for get, put in ((net.turn_array, net.set_turn_array), (net.link_array, net.set_link_array)):
+        volumes = get('assigned_volume')
+        targets = np.round(volumes * rng.uniform(0.8, 1.2, len(volumes)))
+        targets[rng.random(len(targets)) < 0.3] = -1
+        put('target_volume', targets)
+
+    route_volumes = np.concatenate([net.turn_array('assigned_volume'), 
+                                    net.link_array('assigned_volume')])
+    return net, route_volumes
+
+
+def cost(system, x):
+    """Least squares cost of the weighted system."""
+    return 0.5 * np.sum((system.A @ x - system.B) ** 2)
+
+
+def dense_baseline(system):
+    """Solve the whole weighted system as one dense matrix."""
+    return lsq_linear(system.A.toarray(), system.B, bounds=(system.lbounds, system.ubounds)).x
+
+
+class BalancerTest(unittest.TestCase):
+    def assert_optimal(self, net, presolve=True):
+        result = balancer.balance_volumes(net, presolve=presolve)
+        report = result.report
+
+        baseline_cost = cost(result.system, dense_baseline(result.system))
+        exact_cost = balancer.balance_volumes(net, method='exact').report.cost
+
+        self.assertTrue(report.converged, report.summary())
+        self.assertLess(report.conservation_max, 1e-3)
+        self.assertLessEqual(report.cost, baseline_cost * (1 + 1e-6))
+        self.assertAlmostEqual(report.cost, exact_cost, delta=exact_cost * 1e-3)
+        return result
+
+    def test_small_network(self):
+        net = small_network()
+        for presolve in (True, False):
+            result = self.assert_optimal(net, presolve)
+            turn_volumes = result.balancer_est[:2]
+            np.testing.assert_allclose(turn_volumes, [81.25, 21.25], atol=1e-3)
+
+    def test_net01(self):
+        net = load_network("net01")
+        self.assert_optimal(net, presolve=True)
+        self.assert_optimal(net, presolve=False)
+
+    def test_net02(self):
+        net = load_network("net02")
+        result = balancer.balance_volumes(net)
+        baseline_cost = cost(result.system, dense_baseline(result.system))
+
+        self.assertTrue(result.report.converged, result.report.summary())
+        self.assertLess(result.report.conservation_max, 1e-3)
+        self.assertLessEqual(result.report.cost, baseline_cost)
+
+    def test_large_block(self):
+        net, route_volumes = grid_network(12)
+        result = balancer.balance_volumes(net)
+        report = result.report
+        exact_cost = balancer.balance_volumes(net, method='exact').report.cost
+
+        self.assertGreater(max(c.n_cols for c in report.components), 2000)
+        self.assertTrue(report.converged, report.summary())
+        self.assertLess(report.conservation_max, balancer.EXACT_TOLERANCE)
+        # The route volumes conserve flow and are within the target bounds.
+        self.assertLessEqual(report.cost, cost(result.system, route_volumes))
+        self.assertAlmostEqual(report.cost, exact_cost, delta=exact_cost * 1e-6)
+
+    def test_conflicting_bounds(self):
+        # The U-turn target bounds (30 to 90) exclude the link target bounds (7.5 to 22.5).
+        net = small_network()
+        net.set_turn_array('target_volume', [60, 60])
+        result = balancer.balance_volumes(net)
+        baseline_cost = cost(result.system, dense_baseline(result.system))
+
+        self.assertFalse(result.report.converged)
+        self.assertIn('Flow conservation cannot be met', result.report.components[0].message)
+        self.assertAlmostEqual(result.report.cost, baseline_cost, delta=baseline_cost * 1e-6)
+
+
+class ExactTest(unittest.TestCase):
+    def test_conserves_flow(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            report = balancer.balance_volumes(net, method='exact').report
+            weighted_cost = balancer.balance_volumes(net).report.cost
+
+            self.assertTrue(report.converged, report.summary())
+            self.assertLess(report.conservation_max, balancer.EXACT_TOLERANCE)
+            self.assertAlmostEqual(report.cost, weighted_cost, delta=weighted_cost * 1e-3)
+
+    def test_same_with_and_without_presolve(self):
+        net = load_network("net01")
+        cost = balancer.balance_volumes(net, method='exact').report.cost
+        full_cost = balancer.balance_volumes(net, method='exact', presolve=False).report.cost
+        self.assertAlmostEqual(cost, full_cost, delta=full_cost * 1e-6)
+
+    def test_conflicting_bounds(self):
+        # The U-turn target bounds (30 to 90) exclude the link target bounds (7.5 to 22.5).
+        net = small_network()
+        net.set_turn_array('target_volume', [60, 60])
+
+        result = balancer.balance_volumes(net, method='exact')
+        x = result.balancer_est
+
+        self.assertLess(result.report.conservation_max, balancer.EXACT_TOLERANCE)
+        self.assertTrue(result.report.converged, result.report.summary())
+        self.assertAlmostEqual(x[0] + x[1], x[result.matrix_cols_links[(0, 1)]])
+        self.assertEqual(result.report.n_bounds_relaxed, 1)
+        self.assertIn('1 components solved without target bounds', result.report.summary())
+
+        net.set_turn_array('target_volume', [80, 30])
+        self.assertEqual(balancer.balance_volumes(net, method='exact').report.n_bounds_relaxed, 0)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            balancer.balance_volumes(small_network(), method='unknown')
+
+
+class BalancePeriodsTest(unittest.TestCase):
+    def period_targets(self, net):
+        base = np.concatenate([net.turn_array('target_volume'), net.link_array('target_volume')])
+        scaled = np.where(base > 0, base * 1.2, base)
+        removed = base.copy()
+        removed[::3] = -1
+        return np.vstack([base, scaled, removed])
+
+    def test_same_as_balance_volumes(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            targets = self.period_targets(net)
+            n_turns = len(net._turns)
+
+            results = balancer.balance_periods(net, targets)
+            self.assertEqual(len(results), len(targets))
+
+            for period_targets, result in zip(targets, results):
+                net.set_turn_array('target_volume', period_targets[:n_turns])
+                net.set_link_array('target_volume', period_targets[n_turns:])
+                expected = balancer.balance_volumes(net)
+
+                np.testing.assert_allclose(result.balancer_est, expected.balancer_est)
+                self.assertAlmostEqual(result.report.cost, expected.report.cost)
+
+    def test_worker_processes(self):
+        net = load_network("net01")
+        targets = self.period_targets(net)
+
+        in_process = balancer.balance_periods(net, targets)
+        in_workers = balancer.balance_periods(net, targets, n_workers=2)
+
+        for a, b in zip(in_process, in_workers):
+            np.testing.assert_allclose(a.balancer_est, b.balancer_est)
+
+    def test_wrong_number_of_columns(self):
+        net = load_network("net01")
+        with self.assertRaises(ValueError):
+            balancer.balance_periods(net, np.zeros((2, 3)))
+
+
+class BalancerReportTest(unittest.TestCase):
+    def test_residuals(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            result = balancer.balance_volumes(net)
+            report = result.report
+            x = result.balancer_est
+
+            targets = {col: net.turn(*key).target_volume 
+                       for key, col in result.matrix_cols_turns.items()}
+            targets.update({col: net.link(*key).target_volume 
+                            for key, col in result.matrix_cols_links.items()})
+            target_cols = [col for col, target in targets.items() if target != -1]
+            target_diff = np.array([x[col] - targets[col] for col in target_cols])
+
+            self.assertEqual(report.shape, result.system.A.shape)
+            self.assertEqual(report.n_target_rows, len(target_cols))
+            self.assertEqual(report.n_flow_rows + report.n_target_rows, report.shape[0])
+            self.assertAlmostEqual(report.target_max, np.abs(target_diff).max())
+            self.assertAlmostEqual(report.target_rms, np.sqrt(np.mean(target_diff ** 2)))
+            self.assertAlmostEqual(report.cost, cost(result.system, x), delta=report.cost * 1e-9)
+
+            self.assertEqual(report.iterations, sum(c.iterations for c in report.components))
+            self.assertGreaterEqual(report.timings['total'], report.timings['solve'])
+            self.assertIn(f'{report.iterations} iterations, {report.status}', report.summary())
+
+    def test_progress(self):
+        calls = []
+        balancer.balance_volumes(load_network("net01"), progress=lambda *args: calls.append(args))
+
+        self.assertEqual(calls[0], ('assemble', 0, 1))
+        self.assertIn(('solve', 1, 1), calls)
+        self.assertEqual(calls[-1], ('done', 1, 1))
+
+    def test_status(self):
+        def stats(converged):
+            return SolverStats(1, 1, 1, 1, 'interior-point', 1 if converged else 0, '', 10, 
+                               converged, 0)
+
+        report = BalancerReport(components=[stats(True), stats(False), stats(True)])
+
+        self.assertFalse(report.converged)
+        self.assertEqual(report.iterations, 30)
+        self.assertEqual(report.status, '1 of 3 components not converged')
+        self.assertEqual(BalancerReport().status, 'converged')
+
+
+if __name__ == '__main__':
+    unittest.main()
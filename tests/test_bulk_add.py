@@ -0,0 +1,69 @@
+import unittest
+
+from context import stesso, load_network
+from network.net import DuplicateNodeError, Network, NodeNotFoundError
+from network.netlink import NetLinkData
+from network.netnode import NetNodeData
+
+
+class BulkAddTest(unittest.TestCase):
+    def test_same_as_one_at_a_time(self):
+        ref = load_network("net02", turns=False)
+        nodes = list(ref.nodes())
+        links = [(ref.node(i).name, ref.node(j).name, link) for (i, j), link in ref.links(True)]
+
+        single = Network()
+        for n in nodes:
+            single.add_node(NetNodeData(n.name, n.x, n.y, n.is_origin, n.is_destination))
+        for i_name, j_name, link in links:
+            single.add_link(i_name, j_name, NetLinkData(cost=link.cost, name=link.name, 
+                                                        target_volume=link.target_volume,
+                                                        shape_points=list(link.shape_points)))
+
+        bulk = Network()
+        keys = bulk.add_nodes_bulk([n.name for n in nodes], [n.x for n in nodes], 
+                                   [n.y for n in nodes], [n.is_origin for n in nodes], 
+                                   [n.is_destination for n in nodes])
+        bulk.add_links_bulk([i for i, _, _ in links], [j for _, j, _ in links], 
+                            [l.cost for _, _, l in links], [l.name for _, _, l in links], 
+                            [l.target_volume for _, _, l in links],
+                            [list(l.shape_points) for _, _, l in links])
+
+        self.assertEqual(keys.tolist(), [n.key for n in single.nodes()])
+        self.assertEqual([(n.key, n.name, n.x, n.y, n.is_origin, n.is_destination, 
+                           list(n.neighbors), n.up_neighbors) for n in bulk.nodes()],
+                         [(n.key, n.name, n.x, n.y, n.is_origin, n.is_destination, 
+                           list(n.neighbors), n.up_neighbors) for n in single.nodes()])
+        self.assertEqual([(l.key, l.name, l.cost, l.target_volume, list(l.shape_points)) 
+                          for l in bulk.links()],
+                         [(l.key, l.name, l.cost, l.target_volume, list(l.shape_points)) 
+                          for l in single.links()])
+
+        bulk.init_turns()
+        single.init_turns()
+        self.assertEqual(list(bulk._turns), list(single._turns))
+
+    def test_straight_links_without_shape_points(self):
+        net = Network()
+        net.add_nodes_bulk(['A', 'B'], [0, 3], [0, 4], [True, False], [False, True])
+        net.add_links_bulk(['A'], ['B'], [1], ['ab'], [-1])
+
+        self.assertEqual([tuple(p) for p in net.link(0, 1).shape_points], [(0, 0), (3, 4)])
+
+    def test_errors_add_nothing(self):
+        net = Network()
+        net.add_nodes_bulk(['A', 'B'], [0, 1], [0, 0], [True, False], [False, True])
+
+        with self.assertRaises(DuplicateNodeError):
+            net.add_nodes_bulk(['C', 'C'], [0, 1], [0, 0], [False, False], [False, False])
+        with self.assertRaises(DuplicateNodeError):
+            net.add_nodes_bulk(['C', 'A'], [0, 1], [0, 0], [False, False], [False, False])
+        self.assertEqual(len(net._graph), 2)
+
+        with self.assertRaises(NodeNotFoundError):
+            net.add_links_bulk(['A', 'A'], ['B', 'X'], [1, 1], ['ab', 'ax'], [-1, -1])
+        self.assertEqual(list(net.links()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
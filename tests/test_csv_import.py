@@ -0,0 +1,100 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from context import stesso, load_network
+from network import net_read
+from network.net import Network
+
+
+def write_csv(file_path, header, rows):
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def node_rows(net):
+    return [[n.name, n.x, n.y, int(n.is_origin), int(n.is_destination)] for n in net.nodes()]
+
+
+def link_rows(net):
+    return [[net.node(i).name, net.node(j).name, link.cost, link.name, link.target_volume]
+            for (i, j), link in net.links(True)]
+
+
+class CSVImportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.reference = load_network("net02", turns=False)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return super().tearDown()
+
+    def path(self, file_name):
+        return os.path.join(self.temp_dir.name, file_name)
+
+    def assert_same_graph(self, net):
+        ref = self.reference
+        self.assertEqual([(n.name, n.x, n.y, n.is_origin, n.is_destination) for n in net.nodes()],
+                         [(n.name, n.x, n.y, n.is_origin, n.is_destination) for n in ref.nodes()])
+        self.assertEqual([(l.key, l.name, l.cost, l.target_volume) for l in net.links()],
+                         [(l.key, l.name, l.cost, l.target_volume) for l in ref.links()])
+
+    def test_chunks(self):
+        write_csv(self.path("nodes.csv"), net_read.NODE_CSV_COLUMNS, node_rows(self.reference))
+        write_csv(self.path("links.csv"), net_read.LINK_CSV_COLUMNS, link_rows(self.reference))
+
+        for chunk_rows in (1, 7, net_read.CSV_CHUNK_ROWS):
+            net = Network()
+            bbox = net_read.add_nodes_from_csv(net, self.path("nodes.csv"), chunk_rows=chunk_rows)
+            net_read.add_links_from_csv(net, self.path("links.csv"), chunk_rows=chunk_rows)
+
+            self.assert_same_graph(net)
+            xy = np.array([(n.x, n.y) for n in net.nodes()])
+            self.assertEqual(bbox, (*xy.min(axis=0), *xy.max(axis=0)))
+
+    def test_header_mapping(self):
+        # Columns in a different order, with different case and names.
+        write_csv(self.path("nodes.csv"), ['Y', 'X', 'NODE_ID', 'IS_DESTINATION', 'IS_ORIGIN'],
+                  [[y, x, name, dest, orig] for name, x, y, orig, dest in node_rows(self.reference)])
+        write_csv(self.path("links.csv"), ['Name', 'Volume', 'Cost', 'A', 'B'],
+                  [[name, vol, cost, a, b] for a, b, cost, name, vol in link_rows(self.reference)])
+
+        net = Network()
+        net_read.add_nodes_from_csv(net, self.path("nodes.csv"), columns={'name': 'NODE_ID'})
+        net_read.add_links_from_csv(net, self.path("links.csv"), 
+                                    columns={'from_node': 'A', 'to_node': 'B', 
+                                             'target_volume': 'Volume'})
+        self.assert_same_graph(net)
+
+    def test_positional_columns(self):
+        # Unknown header names are read from the default column positions.
+        write_csv(self.path("nodes.csv"), ['a', 'b', 'c', 'd', 'e'], node_rows(self.reference))
+
+        net = Network()
+        net_read.add_nodes_from_csv(net, self.path("nodes.csv"))
+        self.assertEqual([n.name for n in net.nodes()], [n.name for n in self.reference.nodes()])
+
+        with self.assertRaises(ValueError):
+            net_read.add_nodes_from_csv(Network(), self.path("nodes.csv"), columns={'name': 'ID'})
+
+    def test_create_network(self):
+        write_csv(self.path("nodes.csv"), net_read.NODE_CSV_COLUMNS, node_rows(self.reference))
+        write_csv(self.path("links.csv"), net_read.LINK_CSV_COLUMNS, link_rows(self.reference))
+
+        net = net_read.create_network(self.path("nodes.csv"), self.path("links.csv"))
+
+        self.assert_same_graph(net)
+        self.assertEqual([t.key for t in net.turns()], [t.key for t in self.reference.turns()])
+        self.assertEqual([[r.nodes for r in od.routes] for od in net.od],
+                         [[r.nodes for r in od.routes] for od in self.reference.od])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+
+from context import stesso, NETWORKS
+from model import Model
+
+
+def load_model(name):
+    net_folder = os.path.join(NETWORKS, name)
+    model = Model()
+    model.network_cache_dir = None
+    model.load(os.path.join(net_folder, "points.shp"),
+               os.path.join(net_folder, "links.shp"),
+               os.path.join(net_folder, "turn targets.csv"))
+    return model
+
+
+class ModelTest(unittest.TestCase):
+    def test_set_turn_volume_edits_target(self):
+        model = load_model("net01")
+        model.balance_volumes()
+
+        turn_key, turn = next((key, turn) for key, turn in model.net.turns(True)
+                              if turn.target_volume > 0)
+        model.set_turn_volume(turn_key, 'target_volume', 123)
+
+        self.assertEqual(model.get_turn_data(turn_key, 'target_volume'), 123)
+
+    def test_incremental_balance_matches_full_balance(self):
+        model = load_model("net01")
+        model.balance_volumes()
+
+        turn_key = next(key for key, turn in model.net.turns(True) if turn.target_volume > 0)
+        model.set_turn_volume(turn_key, 'target_volume', 123)
+        model.balance_volumes(incremental=True)
+
+        full = load_model("net01")
+        full.set_turn_volume(turn_key, 'target_volume', 123)
+        full.balance_volumes()
+
+        self.assertEqual(full.net.turn(*turn_key).target_volume, 123)
+        # The optimum of net01 is not unique, so compare costs instead of volumes.
+        incremental_cost = model.balancer_result.report.cost
+        full_cost = full.balancer_result.report.cost
+        self.assertAlmostEqual(incremental_cost, full_cost, delta=full_cost * 1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
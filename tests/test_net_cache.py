@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from context import stesso, NETWORKS
+from network import net_cache, net_snapshot
+from model import Model
+
+
+NODE_FILE = os.path.join(NETWORKS, "net01", "points.shp")
+LINK_FILE = os.path.join(NETWORKS, "net01", "links.shp")
+
+
+class NetCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temp_dir.name
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return super().tearDown()
+
+    def test_cached_network_matches_created_network(self):
+        net = net_cache.create_network_cached(NODE_FILE, LINK_FILE, cache_dir=self.cache_dir)
+        self.assertEqual(len([f for f in os.listdir(self.cache_dir) if f.endswith('.npz')]), 1)
+
+        with mock.patch.object(net_cache.net_read, 'create_network') as create_network:
+            cached = net_cache.create_network_cached(NODE_FILE, LINK_FILE, cache_dir=self.cache_dir)
+            create_network.assert_not_called()
+
+        self.assertEqual([(t.key, t.name) for t in net.turns()],
+                         [(t.key, t.name) for t in cached.turns()])
+        self.assertEqual([(l.key, l.name) for l in net.links()],
+                         [(l.key, l.name) for l in cached.links()])
+
+    def test_failed_save_leaves_no_files(self):
+        with mock.patch.object(net_snapshot, 'save_network', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                net_cache.create_network_cached(NODE_FILE, LINK_FILE, cache_dir=self.cache_dir)
+
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_model_cache_is_opt_in(self):
+        self.assertIsNone(Model().network_cache_dir)
+
+        with mock.patch.object(net_cache, 'create_network_cached') as create_network_cached:
+            Model().load(NODE_FILE, LINK_FILE)
+            create_network_cached.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
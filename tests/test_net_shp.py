@@ -0,0 +1,61 @@
+import os
+import unittest
+
+import numpy as np
+import shapefile
+
+from context import stesso, NETWORKS
+from network.net_shp import read_shapefile_columns
+
+
+class NetShpTest(unittest.TestCase):
+    """Compare read_shapefile_columns with pyshp, the reference shapefile reader."""
+
+    def assert_same_as_pyshp(self, shp_path):
+        columns = read_shapefile_columns(shp_path)
+
+        with shapefile.Reader(shp_path) as reader:
+            self.assertEqual(columns.shape_type, reader.shapeType)
+            np.testing.assert_allclose(columns.bbox, reader.bbox)
+
+            shape_records = reader.shapeRecords()
+            field_names = [field[0] for field in reader.fields[1:]]
+
+        self.assertEqual(len(columns), len(shape_records))
+
+        for n, shape_record in enumerate(shape_records):
+            points = np.array(shape_record.shape.points, dtype=float).reshape(-1, 2)
+            np.testing.assert_array_equal(columns.coords[columns.offsets[n]:columns.offsets[n + 1]],
+                                          points[:, :2])
+
+            for field_name, value in zip(field_names, shape_record.record):
+                column_value = columns.records[field_name][n]
+                if value is None:
+                    # Blank numeric values
+                    self.assertTrue(np.isnan(column_value), (shp_path, n, field_name))
+                else:
+                    self.assertEqual(column_value, value, (shp_path, n, field_name))
+
+    def test_nodes(self):
+        for name in ("net01", "net02"):
+            self.assert_same_as_pyshp(os.path.join(NETWORKS, name, "points.shp"))
+
+    def test_links(self):
+        for name in ("net01", "net02"):
+            self.assert_same_as_pyshp(os.path.join(NETWORKS, name, "links.shp"))
+
+    def test_selected_fields(self):
+        shp_path = os.path.join(NETWORKS, "net01", "links.shp")
+        all_fields = read_shapefile_columns(shp_path)
+        field_name = next(iter(all_fields.records))
+
+        selected = read_shapefile_columns(shp_path, fields=[field_name])
+        self.assertEqual(list(selected.records), [field_name])
+        np.testing.assert_array_equal(selected.records[field_name], all_fields.records[field_name])
+
+        with self.assertRaises(ValueError):
+            read_shapefile_columns(shp_path, fields=['NOT_A_FIELD'])
+
+
+if __name__ == '__main__':
+    unittest.main()
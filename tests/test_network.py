@@ -0,0 +1,242 @@
+import unittest
+
+import numpy as np
+
+from context import stesso, load_network
+from network.geh import geh, geh_array, geh_summary
+from network.netlink import NetLinkData
+from network.netnode import NetNodeData
+
+
+def reference_turns(net):
+    """Turns enumerated node by node, skipping u-turns at dead ends."""
+    turns = set()
+    for i, node in net._graph.items():
+        for j in node.neighbors:
+            end_node = net.node(j)
+            for k in end_node.neighbors:
+                is_deadend = len(end_node.up_neighbors) == 1 and len(end_node.neighbors) == 1
+                if is_deadend and i == k:
+                    continue
+                turns.add((i, j, k))
+    return turns
+
+
+class TurnTest(unittest.TestCase):
+    def test_turns_match_reference(self):
+        for name in ("net01", "net02"):
+            net = load_network(name, turns=False)
+            self.assertEqual(set(key for key, _ in net.turns(True)), reference_turns(net))
+
+    def test_turn_names(self):
+        net = load_network("net01", turns=False)
+        names = {key: turn.name for key, turn in net.turns(True)}
+
+        for (i, j, k), name in names.items():
+            self.assertEqual(name, f'{i}_{j}_{k}')
+
+        net.release_columnar_storage()
+        self.assertEqual({key: turn.name for key, turn in net.turns(True)}, names)
+
+    def test_turn_names_after_add_link(self):
+        net = load_network("net01", turns=False)
+        net.add_node(NetNodeData('new', 0, 0, False, False))
+        _, node = next(iter(net._graph.items()))
+        net.add_link(node.name, 'new', NetLinkData(cost=1, name='new', target_volume=-1, 
+                                                   shape_points=[(node.x, node.y), (0, 0)]))
+
+        for (i, j, k), turn in net.turns(True):
+            self.assertEqual(turn.name, f'{i}_{j}_{k}')
+
+
+def calc_volumes(net):
+    """Link and turn volumes, imbalance and GEH, as Model.load computes them."""
+    net.init_assigned_turn_vol()
+    net.assign_link_volume_from_turns()
+    net.calc_link_imbalance()
+    net.calc_network_geh()
+
+
+class ColumnarStorageTest(unittest.TestCase):
+    def test_same_results_as_object_storage(self):
+        for name in ("net01", "net02"):
+            columnar = load_network(name)
+            objects = load_network(name)
+            objects.release_columnar_storage()
+
+            calc_volumes(columnar)
+            calc_volumes(objects)
+
+            self.assertAlmostEqual(columnar.total_geh, objects.total_geh)
+            for field in ('target_volume', 'assigned_volume', 'imbalance', 'geh'):
+                np.testing.assert_allclose(columnar.link_array(field), objects.link_array(field))
+            for field in ('target_volume', 'assigned_volume', 'geh'):
+                np.testing.assert_allclose(columnar.turn_array(field), objects.turn_array(field))
+
+    def test_views_read_and_write_arrays(self):
+        net = load_network("net01")
+        (i, j), link = next(iter(net.links(True)))
+        turn_key, _ = next(iter(net.turns(True)))
+
+        link.assigned_volume = 12.5
+        net.set_turn_array('target_volume', np.arange(len(net._turns), dtype=float))
+
+        self.assertEqual(net.link_array('assigned_volume')[0], 12.5)
+        self.assertEqual(net.turn(*turn_key).target_volume, 0)
+        self.assertEqual(net.turn_array('target_volume')[-1], len(net._turns) - 1)
+
+        net.release_columnar_storage()
+        self.assertEqual(net.link(i, j).assigned_volume, 12.5)
+        np.testing.assert_array_equal(net.turn_array('target_volume'), 
+                                      np.arange(len(net._turns), dtype=float))
+
+
+class GEHTest(unittest.TestCase):
+    def test_geh_array_matches_geh(self):
+        m = [0, 100, 100, 50, -10, -100, 0]
+        c = [0, 100, 80, 0, 10, 50, 5]
+        np.testing.assert_allclose(geh_array(m, c), [geh(a, b) for a, b in zip(m, c)])
+
+    def test_network_geh_matches_loop(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            calc_volumes(net)
+
+            # GEH of each link and turn with a target, one at a time.
+            total = sum(geh(link.target_volume, link.assigned_volume) for link in net.links())
+            total += sum(geh(t.target_volume, t.assigned_volume) for t in net.turns() 
+                         if t.target_volume > 0)
+
+            self.assertAlmostEqual(net.total_geh, total)
+            for link in net.links():
+                self.assertAlmostEqual(link.geh, geh(link.target_volume, link.assigned_volume))
+
+    def test_summary(self):
+        summary = geh_summary([1, 2, 3, 4, 12], percentiles=(50,), thresholds=(5, 10))
+
+        self.assertEqual(summary.count, 5)
+        self.assertEqual(summary.total, 22)
+        self.assertAlmostEqual(summary.mean, 4.4)
+        self.assertEqual(summary.percentiles, {50: 3})
+        self.assertEqual(summary.share_below, {5: 0.8, 10: 0.8})
+
+        self.assertEqual(geh_summary([]).count, 0)
+
+    def test_network_summary(self):
+        net = load_network("net01")
+        calc_volumes(net)
+        summary = net.geh_summary()
+
+        n_targets = (np.count_nonzero(net.link_array('target_volume') >= 0) 
+                     + np.count_nonzero(net.turn_array('target_volume') > 0))
+        self.assertEqual(summary.count, n_targets)
+
+
+class CSRAdjacencyTest(unittest.TestCase):
+    def test_matches_graph(self):
+        for name in ("net01", "net02"):
+            net = load_network(name, turns=False)
+            csr = net.csr_adjacency()
+            keys = csr.node_keys
+
+            self.assertEqual(csr.link_keys, [key for key, _ in net.links(True)])
+
+            for n, node in enumerate(net.nodes()):
+                self.assertEqual(keys[n], node.key)
+
+                start, stop = csr.fwd_offsets[n], csr.fwd_offsets[n + 1]
+                self.assertEqual(keys[csr.fwd_targets[start:stop]].tolist(), list(node.neighbors))
+                for link_id, j in zip(csr.fwd_links[start:stop], keys[csr.fwd_targets[start:stop]]):
+                    self.assertEqual(csr.link_keys[link_id], (node.key, j))
+
+                start, stop = csr.rev_offsets[n], csr.rev_offsets[n + 1]
+                self.assertEqual(sorted(keys[csr.rev_sources[start:stop]].tolist()), 
+                                 sorted(node.up_neighbors))
+
+    def test_csgraph_weights(self):
+        net = load_network("net01", turns=False)
+        csr = net.csr_adjacency()
+        graph = csr.to_csgraph(net.link_array('cost'))
+
+        for (i, j), link in net.links(True):
+            self.assertEqual(graph[csr.node_index[i], csr.node_index[j]], link.cost)
+
+    def test_cleared_when_links_are_added(self):
+        net = load_network("net01", turns=False)
+        csr = net.csr_adjacency()
+        self.assertIs(net.csr_adjacency(), csr)
+
+        net.add_node(NetNodeData('new', 0, 0, False, False))
+        self.assertIsNot(net.csr_adjacency(), csr)
+        self.assertEqual(net.csr_adjacency().n_nodes, csr.n_nodes + 1)
+
+
+class LinkTurnIndexTest(unittest.TestCase):
+    def test_matches_turn_lists(self):
+        for name in ("net01", "net02"):
+            net = load_network(name, turns=False)
+            index = net.link_turn_index()
+            turn_keys = [key for key, _ in net.turns(True)]
+
+            for n, link in enumerate(net.links()):
+                turns_in = index.in_turns[index.in_offsets[n]:index.in_offsets[n + 1]]
+                turns_out = index.out_turns[index.out_offsets[n]:index.out_offsets[n + 1]]
+                self.assertEqual([turn_keys[t] for t in turns_in], link.turns_in)
+                self.assertEqual([turn_keys[t] for t in turns_out], link.turns_out)
+
+    def test_imbalance_and_link_volume_match_turn_lists(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            calc_volumes(net)
+
+            for link in net.links():
+                volume_in = sum(net.turn(*t).assigned_volume for t in link.turns_in)
+                volume_out = sum(net.turn(*t).assigned_volume for t in link.turns_out)
+
+                if link.turns_out:
+                    self.assertAlmostEqual(link.assigned_volume, volume_out)
+                else:
+                    self.assertAlmostEqual(link.assigned_volume, volume_in)
+
+                if link.turns_in and link.turns_out:
+                    self.assertAlmostEqual(link.imbalance, volume_out - volume_in)
+                else:
+                    self.assertEqual(link.imbalance, 0)
+
+    def test_link_volumes_and_imbalance_helpers(self):
+        net = load_network("net01")
+        calc_volumes(net)
+        index = net.link_turn_index()
+        turn_volumes = net.turn_array('assigned_volume')
+
+        np.testing.assert_allclose(index.link_volumes(turn_volumes), net.link_array('assigned_volume'))
+        np.testing.assert_allclose(index.link_imbalance(turn_volumes), net.link_array('imbalance'))
+
+
+class RouteIncidenceTest(unittest.TestCase):
+    def test_volumes_match_route_walk(self):
+        net = load_network("net02", turns=False)
+        routes = [route for od in net.od for route in od.routes]
+        rng = np.random.default_rng(0)
+        for route in routes:
+            route.assigned_volume = float(rng.integers(0, 100))
+
+        net.set_link_and_turn_volume_from_route()
+
+        # Walk each route and add its volume to every link and turn on it.
+        link_volumes = {key: 0.0 for key, _ in net.links(True)}
+        turn_volumes = {key: 0.0 for key, _ in net.turns(True)}
+        for route in routes:
+            nodes = route.nodes
+            for x in range(len(nodes) - 1):
+                link_volumes[(nodes[x], nodes[x + 1])] += route.assigned_volume
+            for x in range(len(nodes) - 2):
+                turn_volumes[(nodes[x], nodes[x + 1], nodes[x + 2])] += route.assigned_volume
+
+        self.assertGreater(len(routes), 0)
+        np.testing.assert_allclose(net.link_array('assigned_volume'), list(link_volumes.values()))
+        np.testing.assert_allclose(net.turn_array('assigned_volume'), list(turn_volumes.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
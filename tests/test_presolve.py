@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from context import stesso, load_network
+from balancer import balancer
+from balancer.presolve import presolve
+
+
+class PresolveTest(unittest.TestCase):
+    def test_merge_and_fold(self):
+        # x0 - x1 = 0 (alias), x1 + x2 - x3 = 0, x2 fixed at 4.
+        A = sparse.csr_matrix([[1, -1, 0, 0],
+                               [0, 1, 1, -1]], dtype=float)
+        B = np.zeros(2)
+        lbounds = np.array([0, 0, 4, 0], dtype=float)
+        ubounds = np.array([np.inf, 10, 4, np.inf])
+
+        reduced = presolve(A, B, lbounds, ubounds)
+
+        # x0 and x1 merged, x2 folded into B, the alias row dropped.
+        self.assertEqual(reduced.A.shape, (1, 2))
+        np.testing.assert_array_equal(reduced.A.toarray(), [[1, -1]])
+        np.testing.assert_array_equal(reduced.B, [-4])
+        np.testing.assert_array_equal(reduced.ubounds, [10, np.inf])
+
+        np.testing.assert_array_equal(reduced.postsolve(np.array([3.0, 7.0])), [3, 3, 4, 7])
+
+    def test_conflicting_bounds_are_not_merged(self):
+        A = sparse.csr_matrix([[1, -1]], dtype=float)
+        reduced = presolve(A, np.zeros(1), np.array([0.0, 5.0]), np.array([2.0, 6.0]))
+
+        self.assertEqual(reduced.A.shape, (1, 2))
+
+    def test_same_cost_as_full_solve(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            cost = balancer.balance_volumes(net, presolve=True).report.cost
+            full_cost = balancer.balance_volumes(net, presolve=False).report.cost
+            self.assertAlmostEqual(cost, full_cost, delta=full_cost * 1e-3)
+
+    def test_exact_with_unbalanced_fixed_columns(self):
+        # Turn x0 and link x1 must be equal, but their targets fix them at 5 and 3.
+        A = sparse.csr_matrix([[1, -1],
+                               [1, 0],
+                               [0, 1]], dtype=float)
+        B = np.array([0.0, 5.0, 3.0])
+        lbounds = np.array([5.0, 3.0])
+        ubounds = np.array([5.0, 3.0])
+
+        x, stats = balancer._solve_subproblem((A, B, lbounds, ubounds, None, 1, True, True))
+
+        self.assertAlmostEqual(x[0] - x[1], 0, delta=balancer.EXACT_TOLERANCE)
+        self.assertTrue(stats.converged)
+        self.assertGreater(stats.iterations, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
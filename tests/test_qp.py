@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import lsq_linear
+
+from context import stesso
+from balancer.qp import solve_qp
+
+
+class SolveQPTest(unittest.TestCase):
+    def test_matches_bounded_least_squares(self):
+        # minimize 0.5 * |T.x - t|^2 + 0.5 / delta * |C.x - c|^2 is a weighted 
+        # least squares problem with row weights 1 / sqrt(delta).
+        rng = np.random.default_rng(0)
+        T = rng.standard_normal((30, 10))
+        t = rng.standard_normal(30)
+        C = rng.standard_normal((3, 10))
+        c = rng.standard_normal(3)
+        lbounds = np.full(10, -0.5)
+        ubounds = np.where(np.arange(10) % 2 == 0, 0.5, np.inf)
+        delta = 1e-2
+
+        result = solve_qp(sparse.csr_matrix(T.T @ T), -(T.T @ t), sparse.csr_matrix(C), c,
+                          lbounds, ubounds, delta)
+        weight = 1 / np.sqrt(delta)
+        expected = lsq_linear(np.vstack([T, weight * C]), np.concatenate([t, weight * c]),
+                              bounds=(lbounds, ubounds), method='bvls', tol=1e-12)
+
+        self.assertTrue(result.converged, result.message)
+        np.testing.assert_allclose(result.x, expected.x, atol=1e-6)
+
+    def test_dependent_constraints(self):
+        # x0 + x1 = 2 twice, closest to (3, 0) with x1 >= 0.5.
+        C = sparse.csr_matrix([[1.0, 1.0], [1.0, 1.0]])
+        result = solve_qp(sparse.eye(2), np.array([-3.0, 0.0]), C, np.array([2.0, 2.0]),
+                          np.array([0.0, 0.5]), np.full(2, np.inf), 1e-12)
+
+        self.assertTrue(result.converged, result.message)
+        np.testing.assert_allclose(result.x, [1.5, 0.5], atol=1e-6)
+
+    def test_fixed_variables(self):
+        C = sparse.csr_matrix([[1.0, -1.0, -1.0]])
+        lbounds = np.array([4.0, 0.0, 1.0])
+        ubounds = np.array([4.0, np.inf, 1.0])
+        result = solve_qp(sparse.csr_matrix((3, 3)), np.zeros(3), C, np.zeros(1), 
+                          lbounds, ubounds, 1e-12)
+
+        self.assertTrue(result.converged, result.message)
+        np.testing.assert_allclose(result.x, [4, 3, 1], atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from context import stesso, load_network
+from balancer.scenarios import Scenario, run_scenarios
+from balancer import balancer
+
+
+class ScenarioTest(unittest.TestCase):
+    def test_base_scenario_matches_balance_volumes(self):
+        net = load_network("net01")
+        result = balancer.balance_volumes(net)
+        turn_cols = [result.matrix_cols_turns[key] for key, _ in net.turns(True)]
+
+        scenario_result, = run_scenarios(net, [Scenario(name='base')])
+
+        self.assertEqual(scenario_result.name, 'base')
+        np.testing.assert_allclose(scenario_result.turn_volumes, result.balancer_est[turn_cols])
+
+    def test_overrides(self):
+        net = load_network("net01")
+        turn_key = next(key for key, turn in net.turns(True) if turn.target_volume > 0)
+        link_key = next(link.key for link in net.links() if link.target_volume > 0)
+        scenario = Scenario(name='edited', turn_targets={turn_key: 123}, 
+                            link_targets={link_key: 456}, tolerance=0.25)
+
+        scenario_result, = run_scenarios(net, [scenario])
+
+        # The network is not changed.
+        self.assertNotEqual(net.turn(*turn_key).target_volume, 123)
+
+        net.turn(*turn_key).target_volume = 123
+        net.link(*link_key).target_volume = 456
+        result = balancer.balance_volumes(net, tolerance=0.25)
+        turn_cols = [result.matrix_cols_turns[key] for key, _ in net.turns(True)]
+
+        np.testing.assert_allclose(scenario_result.turn_volumes, result.balancer_est[turn_cols])
+
+    def test_worker_processes(self):
+        net = load_network("net02")
+        scenarios = [Scenario(name=str(tolerance), tolerance=tolerance) for tolerance in (0.1, 0.5)]
+
+        in_process = run_scenarios(net, scenarios, n_workers=1)
+        in_workers = run_scenarios(net, scenarios, n_workers=2)
+
+        for a, b in zip(in_process, in_workers):
+            self.assertEqual(a.name, b.name)
+            np.testing.assert_allclose(a.turn_volumes, b.turn_volumes)
+            self.assertAlmostEqual(a.total_geh, b.total_geh)
+
+
+class ToleranceTest(unittest.TestCase):
+    def test_zero_tolerance_is_rejected(self):
+        net = load_network("net01")
+        result = balancer.balance_volumes(net)
+
+        for presolve in (True, False):
+            with self.assertRaises(ValueError):
+                balancer.balance_volumes(net, tolerance=0.0, presolve=presolve)
+
+        with self.assertRaises(ValueError):
+            balancer.balance_periods(net, [np.full(len(result.balancer_est), -1.0)], tolerance=0.0)
+
+        result.system.tolerance = 0.0
+        with self.assertRaises(ValueError):
+            balancer.rebalance_volumes(net, result)
+
+        with self.assertRaises(ValueError):
+            Scenario(tolerance=0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import unittest
+
+import numpy as np
+
+from context import stesso, load_network
+from network import net_snapshot
+from network.net import Network
+
+
+def numeric_name_network():
+    """Network whose node and link names are numbers, as read from numeric DBF fields."""
+    net = Network()
+    net.add_nodes_bulk([10, 20, 30], [0, 1, 2], [0, 0, 0], [1, 0, 0], [0, 0, 1])
+    net.add_links_bulk([10, 20], [20, 30], [1, 1], [1001, 1002], [100, 90])
+    net.init_turns()
+    net.init_link_flow_lists()
+    net.init_routes()
+    net.init_columnar_storage()
+    return net
+
+
+def round_trip(net):
+    f = io.BytesIO()
+    net_snapshot.save_network(net, f)
+    f.seek(0)
+    return net_snapshot.load_network(f)
+
+
+class SnapshotTest(unittest.TestCase):
+    def assert_networks_equal(self, net, loaded):
+        self.assertEqual([(n.key, n.name, type(n.name), n.x, n.y, n.is_origin, n.is_destination)
+                          for n in net.nodes()],
+                         [(n.key, n.name, type(n.name), n.x, n.y, n.is_origin, n.is_destination)
+                          for n in loaded.nodes()])
+        self.assertEqual([(l.key, l.name, type(l.name), l.turns_in, l.turns_out) for l in net.links()],
+                         [(l.key, l.name, type(l.name), l.turns_in, l.turns_out) for l in loaded.links()])
+        self.assertEqual([(t.key, t.name) for t in net.turns()],
+                         [(t.key, t.name) for t in loaded.turns()])
+
+        for name in ('cost', 'target_volume', 'assigned_volume'):
+            np.testing.assert_array_equal(net.link_array(name), loaded.link_array(name))
+        for name in ('target_volume', 'assigned_volume'):
+            np.testing.assert_array_equal(net.turn_array(name), loaded.turn_array(name))
+
+        self.assertEqual([[r.nodes for r in od.routes] for od in net.od],
+                         [[r.nodes for r in od.routes] for od in loaded.od])
+
+        for (key, link), (_, loaded_link) in zip(net.links(True), loaded.links(True)):
+            self.assertEqual(list(link.shape_points), list(loaded_link.shape_points), key)
+
+    def test_round_trip(self):
+        for name in ("net01", "net02"):
+            net = load_network(name)
+            self.assert_networks_equal(net, round_trip(net))
+
+    def test_numeric_names(self):
+        net = numeric_name_network()
+        loaded = round_trip(net)
+        self.assert_networks_equal(net, loaded)
+        self.assertEqual(loaded.get_node_by_name(20)[0], net.get_node_by_name(20)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()